@@ -6,8 +6,8 @@ from .config import Config
 from .extensions import db, login_manager
 
 
-def create_app():
-    app = Flask(__name__, instance_relative_config=True)
+def create_app(test_config=None, instance_path=None):
+    app = Flask(__name__, instance_relative_config=True, instance_path=instance_path)
     app.config.from_object(Config)
 
     # instance folder
@@ -22,6 +22,10 @@ def create_app():
     os.makedirs(upload_root, exist_ok=True)
     app.config["UPLOAD_FOLDER"] = upload_root
 
+    # tests: override defaults (DB uri, upload folder, ...)
+    if test_config:
+        app.config.update(test_config)
+
     # init extensions
     db.init_app(app)
     login_manager.init_app(app)
@@ -38,6 +42,10 @@ def create_app():
     from .errors import register_error_handlers
     register_error_handlers(app)
 
+    # CLI commands (flask migrate-uploads, ...)
+    from .commands import register_commands
+    register_commands(app)
+
     # 禁止快取（方便開發）
     @app.after_request
     def add_header(response):
@@ -50,6 +58,10 @@ def create_app():
     with app.app_context():
         db.create_all()
 
+        # 舊 DB：補上新欄位 / index（create_all 只建缺的 table）
+        from .services import upgrade_schema
+        upgrade_schema()
+
         # 初始化使用者
         initial_users = [
             {"username": "superuser", "role": "superuser", "password": "superpass"},
@@ -76,4 +88,24 @@ def create_app():
 
         db.session.commit()
 
+        # FTS5 設備搜尋 index（virtual table + triggers 不在 create_all 裡）
+        from .services import ensure_search_index
+        ensure_search_index()
+
+        # 背景 ingest 是 process 內的 queue：重啟前沒跑完的 job 重跑（暫存檔不在就標 failed）
+        from .services import recover_ingest_jobs
+        recover_ingest_jobs()
+
+    # Server-Timing header + timing log（SERVER_TIMING 關閉時不掛任何 hook）
+    from .services import init_timing
+    init_timing(app)
+
+    # 舊版 instance/uploaded_items.json -> uploaded_files（只做一次）
+    from .services import init_upload_index
+    init_upload_index(app)
+
+    # InspectionRecord 之前上傳的 inspection：有缺才 parse 一次（report 頁只讀 record）
+    from .services import init_inspection_records
+    init_inspection_records(app)
+
     return app
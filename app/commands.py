@@ -0,0 +1,63 @@
+"""Flask CLI commands (`flask --app run <command>`)."""
+
+import click
+
+
+def register_commands(app):
+
+    @app.cli.command("migrate-uploads")
+    @click.option("--keep-originals", is_flag=True, help="Copy into the blob store but leave the flat files in place.")
+    def migrate_uploads(keep_originals):
+        """Move flat instance/uploads/<Category>/ files into the content-addressed blob store."""
+        from .services import migrate_legacy_uploads
+
+        stats = migrate_legacy_uploads(remove_originals=not keep_originals)
+        click.echo(
+            f"migrated={stats['migrated']} deduplicated={stats['deduplicated']} skipped={stats['skipped']}"
+        )
+
+    @app.cli.command("upgrade-db")
+    def upgrade_db():
+        """Add missing columns / indexes to an existing database (also runs at startup)."""
+        from .services import upgrade_schema
+
+        out = upgrade_schema()
+        click.echo(
+            f"columns={','.join(out['columns']) or '-'} indexes={','.join(out['indexes']) or '-'} "
+            f"skipped={','.join(out['skipped']) or '-'}"
+        )
+
+    @app.cli.command("backfill-inspections")
+    def backfill_inspections():
+        """Parse inspection files uploaded before InspectionRecord existed and store the results."""
+        from .services import backfill_inspection_records
+
+        stats = backfill_inspection_records()
+        click.echo(f"parsed={stats['parsed']} missing={stats['missing']} located={stats['located']}")
+
+    @app.cli.command("bench-parser")
+    @click.argument("paths", nargs=-1, type=click.Path(exists=True))
+    @click.option("--synthetic", default=500, show_default=True, help="Number of generated inspection files.")
+    @click.option("--repeat", default=3, show_default=True, help="Passes per corpus; the best one is reported.")
+    @click.option("--limit", type=int, default=None, help="Cap on real files taken from the upload store.")
+    def bench_parser(paths, synthetic, repeat, limit):
+        """Inspection parser throughput (files/sec, MB/sec) on synthetic and real *_Inspection_Result_*.csv."""
+        import tempfile
+
+        from .services.parser_bench import benchmark_parser, real_inspection_paths, write_synthetic_corpus
+
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            if synthetic:
+                results.append(benchmark_parser("synthetic", write_synthetic_corpus(tmp, synthetic), repeat))
+            real = real_inspection_paths(paths, limit=limit)
+            if real:
+                results.append(benchmark_parser("real", real, repeat))
+            else:
+                click.echo("real: no *_Inspection_Result_*.csv found (pass files / folders as arguments)")
+
+        for r in results:
+            click.echo(
+                f"{r.corpus}: files={r.files} size={r.bytes / 1e6:.2f}MB best={r.seconds:.3f}s "
+                f"files/sec={r.files_per_sec:.1f} MB/sec={r.mb_per_sec:.2f}"
+            )
@@ -4,3 +4,64 @@ class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-key")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     TEMPLATES_AUTO_RELOAD = True
+
+    # resumable upload sessions (/api/uploads/sessions)
+    UPLOAD_SESSION_CHUNK_SIZE = 8 * 1024 * 1024
+    UPLOAD_SESSION_MIN_CHUNK_SIZE = 64 * 1024
+    UPLOAD_SESSION_MAX_SIZE = 8 * 1024 * 1024 * 1024
+    UPLOAD_SESSION_TTL = 24 * 60 * 60
+
+    # multi-file batch upload (/api/uploads/batch)
+    UPLOAD_BATCH_MAX_FILES = 500
+
+    # background ingest (POST /api/uploads with Prefer: respond-async / ?async=1)
+    INGEST_WORKERS = 2
+    # running / queued longer than this: left behind by a dead process, re-run (or failed)
+    INGEST_JOB_STALE_SECONDS = 10 * 60
+
+    # zip archive ingest (.zip on any upload endpoint) — zip-bomb guards
+    ARCHIVE_MAX_MEMBERS = 1000
+    ARCHIVE_MAX_MEMBER_SIZE = 512 * 1024 * 1024
+    ARCHIVE_MAX_TOTAL_SIZE = 2 * 1024 * 1024 * 1024
+    ARCHIVE_MAX_RATIO = 100
+
+    # lazy sidebar tree (/api/tree/...): page size / max ?limit=
+    TREE_PAGE_SIZE = 50
+    TREE_PAGE_MAX = 200
+
+    # equipment search (/equipment/search, /api/equipment/search)
+    SEARCH_PAGE_SIZE = 50
+    SEARCH_PAGE_MAX = 200
+
+    # typo-tolerant SN / MAC lookup (/api/equipment/lookup)
+    TRIGRAM_TOP_K = 10
+    TRIGRAM_CANDIDATES_PER_RESULT = 20
+    TRIGRAM_MIN_SIMILARITY = 0.3
+
+    # bulk identifier resolve (/api/equipment/resolve)
+    RESOLVE_MAX_IDENTIFIERS = 10000
+    RESOLVE_CHUNK_SIZE = 500
+
+    # read API (/api/case-scenes, /api/rooms, /api/equipment): keyset page size
+    API_PAGE_SIZE = 100
+    API_PAGE_MAX = 1000
+
+    # server-side DataTables (/api/equipment/datatable): max rows per draw
+    DATATABLES_MAX_LENGTH = 500
+
+    # per-request Server-Timing header + "[timing]" log line (db / tpl / io / app)
+    SERVER_TIMING = False
+    SERVER_TIMING_SLOW_MS = 1000
+
+    # log summary page (/equipment/logs/<filename>): bucket size / max buckets / raw rows shown
+    LOG_SUMMARY_WINDOW_MINUTES = 3
+    LOG_SUMMARY_MAX_BUCKETS = 2000
+    LOG_SUMMARY_SAMPLE_ROWS = 5
+
+    # fleet inspection report (room / case): parse files without a record in a process pool
+    FLEET_REPORT_WORKERS = 4
+    FLEET_REPORT_PARALLEL_MIN = 16
+
+    # inventory / history export (/api/export/...): DB batch size / CSV rows per chunk
+    EXPORT_YIELD_PER = 1000
+    EXPORT_CSV_FLUSH_ROWS = 500
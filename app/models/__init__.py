@@ -6,3 +6,8 @@ Split into modules, while keeping legacy definitions in `_legacy.py`.
 from .user import User
 from .case import CaseScene, Room
 from .equipment import EquipmentType, EquipmentInfo, EquipmentManage
+from .job import IngestJob
+from .storage import StoredFile
+from .upload import UploadedFile
+from .meta import DataVersion
+from .inspection import InspectionRecord
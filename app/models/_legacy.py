@@ -6,7 +6,7 @@ from sqlalchemy import UniqueConstraint
 
 
 # ==========================================
-# 1. 使用?表：User
+# 1. 使用?�表：User
 # ==========================================
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -16,63 +16,67 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(128), nullable=False)
     role = db.Column(db.String(45), nullable=False)
 
-    # 密碼??
+    # 密碼?��?
     def set_password(self, pwd):
         self.password_hash = generate_password_hash(pwd)
 
     def check_password(self, pwd):
         return check_password_hash(self.password_hash, pwd)
 
-    # 權???
+    # 權�??��?
     def is_super(self): return self.role == "superuser"
     def is_operator(self): return self.role == "operator"
     def is_user(self): return self.role == "user"
 
-    # ?能權?
+    # ?�能權�?
     def can_manage_users(self): return self.is_super()
     def can_upload_logs(self): return True
     def can_upload_changes(self): return self.is_user() or self.is_super()
 
 
 # ==========================================
-# 2. 案??景表?CaseScene
+# 2. 案�??�景表�?CaseScene
 # ==========================================
 class CaseScene(db.Model):
     __tablename__ = "case_scene"
+    __table_args__ = (
+        # ensure_case_room / get_case_context: filter_by(country, location)
+        db.Index("ix_case_scene_country_location", "country", "location"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     country = db.Column(db.String(20), nullable=False)  
     location = db.Column(db.String(30), nullable=False)
 
-    # 一?場??多個房??
+    # 一?�場?��?多個房??
     rooms = db.relationship("Room", backref="case_scene", lazy=True)
 
 
 # ==========================================
-# 3. ??表?Room
+# 3. ?��?表�?Room
 # ==========================================
 class Room(db.Model):
     __tablename__ = "rooms"
-
     id = db.Column(db.Integer, primary_key=True)
     room_name = db.Column(db.String(40), nullable=False)
 
-    # FK ???景
+    # FK ?��??�景
     case_scene_id = db.Column(db.Integer, db.ForeignKey("case_scene.id"), nullable=False)
 
-    # ?? ??多個設???
+    # ?��? ??多個設?��?�?
     equipment_info = db.relationship("EquipmentInfo", backref="room", lazy=True)
 
-    # ?? ??多個設??????
+    # ?��? ??多個設?��??��???
     equipment_manage = db.relationship("EquipmentManage", backref="room", lazy=True)
 
     __table_args__ = (
+        # its implicit index serves rooms of a case (tree, case page, ensure_case_room by name)
         UniqueConstraint("case_scene_id", "room_name", name="uq_room_case_roomname"),
-    )    
+    )
 
 
 # ==========================================
-# 4. 設???：EquipmentType
+# 4. 設�??��?：EquipmentType
 # ==========================================
 class EquipmentType(db.Model):
     __tablename__ = "equipment_type"
@@ -80,21 +84,28 @@ class EquipmentType(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(40), nullable=False)
 
-    # 一?設???可對?多台設?
+    # 一?�設?��??�可對�?多台設�?
     equipments = db.relationship("EquipmentInfo", 
                                 backref="equipment_type", 
                                 lazy=True)
 
 
 # ==========================================
-# 5. 設?資?：EquipmentInfo
+# 5. 設�?資�?：EquipmentInfo
 # ==========================================
 class EquipmentInfo(db.Model):
     __tablename__ = "equipment_info"
+    __table_args__ = (
+        # room page / report: filter_by(room_id).order_by(oem_sn)
+        db.Index("ix_equipment_info_room_oem", "room_id", "oem_sn"),
+        # room + type filter, fleet stats GROUP BY (room_id, equipment_type_id)
+        db.Index("ix_equipment_info_room_type", "room_id", "equipment_type_id"),
+        db.Index("ix_equipment_info_type", "equipment_type_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
-    # SN ??，???FK-m 
+    # SN ?��?，�???FK-m 
     vendor_sn = db.Column(db.String(50), unique=True, nullable=False)
     oem_sn = db.Column(db.String(50), unique=True, nullable=False)
 
@@ -102,29 +113,34 @@ class EquipmentInfo(db.Model):
     macaddr = db.Column(db.String(30), nullable=True)
     firmware = db.Column(db.String(35), nullable=False)
     
-    # FK ????
+    # FK ?��??��?
     room_id = db.Column(db.Integer, db.ForeignKey("rooms.id"), nullable=True)
 
-    # FK ??設?類?
+    # FK ?��?設�?類�?
     equipment_type_id = db.Column(db.Integer, db.ForeignKey("equipment_type.id"), nullable=True)
 
-    # 設? ??多個管????
+    # 設�? ??多個管?��???
     manage_records = db.relationship("EquipmentManage", backref="equipment", lazy=True)
 
 
 # ==========================================
-# 6. 設?變更歷史：EquipmentManage
+# 6. 設�?變更歷史：EquipmentManage
 # ==========================================
 class EquipmentManage(db.Model):
     __tablename__ = "equipment_manage"
+    __table_args__ = (
+        # history of a device / of a room
+        db.Index("ix_equipment_manage_equipment", "equipment_info_id"),
+        db.Index("ix_equipment_manage_room", "room_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
-    # FK ??設?資?
+    # FK ?��?設�?資�?
     equipment_info_id = db.Column(db.Integer, db.ForeignKey("equipment_info.id"), nullable=False)
 
     customer_changes = db.Column(db.Text, nullable=True)
 
-    # FK ????（??當??置?
+    # FK ?��??��?（�??�當?��?置�?
     room_id = db.Column(db.Integer, db.ForeignKey("rooms.id"), nullable=False)
 
@@ -0,0 +1,34 @@
+"""Parsed inspection results, stored once at ingest (services/inspection_records.py)."""
+
+from datetime import datetime
+
+from ..extensions import db
+
+
+class InspectionRecord(db.Model):
+    """Inspection file (logical name) -> parsed field values."""
+
+    __tablename__ = "inspection_records"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # StoredFile.filename (category "inspection")
+    filename = db.Column(db.String(255), nullable=False, unique=True)
+    # content hash of the parsed file (None: legacy flat file back-filled without blob)
+    sha256 = db.Column(db.String(64), nullable=True)
+
+    equipment_id = db.Column(db.Integer, db.ForeignKey("equipment_info.id"), nullable=True)
+    # room the file was uploaded to + real upload time (StoredFile.created_at)
+    # nullable: rows from before these columns are filled by `flask backfill-inspections`
+    room_id = db.Column(db.Integer, db.ForeignKey("rooms.id"), nullable=True)
+    uploaded_at = db.Column(db.DateTime, nullable=True)
+
+    # parse result: {serial_number, vendor_sn, model, ..., firmware}
+    fields = db.Column(db.JSON, nullable=False)
+    parsed_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        # latest inspection per room / per device: one index seek each
+        db.Index("ix_inspection_record_room_uploaded", "room_id", "uploaded_at"),
+        db.Index("ix_inspection_record_equipment_uploaded", "equipment_id", "uploaded_at"),
+    )
@@ -0,0 +1,63 @@
+"""Background ingest jobs (see services/ingest_queue.py)."""
+
+from datetime import datetime
+
+from ..extensions import db
+
+
+class IngestJob(db.Model):
+    __tablename__ = "ingest_jobs"
+
+    id = db.Column(db.String(32), primary_key=True)
+
+    # queued -> running -> succeeded / failed
+    state = db.Column(db.String(16), nullable=False, default="queued", index=True)
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+
+    # original upload parameters (replayed into register_upload by the worker)
+    filename = db.Column(db.String(255), nullable=False)
+    staged_path = db.Column(db.String(512), nullable=False)
+    country = db.Column(db.String(80), nullable=False)
+    room = db.Column(db.String(40), nullable=True)
+    file_category = db.Column(db.String(20), nullable=False)
+    feedback_text = db.Column(db.Text, nullable=True)
+    equipment_type_id = db.Column(db.Integer, nullable=True)
+    equipment_id = db.Column(db.Integer, nullable=True)
+
+    size = db.Column(db.Integer, nullable=True)
+    sha256 = db.Column(db.String(64), nullable=True)
+
+    queued_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    stored_filename = db.Column(db.String(255), nullable=True)
+    duplicate = db.Column(db.Boolean, nullable=False, default=False)
+    error = db.Column(db.Text, nullable=True)
+
+    def to_dict(self) -> dict:
+        def _iso(dt):
+            return dt.isoformat(timespec="milliseconds") if dt else None
+
+        def _ms(a, b):
+            return round((b - a).total_seconds() * 1000, 1) if a and b else None
+
+        return dict(
+            job_id=self.id,
+            state=self.state,
+            filename=self.filename,
+            file_category=self.file_category,
+            country=self.country,
+            room=self.room,
+            size=self.size,
+            sha256=self.sha256,
+            stored_filename=self.stored_filename,
+            duplicate=bool(self.duplicate),
+            error=self.error,
+            queued_at=_iso(self.queued_at),
+            started_at=_iso(self.started_at),
+            finished_at=_iso(self.finished_at),
+            wait_ms=_ms(self.queued_at, self.started_at),
+            run_ms=_ms(self.started_at, self.finished_at),
+        )
@@ -0,0 +1,12 @@
+"""Shared counters (services/data_version.py)."""
+
+from ..extensions import db
+
+
+class DataVersion(db.Model):
+    """Monotonic version per data set; bumped in the same transaction as the change."""
+
+    __tablename__ = "data_versions"
+
+    name = db.Column(db.String(40), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,26 @@
+"""Upload metadata for the content-addressed blob store (services/blob_store.py)."""
+
+from datetime import datetime
+
+from ..extensions import db
+
+
+class StoredFile(db.Model):
+    """Logical upload filename (per category) -> sha256 blob."""
+
+    __tablename__ = "stored_files"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # inspection / logs / other / feedback_photos
+    category = db.Column(db.String(20), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+
+    sha256 = db.Column(db.String(64), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        db.UniqueConstraint("category", "filename", name="uq_stored_file_category_filename"),
+        db.Index("ix_stored_file_category_sha256", "category", "sha256"),
+    )
@@ -0,0 +1,33 @@
+"""Upload index: which file was uploaded to which case/room (services/upload_index.py).
+
+Replaces `instance/uploaded_items.json`.
+"""
+
+from datetime import datetime
+
+from ..extensions import db
+
+
+class UploadedFile(db.Model):
+    __tablename__ = "uploaded_files"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    case_scene_id = db.Column(db.Integer, db.ForeignKey("case_scene.id"), nullable=False)
+    room_id = db.Column(db.Integer, db.ForeignKey("rooms.id"), nullable=False)
+
+    # inspection / logs / other / feedback
+    category = db.Column(db.String(20), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+
+    # inspection / logs: the device the file belongs to
+    equipment_id = db.Column(db.Integer, db.ForeignKey("equipment_info.id"), nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        db.UniqueConstraint("room_id", "filename", name="uq_uploaded_file_room_filename"),
+        db.Index("ix_uploaded_file_room_category", "room_id", "category"),
+        db.Index("ix_uploaded_file_case_scene", "case_scene_id"),
+        db.Index("ix_uploaded_file_equipment", "equipment_id"),
+    )
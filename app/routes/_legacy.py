@@ -1,7 +1,7 @@
 # app/routes/_legacy.py
 from flask import (
     Blueprint, render_template, redirect, url_for,Flask,
-    request, flash, current_app, jsonify, send_from_directory, abort
+    request, flash, current_app, jsonify, send_file, abort, Response, stream_with_context
 )
 from flask_login import login_user, logout_user, login_required, current_user,LoginManager
 from sqlalchemy import or_
@@ -11,10 +11,9 @@ from ..http import api_ok, api_error
 import os
 from ..domain import CaseKey, EquipmentQuery
 from ..extensions import db, login_manager
-from ..models import User, CaseScene, Room, EquipmentInfo, EquipmentManage, EquipmentType
+from ..models import User, CaseScene, Room, EquipmentInfo, EquipmentManage, EquipmentType, StoredFile, UploadedFile, InspectionRecord
 from ..services import (
     save_feedback_with_photos,
-    load_uploaded_items,
     roles_required,
     build_tree_items,
     create_location,
@@ -22,7 +21,37 @@ from ..services import (
     build_case_room_report_ctx,
     build_inspection_report_context,
     build_room_equipments_ctx,
-    get_case_context
+    get_case_context,
+    create_upload_session,
+    get_upload_session,
+    put_upload_chunk,
+    complete_upload_session,
+    abort_upload_session,
+    register_upload_batch,
+    enqueue_upload,
+    get_ingest_job,
+    resolve_upload_path,
+    STATS,
+    TREE,
+    bump_data_version,
+    bump_all_room_versions,
+    get_fleet_stats,
+    versioned_cache,
+    list_case_scenes,
+    list_case_rooms,
+    search_equipments,
+    similar_equipments,
+    parse_identifiers,
+    resolve_identifiers,
+    read_case_scenes,
+    read_rooms,
+    read_equipment,
+    parse_datatables_request,
+    equipment_datatable,
+    latest_equipment_inspection,
+    room_fleet_report,
+    case_fleet_report,
+    export_stream,
 )
 
 main = Blueprint("main", __name__)
@@ -36,6 +65,7 @@ TAB_UPLOAD = "upload"
 TAB_SEARCH = "search"
 TAB_CASE = "case"
 TAB_REPORT = "report"
+TAB_FLEET = "fleet"
 
 CAT_INSPECTION = "inspection"
 CAT_LOGS = "logs"
@@ -301,16 +331,16 @@ def dashboard_partial():
 # Helpers (equipment)
 # ==========================================
 def equipment_base_ctx(tree_items=None, uploaded_items=None, equipment_types=None):
-    # uploaded_items
+    # uploaded_items：room 頁面自己帶（只含該 room），這裡不再讀整份 index
     if uploaded_items is None:
-        try:
-            uploaded_items = load_uploaded_items() or {}
-        except Exception:
-            uploaded_items = {}
+        uploaded_items = {}
 
-    # tree_items
+    # tree_items：sidebar 只送第一頁 case（不含 rooms），其餘由 /api/tree/... lazy load
     if tree_items is None:
         tree_items = build_tree_items(use_json_fallback=True)
+    page_size = current_app.config["TREE_PAGE_SIZE"]
+    tree_next_after = tree_items[page_size - 1]["id"] if len(tree_items) > page_size else None
+    tree_items = tree_items[:page_size]
 
     # equipment_types
     if equipment_types is None:
@@ -318,6 +348,8 @@ def equipment_base_ctx(tree_items=None, uploaded_items=None, equipment_types=Non
 
     return dict(
         tree_items=tree_items,
+        tree_next_after=tree_next_after,
+        fleet_stats=get_fleet_stats(),
         uploaded_items=uploaded_items,
         equipment_types=equipment_types,
 
@@ -338,14 +370,11 @@ def equipment_base_ctx(tree_items=None, uploaded_items=None, equipment_types=Non
     )
 
 
-def _upload_dir(kind: str) -> str:
-    # Centralize upload folder paths
-    base_dir = current_app.config["UPLOAD_FOLDER"]
-    if kind == "inspection":
-        return os.path.join(base_dir, "Inspection")
-    if kind == "logs":
-        return os.path.join(base_dir, "Logs")
-    raise ValueError("Unknown upload kind")
+def _upload_file(kind: str, filename: str):
+    # Centralize upload lookups: logical filename -> blob (or legacy flat file)
+    if kind not in ("inspection", "logs"):
+        raise ValueError("Unknown upload kind")
+    return resolve_upload_path(kind, filename)
 
 
 # ==========================================
@@ -364,6 +393,21 @@ def equipment_list():
     ctx["active_tab"] = TAB_LIST
     return render_template("equipment.html", **ctx)
 
+@main.route("/equipment/search")
+@login_required
+def equipment_search():
+    q = (request.args.get("q") or "").strip()
+    results = search_equipments(q) if q else []
+    ctx = equipment_base_ctx()
+    ctx.update(
+        active_tab=TAB_SEARCH,
+        q=q,
+        results=results,
+        # 打錯一個字元也能找到：沒有結果時給 SN / MAC 近似建議
+        suggestions=similar_equipments(q) if q and not results else [],
+    )
+    return render_template("equipment.html", **ctx)
+
 @main.route("/equipment/upload")
 @login_required
 def equipment_upload():
@@ -380,10 +424,9 @@ def equipment_upload():
 def logs_summary(filename):
     # Ensure filename is safe to open
     fname = secure_filename(filename)
-    logs_dir = _upload_dir("logs")
-    file_path = os.path.join(logs_dir, fname)
+    file_path = _upload_file("logs", fname)
 
-    if not os.path.exists(file_path):
+    if not file_path:
         return render_template("file_missing.html", filename=filename), 404
 
     from ..services import summarize_log_file
@@ -424,18 +467,21 @@ def view_inspection_report(filename):
 @main.route("/equipment/report/raw/<path:filename>")
 @login_required
 def download_inspection_file(filename):
-    # Secure and rely on send_from_directory's safe path handling
-    inspection_dir = _upload_dir("inspection")
     fname = secure_filename(filename)
-    return send_from_directory(inspection_dir, fname, as_attachment=True)
+    file_path = _upload_file("inspection", fname)
+    if not file_path:
+        abort(404)
+    return send_file(file_path, as_attachment=True, download_name=fname)
 
 
 @main.route("/equipment/download/<path:filename>")
 @login_required
 def download_log_file(filename):
-    logs_dir = _upload_dir("logs")
     fname = secure_filename(filename)
-    return send_from_directory(logs_dir, fname, as_attachment=True)
+    file_path = _upload_file("logs", fname)
+    if not file_path:
+        abort(404)
+    return send_file(file_path, as_attachment=True, download_name=fname)
 
 
 # ==========================================
@@ -541,6 +587,30 @@ def equipment_case_room_report(case_scene_id, room_id):
     return render_template("equipment.html", **ctx)
 
 
+@main.route("/equipment/case-scenes/<int:case_scene_id>/fleet-report")
+@main.route("/equipment/case-scenes/<int:case_scene_id>/rooms/<int:room_id>/fleet-report")
+@login_required
+def equipment_fleet_report(case_scene_id, room_id=None):
+    # 整個 room / 案場：每台設備最新 inspection 並排
+    if room_id is None:
+        data = case_fleet_report(case_scene_id)
+    else:
+        data = room_fleet_report(case_scene_id, room_id)
+    cs, room = data["cs"], data["room"]
+    cs_key = f"{cs.country}({cs.location})"
+
+    ctx = equipment_base_ctx()
+    ctx.update(
+        active_tab=TAB_FLEET,
+        fleet_report=data["report"],
+        selected_country=cs_key,
+        selected_country_id=cs.id,
+        selected_room=room.room_name if room else None,
+        selected_room_id=room.id if room else None,
+    )
+    return render_template("equipment.html", **ctx)
+
+
 @main.route("/equipment/case-scenes/<int:case_scene_id>/rooms/<int:room_id>/equipments")
 @login_required
 def equipment_case_room_equipments(case_scene_id, room_id):
@@ -555,7 +625,8 @@ def equipment_case_room_equipments(case_scene_id, room_id):
         type_id=request.args.get("type_id", type=int),
     )
 
-    data = build_room_equipments_ctx(case_scene_id, room_id, query)
+    # list 頁的表格走 server-side DataTables；只有上傳頁（Logs 選設備）需要整個清單
+    data = build_room_equipments_ctx(case_scene_id, room_id, query, with_equipments=(tab == TAB_UPLOAD))
 
     ctx = equipment_base_ctx(uploaded_items=data["uploaded_items"])
     ctx.update(
@@ -609,10 +680,16 @@ def reset_system():
         return jsonify(success=False, message="你沒有權限執行重置"), 403
 
     try:
+        UploadedFile.query.delete()
+        InspectionRecord.query.delete()
+        StoredFile.query.delete()
         EquipmentManage.query.delete()
         EquipmentInfo.query.delete()
         Room.query.delete()
         CaseScene.query.delete()
+        bump_data_version(TREE)
+        bump_data_version(STATS)
+        bump_all_room_versions()
         db.session.commit()
     except Exception as e:
         db.session.rollback()
@@ -627,20 +704,6 @@ def reset_system():
                 except Exception:
                     pass
 
-    # clear any in-memory cache
-    if hasattr(current_app, "uploaded_items"):
-        try:
-            current_app.uploaded_items.clear()
-        except Exception:
-            pass
-
-    json_path = os.path.join(current_app.instance_path, "uploaded_items.json")
-    if os.path.exists(json_path):
-        try:
-            os.remove(json_path)
-        except Exception:
-            pass
-
     return jsonify(success=True, message="系統已完全重置")
 
 
@@ -652,6 +715,250 @@ def api_root():
     return api_ok({"ok": True}, status=200)
 
 
+@api.route("/admin/cache-stats", methods=["GET"])
+@login_required
+@roles_required("superuser")
+def api_cache_stats():
+    return api_ok({
+        "tree": versioned_cache(TREE).stats(),
+        "stats": versioned_cache(STATS).stats(),
+    }, status=200)
+
+
+@api.route("/equipment/search", methods=["GET"])
+@login_required
+def api_equipment_search():
+    """Fleet-wide ranked search: ?q=&limit="""
+    q = (request.args.get("q") or "").strip()
+    results = search_equipments(q, limit=request.args.get("limit", type=int))
+    _add_room_urls(results)
+    return api_ok({"q": q, "count": len(results), "items": results}, status=200)
+
+
+@api.route("/equipment/lookup", methods=["GET"])
+@login_required
+def api_equipment_lookup():
+    """Typo-tolerant SN / MAC lookup (trigram similarity): ?q=&k="""
+    q = (request.args.get("q") or "").strip()
+    if len(q) < 3:
+        return api_error(400, "VALIDATION_ERROR", "q 至少需要 3 個字元")
+    results = similar_equipments(q, k=request.args.get("k", type=int))
+    _add_room_urls(results)
+    return api_ok({"q": q, "count": len(results), "items": results}, status=200)
+
+
+@api.route("/equipment/resolve", methods=["POST"])
+@login_required
+def api_equipment_resolve():
+    """Bulk SN / MAC -> equipment + room + case: {"identifiers": [...]}"""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("identifiers")
+
+    try:
+        identifiers = parse_identifiers(data)
+        out = resolve_identifiers(identifiers)
+        return api_ok({
+            "count": len(identifiers),
+            "matched": len(identifiers) - len(out["misses"]),
+            **out,
+        }, status=200)
+
+    except ValueError as e:
+        return api_error(400, "VALIDATION_ERROR", str(e))
+
+    except Exception:
+        current_app.logger.exception("api_equipment_resolve failed")
+        return api_error(500, "INTERNAL_SERVER_ERROR", "resolve failed")
+
+
+@api.route("/equipment/datatable", methods=["GET"])
+@login_required
+def api_equipment_datatable():
+    """DataTables server-side processing: ?room_id=&case_scene_id=&type_id=&draw=&start=&length=&order[..]&search[value]="""
+    try:
+        req = parse_datatables_request(request.args)
+        out = equipment_datatable(
+            req,
+            room_id=request.args.get("room_id", type=int),
+            case_scene_id=request.args.get("case_scene_id", type=int),
+            type_id=request.args.get("type_id", type=int),
+        )
+    except ValueError as e:
+        return api_error(400, "VALIDATION_ERROR", str(e))
+
+    for row in out["data"]:
+        row["feedback_url"] = url_for("main.equipment_feedback", eq_id=row["id"])
+    return api_ok(out, status=200)
+
+
+def _add_room_urls(items):
+    for item in items:
+        if item["room_id"]:
+            item["url"] = url_for(
+                "main.equipment_case_room_equipments",
+                case_scene_id=item["case_scene_id"], room_id=item["room_id"], tab="list",
+            )
+
+
+@api.route("/tree/case-scenes", methods=["GET"])
+@login_required
+def api_tree_case_scenes():
+    """Sidebar top level: ?q=&limit=&after="""
+    out = list_case_scenes(
+        q=request.args.get("q"),
+        limit=request.args.get("limit", type=int),
+        after=request.args.get("after", type=int),
+    )
+    stats = get_fleet_stats()["cases"]
+    for item in out["items"]:
+        item["url"] = url_for("main.equipment_case_scene_root", case_scene_id=item["id"])
+        item["equipment_count"] = stats.get(item["id"], {}).get("equipment", 0)
+        item["rooms_url"] = url_for("api.api_tree_case_rooms", case_scene_id=item["id"])
+    return api_ok(out, status=200)
+
+
+@api.route("/tree/case-scenes/<int:case_scene_id>/rooms", methods=["GET"])
+@login_required
+def api_tree_case_rooms(case_scene_id):
+    """Rooms of one case, on expand: ?q=&limit=&after="""
+    out = list_case_rooms(
+        case_scene_id,
+        q=request.args.get("q"),
+        limit=request.args.get("limit", type=int),
+        after=request.args.get("after", type=int),
+    )
+    stats = get_fleet_stats()["rooms"]
+    for item in out["items"]:
+        item["equipment_count"] = stats.get(item["id"], {}).get("equipment", 0)
+        item["url"] = url_for(
+            "main.equipment_case_room_equipments",
+            case_scene_id=case_scene_id, room_id=item["id"], tab="list",
+        )
+    return api_ok(out, status=200)
+
+
+def _read_page(reader, **kwargs):
+    """Shared wrapper for the keyset read endpoints (?fields=&after=&limit=)."""
+    try:
+        out = reader(
+            fields=request.args.get("fields"),
+            after=request.args.get("after", type=int),
+            limit=request.args.get("limit", type=int),
+            **kwargs,
+        )
+        return api_ok(out, status=200)
+
+    except ValueError as e:
+        return api_error(400, "VALIDATION_ERROR", str(e))
+
+
+@api.route("/case-scenes", methods=["GET"])
+@login_required
+def api_case_scenes():
+    """?q=&fields=&after=&limit="""
+    return _read_page(read_case_scenes, q=request.args.get("q"))
+
+
+@api.route("/rooms", methods=["GET"])
+@login_required
+def api_rooms():
+    """?case_scene_id=&q=&fields=&after=&limit="""
+    return _read_page(
+        read_rooms,
+        case_scene_id=request.args.get("case_scene_id", type=int),
+        q=request.args.get("q"),
+    )
+
+
+@api.route("/equipment", methods=["GET"])
+@login_required
+def api_equipment():
+    """?room_id=&case_scene_id=&q=&type_id=&fields=&after=&limit="""
+    query = EquipmentQuery(
+        q=(request.args.get("q") or "").strip(),
+        type_id=request.args.get("type_id", type=int),
+    )
+    return _read_page(
+        read_equipment,
+        query=query,
+        room_id=request.args.get("room_id", type=int),
+        case_scene_id=request.args.get("case_scene_id", type=int),
+    )
+
+
+def _fleet_report_json(data):
+    report = data["report"]
+    rows = [
+        {**row, "uploaded_at": row["uploaded_at"].isoformat() if row["uploaded_at"] else None}
+        for row in report["rows"]
+    ]
+    return api_ok({
+        "case_scene_id": data["cs"].id,
+        "room_id": data["room"].id if data["room"] else None,
+        "columns": [key for _, key in report["columns"]],
+        "devices": report["devices"],
+        "inspected": report["inspected"],
+        "built_at": report["built_at"].isoformat(),
+        "rows": rows,
+    }, status=200)
+
+
+@api.route("/case-scenes/<int:case_scene_id>/fleet-report", methods=["GET"])
+@login_required
+def api_case_fleet_report(case_scene_id):
+    return _fleet_report_json(case_fleet_report(case_scene_id))
+
+
+@api.route("/case-scenes/<int:case_scene_id>/rooms/<int:room_id>/fleet-report", methods=["GET"])
+@login_required
+def api_room_fleet_report(case_scene_id, room_id):
+    return _fleet_report_json(room_fleet_report(case_scene_id, room_id))
+
+
+@api.route("/export/<any(equipment, history):kind>.<any(csv, xlsx):fmt>", methods=["GET"])
+@login_required
+def api_export(kind, fmt):
+    """?room_id=&case_scene_id=&history=1（xlsx 設備清單加一張 History sheet）；不帶 scope = 全部"""
+    try:
+        chunks, mimetype, filename = export_stream(
+            kind,
+            fmt,
+            room_id=request.args.get("room_id", type=int),
+            case_scene_id=request.args.get("case_scene_id", type=int),
+            with_history=request.args.get("history") in ("1", "true"),
+        )
+    except LookupError as e:
+        return api_error(404, "NOT_FOUND", str(e))
+    except ValueError as e:
+        return api_error(400, "VALIDATION_ERROR", str(e))
+
+    # 邊查邊送：不經 send_file / 不算 Content-Length
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@api.route("/equipment/<int:equipment_id>/inspection/latest", methods=["GET"])
+@login_required
+def api_equipment_latest_inspection(equipment_id):
+    record = latest_equipment_inspection(equipment_id)
+    if record is None:
+        return api_error(404, "NOT_FOUND", "no inspection for this equipment")
+    return api_ok({
+        "equipment_id": equipment_id,
+        "filename": record.filename,
+        "room_id": record.room_id,
+        "uploaded_at": record.uploaded_at.isoformat() if record.uploaded_at else None,
+        "fields": record.fields,
+    }, status=200)
+
+
 @api.route("/locations", methods=["POST"])
 @login_required
 def api_locations_create():
@@ -683,9 +990,20 @@ def api_add_location():
     return api_locations_create()
 
 
+def _wants_async() -> bool:
+    if "respond-async" in (request.headers.get("Prefer") or ""):
+        return True
+    flag = request.args.get("async") or request.form.get("async") or ""
+    return flag.lower() in ("1", "true", "yes")
+
+
 @api.route("/uploads", methods=["POST"])
 @login_required
 def api_uploads_create():
+    file_category = (request.form.get("file_category") or "inspection").lower()
+    if _wants_async() and file_category != "feedback":
+        return api_uploads_enqueue()
+
     try:
         out = create_upload(request)
         payload = {"success": True, **out}
@@ -699,8 +1017,136 @@ def api_uploads_create():
         return api_error(500, "INTERNAL_SERVER_ERROR", "upload failed")
 
 
+@api.route("/uploads/batch", methods=["POST"])
+@login_required
+def api_uploads_batch_create():
+    """Many files for one case/room: one transaction, per-file results."""
+    try:
+        out = register_upload_batch(
+            files=request.files.getlist("files") or request.files.getlist("file"),
+            country=request.form.get("country"),
+            room=request.form.get("room"),
+            file_category=request.form.get("file_category"),
+            feedback_text=request.form.get("feedback_text"),
+            equipment_type_id=request.form.get("equipment_type_id", type=int),
+            equipment_id=request.form.get("equipment_id", type=int),
+        )
+        return api_ok({"success": True, **out}, status=200)
+
+    except ValueError as e:
+        return api_error(400, "VALIDATION_ERROR", str(e))
+
+    except Exception:
+        current_app.logger.exception("api_uploads_batch_create failed")
+        return api_error(500, "INTERNAL_SERVER_ERROR", "batch upload failed")
+
+
+def api_uploads_enqueue():
+    """Store the raw file, ingest in the background: 202 + job id."""
+    try:
+        job = enqueue_upload(
+            file=request.files.get("file"),
+            country=request.form.get("country"),
+            room=request.form.get("room"),
+            file_category=request.form.get("file_category"),
+            feedback_text=request.form.get("feedback_text"),
+            equipment_type_id=request.form.get("equipment_type_id", type=int),
+            equipment_id=request.form.get("equipment_id", type=int),
+            user_id=current_user.id,
+        )
+        status_url = url_for("api.api_jobs_get", job_id=job["job_id"])
+        return api_ok(
+            {"success": True, "status_url": status_url, **job},
+            status=202,
+            headers={"Location": status_url},
+        )
+
+    except ValueError as e:
+        return api_error(400, "VALIDATION_ERROR", str(e))
+
+    except Exception:
+        current_app.logger.exception("api_uploads_enqueue failed")
+        return api_error(500, "INTERNAL_SERVER_ERROR", "upload failed")
+
+
+@api.route("/jobs/<job_id>", methods=["GET"])
+@login_required
+def api_jobs_get(job_id):
+    job = get_ingest_job(job_id, current_user)
+    return api_ok({"success": True, **job}, status=200)
+
+
 # legacy alias; remove after frontend migrated
 @api.route("/equipment/upload", methods=["POST"])
 @login_required
 def api_equipment_upload():
     return api_uploads_create()
+
+
+# ==========================================
+# API: resumable upload sessions
+#   POST   /api/uploads/sessions                       -> create
+#   GET    /api/uploads/sessions/<id>                  -> received chunks/offsets
+#   PUT    /api/uploads/sessions/<id>/chunks/<index>   -> raw chunk body
+#   POST   /api/uploads/sessions/<id>/complete         -> normal upload flow
+#   DELETE /api/uploads/sessions/<id>                  -> abort
+# ==========================================
+@api.route("/uploads/sessions", methods=["POST"])
+@login_required
+def api_upload_sessions_create():
+    data = request.get_json(silent=True) or {}
+    try:
+        out = create_upload_session(data, user_id=current_user.id)
+        return api_ok({"success": True, **out}, status=201)
+
+    except ValueError as e:
+        return api_error(400, "VALIDATION_ERROR", str(e))
+
+
+@api.route("/uploads/sessions/<session_id>", methods=["GET"])
+@login_required
+def api_upload_sessions_get(session_id):
+    out = get_upload_session(session_id, user_id=current_user.id)
+    return api_ok({"success": True, **out}, status=200)
+
+
+@api.route("/uploads/sessions/<session_id>/chunks/<int:index>", methods=["PUT"])
+@login_required
+def api_upload_sessions_put_chunk(session_id, index):
+    try:
+        out = put_upload_chunk(
+            session_id,
+            index,
+            request.stream,
+            user_id=current_user.id,
+            sha256=request.headers.get("X-Chunk-SHA256"),
+        )
+        return api_ok({"success": True, **out}, status=200)
+
+    except ValueError as e:
+        return api_error(400, "VALIDATION_ERROR", str(e))
+
+
+@api.route("/uploads/sessions/<session_id>/complete", methods=["POST"])
+@login_required
+def api_upload_sessions_complete(session_id):
+    try:
+        out = complete_upload_session(session_id, user_id=current_user.id)
+        return api_ok({"success": True, **out}, status=200)
+
+    except ValueError as e:
+        return api_error(400, "VALIDATION_ERROR", str(e))
+
+    except HTTPException:
+        raise
+
+    except Exception:
+        current_app.logger.exception("api_upload_sessions_complete failed")
+        return api_error(500, "INTERNAL_SERVER_ERROR", "upload failed")
+
+
+@api.route("/uploads/sessions/<session_id>", methods=["DELETE"])
+@login_required
+def api_upload_sessions_delete(session_id):
+    abort_upload_session(session_id, user_id=current_user.id)
+    return api_ok({"success": True}, status=200)
@@ -5,8 +5,11 @@ functions from smaller modules. This keeps behavior stable while enabling
 gradual refactoring.
 """
 
-from .upload_service import init_upload_folders, load_uploaded_items, save_uploaded_items, append_uploaded_item, validate_ext, save_feedback_text
+from .upload_service import init_upload_folders, validate_ext, save_feedback_text
+from .upload_service import load_uploaded_items, record_uploaded_files, room_uploaded_files, import_uploaded_items_json
+from .upload_service import init_upload_index
 from .equipment_service import build_tree_items, build_room_equipments_ctx, get_case_context
+from .equipment_service import list_case_scenes, list_case_rooms
 from .report_service import get_case_room_report_context, parse_equipment_file
 
 # Legacy exports still used by routes
@@ -15,6 +18,63 @@ from ._legacy import (
     save_feedback_with_photos,
     create_location,
     create_upload,
+    register_upload,
     build_case_room_report_ctx,
     build_inspection_report_context,
 )
+
+from .upload_session_service import (
+    create_upload_session,
+    get_upload_session,
+    put_upload_chunk,
+    complete_upload_session,
+    abort_upload_session,
+)
+
+from .upload_batch_service import register_upload_batch
+
+from .ingest_queue import enqueue_upload, get_ingest_job, get_ingest_queue, recover_ingest_jobs
+
+from .blob_store import put_file, resolve_upload_path, migrate_legacy_uploads
+
+from .archive_service import register_upload_archive
+
+from .data_version import (
+    STATS,
+    TREE,
+    bump_data_version,
+    bump_all_room_versions,
+    bump_room_versions,
+    case_version,
+    get_data_version,
+    room_version,
+    versioned_cache,
+)
+
+from .fleet_stats import get_fleet_stats, room_stats, case_stats
+
+from .search_service import ensure_search_index, rebuild_search_index, search_equipments, similar_equipments
+
+from .resolve_service import parse_identifiers, resolve_identifiers
+
+from .read_api import read_case_scenes, read_rooms, read_equipment
+
+from .datatables_service import parse_datatables_request, equipment_datatable
+
+from .schema_upgrade import upgrade_schema
+
+from .timing import init_timing, timed_phase
+
+from .inspection_records import (
+    record_inspections,
+    get_inspection_record,
+    latest_room_inspection,
+    latest_equipment_inspection,
+    backfill_inspection_records,
+    init_inspection_records,
+)
+
+from .tabular_reader import iter_table_rows, iter_xlsx_rows, is_xlsx_file
+from .log_summary import summarize_log_file
+from .fleet_report import FLEET_REPORT_FIELDS, room_fleet_report, case_fleet_report
+from .export_service import EXPORT_FORMATS, equipment_export_rows, history_export_rows, export_stream
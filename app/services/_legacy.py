@@ -6,14 +6,23 @@ from datetime import datetime
 from flask import current_app,abort
 from werkzeug.utils import secure_filename
 from ..extensions import db
-from ..models import CaseScene, Room, EquipmentInfo, EquipmentManage 
+from ..models import CaseScene, Room, EquipmentInfo, EquipmentManage, InspectionRecord, StoredFile
 from functools import wraps
 from flask_login import current_user
 from ..domain import CaseKey, EquipmentQuery
 from sqlalchemy import or_
+from .inspection_parser import InspectionFieldCollector, empty_info, parse_inspection_file
+from .blob_store import discard_stored, legacy_path, put_file, resolve_upload_path
+from .data_version import STATS, TREE, bump_data_version, bump_room_versions, versioned_cache
+from .loading import equipment_list_options
+from .timing import timed_phase
+from .inspection_records import get_inspection_record, latest_room_inspection, record_inspections
+from .search_service import fts_query, match_equipment_ids
+from .upload_index import record_uploaded_files, room_uploaded_files
 
 
 ALLOWED_EXTENSIONS = {"csv", "xlsx", "txt", "log"} 
+ARCHIVE_EXTENSIONS = {"zip"}   # 只在入口接受，內容逐一走 ALLOWED_EXTENSIONS
 
 def get_case_room_report_context(case_scene_id: int, room_id: int, category: str):
     data = build_case_room_report_ctx(case_scene_id, room_id, category)
@@ -33,8 +42,8 @@ def get_case_room_report_context(case_scene_id: int, room_id: int, category: str
 
 def get_case_context(case_scene_id: int) -> Dict[str, Any]:
     """
-    Case 層? context：Case + rooms + case_key
-    ?routes 不??己 query CaseScene/Room
+    Case 層�? context：Case + rooms + case_key
+    �?routes 不�??�己 query CaseScene/Room
     """
     cs = CaseScene.query.get_or_404(case_scene_id)
     rooms = (
@@ -51,30 +60,32 @@ def get_case_context(case_scene_id: int) -> Dict[str, Any]:
     )
 
 
-def build_room_equipments_ctx(case_scene_id: int, room_id: int, query: EquipmentQuery) -> Dict[str, Any]:
+def build_room_equipments_ctx(case_scene_id: int, room_id: int, query: EquipmentQuery,
+                              with_equipments: bool = True) -> Dict[str, Any]:
     """
-    Room equipments 清單?要????????uploaded_items / selected_files?
+    with_equipments=False：不載入設備列（list 頁的表格改由 /api/equipment/datatable 分頁取）
+    Room equipments 清單?�要�??�?��??��???uploaded_items / selected_files�?
     """
     cs = CaseScene.query.get_or_404(case_scene_id)
     room = Room.query.filter_by(id=room_id, case_scene_id=case_scene_id).first_or_404()
 
-    eq_q = EquipmentInfo.query.filter_by(room_id=room.id)
+    equipments = []
+    if with_equipments:
+        eq_q = EquipmentInfo.query.options(*equipment_list_options()).filter_by(room_id=room.id)
 
-    if query.has_text():
-        like = query.like()
-        eq_q = eq_q.filter(or_(
-            EquipmentInfo.vendor_sn.ilike(like),
-            EquipmentInfo.oem_sn.ilike(like),
-        ))
+        if fts_query(query.q):
+            # FTS5 index（SN / MAC / ATS / firmware），不再 ilike 全表掃
+            eq_q = eq_q.filter(EquipmentInfo.id.in_(match_equipment_ids(query.q)))
 
-    if query.type_id:
-        eq_q = eq_q.filter(EquipmentInfo.equipment_type_id == query.type_id)
+        if query.type_id:
+            eq_q = eq_q.filter(EquipmentInfo.equipment_type_id == query.type_id)
 
-    equipments = eq_q.order_by(EquipmentInfo.oem_sn.asc()).all()
+        equipments = eq_q.order_by(EquipmentInfo.oem_sn.asc()).all()
 
-    uploaded_items = load_uploaded_items() or {}
+    # 只讀這個 room 的 index rows
     cs_key = CaseKey.from_casescene(cs).display
-    selected_files = (uploaded_items.get(cs_key, {}).get(room.room_name, []) or [])
+    selected_files = room_uploaded_files(room.id)
+    uploaded_items = {cs_key: {room.room_name: selected_files}}
 
     return dict(
         cs=cs,
@@ -87,18 +98,14 @@ def build_room_equipments_ctx(case_scene_id: int, room_id: int, query: Equipment
 
 def build_tree_items(use_json_fallback: bool = True):
     """
-    ?sidebar tree ????
-    主?源?DB ??CaseScene + Room
-    ??：用 uploaded_items.json ?DB 沒???room（??在?這段?求???
+    給 sidebar tree 用的資料：CaseScene + Room（DB）
+    每個 process 快取一份，data version（TREE）變了才重建；回傳值請當 read-only
+    use_json_fallback：舊參數；uploaded_items.json 已匯入 DB（UploadedFile），不再需要
     """
-    uploaded_items = {}
-    if use_json_fallback:
-        try:
-            uploaded_items = load_uploaded_items() or {}
-        except Exception:
-            uploaded_items = {}
-
-    # 1) DB 主?源?CaseScene + Room
+    return versioned_cache(TREE).get(_build_tree_items)
+
+
+def _build_tree_items():
     cs_rows = CaseScene.query.order_by(CaseScene.id.asc()).all()
     room_rows = Room.query.order_by(Room.id.asc()).all()
 
@@ -109,20 +116,10 @@ def build_tree_items(use_json_fallback: bool = True):
     tree = []
     for cs in cs_rows:
         cs_key = f"{cs.country}({cs.location})"
-
-        # DB rooms
-        room_list = []
-        for r in rooms_by_cs.get(cs.id, []):
-            room_list.append({"id": r.id, "name": r.room_name, "equipments": []})
-
-        # 2) JSON fallback（可???
-        if use_json_fallback:
-            json_rooms = (uploaded_items.get(cs_key, {}) or {}).keys()
-            existing_names = {x["name"] for x in room_list}
-            for rn in json_rooms:
-                if rn not in existing_names:
-                    room_list.append({"id": 0, "name": rn, "equipments": []})
-
+        room_list = [
+            {"id": r.id, "name": r.room_name, "equipments": []}
+            for r in rooms_by_cs.get(cs.id, [])
+        ]
         tree.append({"id": cs.id, "name": cs_key, "rooms": room_list})
 
     return tree
@@ -142,59 +139,39 @@ def roles_required(*roles):
 
 def init_upload_folders() -> None:
     """
-    ???????夾（避?第一次?????mkdir ??路????
-    依?系統??類建立?Inspection / Logs / Other / Feedback
+    ?��??��??��??�夾（避?�第一次�??��???mkdir ?��?路�??��?�?
+    依�?系統?��?類建立�?Inspection / Logs / Other / Feedback
     """
     upload_root = current_app.config.get("UPLOAD_FOLDER")
     if not upload_root:
-        # 讓錯誤早一點?，方便??設定??
+        # 讓錯誤早一點�?，方便�??�設定�?�?
         raise RuntimeError("UPLOAD_FOLDER is not configured in app.config")
 
-    folders = ["Inspection", "Logs", "Other", "Feedback"]
+    folders = ["Inspection", "Logs", "Other", "Feedback", "blobs"]
     for name in folders:
         os.makedirs(os.path.join(upload_root, name), exist_ok=True)
 
 
-def load_uploaded_items() -> dict:
-    path = os.path.join(current_app.instance_path, "uploaded_items.json")
-    if os.path.exists(path):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data if isinstance(data, dict) else {}
-        except Exception:
-            return {}
-    return {}
-
-
-def save_uploaded_items(data: dict) -> None:
-    os.makedirs(current_app.instance_path, exist_ok=True)
-    path = os.path.join(current_app.instance_path, "uploaded_items.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-
-def append_uploaded_item(country: str, room: Optional[str], filename: str) -> dict:
-    """JSON store：更??uploaded_items 並寫檔??傳?新?dict"""
-    items = load_uploaded_items()
-    items.setdefault(country, {})
-    if room:
-        items[country].setdefault(room, [])
-        if filename not in items[country][room]:
-            items[country][room].append(filename)
-    save_uploaded_items(items)
-    return items
-
-
 def validate_ext(filename: str) -> str:
     if "." not in filename:
-        raise ValueError("檔?沒?????)
+        raise ValueError("檔案沒有副檔名")
     ext = filename.rsplit(".", 1)[1].lower()
     if ext not in ALLOWED_EXTENSIONS:
-        raise ValueError("?能上傳 CSV / XLSX / TXT / LOG")
+        raise ValueError("只能上傳 CSV / XLSX / TXT / LOG")
     return ext
 
 
+def is_archive(filename: str) -> bool:
+    return "." in (filename or "") and filename.rsplit(".", 1)[1].lower() in ARCHIVE_EXTENSIONS
+
+
+def validate_upload_ext(filename: str) -> str:
+    """入口檢查：一般檔案 + zip 壓縮檔"""
+    if is_archive(filename):
+        return filename.rsplit(".", 1)[1].lower()
+    return validate_ext(filename)
+
+
 def save_feedback_text(country: str, room: str, feedback_text: str) -> str:
     upload_root = current_app.config["UPLOAD_FOLDER"]
     feedback_dir = os.path.join(upload_root, "Feedback")
@@ -208,109 +185,33 @@ def save_feedback_text(country: str, room: str, feedback_text: str) -> str:
 
     return stored_filename
 
+@timed_phase("io")
 def parse_equipment_file(file_path: str, max_lines: int = 200) -> dict:
     """
-    ?用??:
-    1) ?援 'A,B' ????
-    2) ?援 'A: B' ????
-    3) ?援 'A B' 空白????
-    4) Key 大?寫無?、空?無??
-    5) ????max_lines 行???超大檔??死
+    通用解析:
+    1) 支援 'A,B' 逗號分隔
+    2) 支援 'A: B' 冒號分隔
+    3) 支援 'A B' 空白分隔
+    4) Key 大小寫無關、空白無關
+    5) 只讀前 max_lines 行，避免超大檔案卡死
+    6) xlsx：openpyxl read-only 串流讀第一張 sheet，每列當成 CSV 的一行
+    （逐行邏輯在 inspection_parser.InspectionFieldCollector，上傳串流時共用）
     """
 
-    FIELD_MAP = {
-        "inspection details": "inspection_details",
-        "last inspect": "last_inspect",
-        "serial number": "serial_number",
-        "Vendor SN": "vendor_sn",
-        "model": "model",
-        "part number": "part_number",
-        "eth1": "eth1",
-        "eth2": "eth2",
-        "eth3": "eth3",
-        "system software": "system_software",
-        "control firmware": "control_firmware",
-    }
-
-    # init dict
-    info = {v: "" for v in FIELD_MAP.values()}
-
     if not os.path.exists(file_path):
-        # ?裡?raise，?上層決?要??FileNotFoundError
-        return info
-
-    line_count = 0
-    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-        for raw in f:
-            line_count += 1
-            if line_count > max_lines:
-                break
-
-            line = raw.strip()
-            if not line:
-                continue
-
-            key = None
-            val = None
-
-            # 1) ??
-            if "," in line:
-                parts = line.split(",", 1)
-                key = parts[0].strip().lower()
-                val = parts[1].strip()
-
-            else:
-                # 2) ??
-                if ":" in line:
-                    parts = line.split(":", 1)
-                    key = parts[0].strip().lower()
-                    val = parts[1].strip().strip("'\" ")
-
-                else:
-                    # 3) 空白
-                    parts = line.split(None, 1)
-                    if len(parts) == 2:
-                        key = parts[0].strip().lower()
-                        val = parts[1].strip().strip("'\" ")
-                    else:
-                        continue
-
-            if not key:
-                continue
-
-            # match field
-            for pattern, field_name in FIELD_MAP.items():
-                if pattern in key:
-                    info[field_name] = val
-                    break
-
-    # 你????????firmware
-    info["firmware"] = f"{info.get('system_software','')},{info.get('control_firmware','')}".strip(",")
-
-    print(f"?? parse_equipment_file info = {info}", file=sys.stderr)
-    return info
-
-
-def build_inspection_report_context(filename: str) -> Dict[str, Any]:
-    """????context（???redirect / 不拼 HTML?""
-    base_dir = current_app.config["UPLOAD_FOLDER"]
-    inspection_dir = os.path.join(base_dir, "Inspection")
-    logs_dir = os.path.join(base_dir, "Logs")
-
-    inspection_path = os.path.join(inspection_dir, filename)
-    log_path = os.path.join(logs_dir, filename)
-
-    if os.path.exists(inspection_path):
-        file_path = inspection_path
-        category = "Inspection"
-    elif os.path.exists(log_path):
-        file_path = log_path
-        category = "Logs"
-    else:
-        raise FileNotFoundError(filename)
+        # 這裡不 raise，由上層決定要不要 FileNotFoundError
+        return empty_info()
+
+    try:
+        return parse_inspection_file(file_path, max_lines=max_lines)
+    except Exception as e:
+        # 壞掉的 workbook（xlsx）：當成空檔，由上層欄位檢查回報
+        current_app.logger.warning("[parse_equipment_file] unreadable %s: %s", file_path, e)
+        return empty_info()
 
-    info = parse_equipment_file(file_path)
 
+def inspection_equipment(info: dict) -> Optional[EquipmentInfo]:
+    """parse 結果 -> 既有設備（oem_sn 優先，其次 vendor_sn）"""
     serial_number = info.get("serial_number") or ""
     vendor_sn = info.get("vendor_sn") or ""
 
@@ -319,6 +220,38 @@ def build_inspection_report_context(filename: str) -> Dict[str, Any]:
         eq = EquipmentInfo.query.filter_by(oem_sn=serial_number).first()
     if not eq and vendor_sn:
         eq = EquipmentInfo.query.filter_by(vendor_sn=vendor_sn).first()
+    return eq
+
+
+def build_inspection_report_context(filename: str, record: Optional[InspectionRecord] = None) -> Dict[str, Any]:
+    """
+    產生報告 context（不做 redirect / 不拼 HTML）
+    inspection 讀 ingest 時存的 InspectionRecord；沒有 record 的舊檔 / logs 才找檔案重新解析
+    record: 呼叫端已查到的 record（省一次查詢）
+    """
+    if record is None:
+        record = get_inspection_record(filename)
+    if record:
+        category = "Inspection"
+        info = dict(record.fields)
+        eq = db.session.get(EquipmentInfo, record.equipment_id) if record.equipment_id else None
+        if eq is None:
+            eq = inspection_equipment(info)
+    else:
+        inspection_path = resolve_upload_path("inspection", filename)
+        log_path = resolve_upload_path("logs", filename)
+
+        if inspection_path:
+            file_path = inspection_path
+            category = "Inspection"
+        elif log_path:
+            file_path = log_path
+            category = "Logs"
+        else:
+            raise FileNotFoundError(filename)
+
+        info = parse_equipment_file(file_path)
+        eq = inspection_equipment(info)
 
     fields = [
         ("Serial Number", "serial_number"),
@@ -335,19 +268,113 @@ def build_inspection_report_context(filename: str) -> Dict[str, Any]:
 
     return {
         "filename": filename,
-        "category": category,   # route ?到 Logs ?redirect
+        "category": category,   # route ?�到 Logs �?redirect
         "info": info,
         "fields": fields,
         "eq": eq,               # template ??eq.id ??feedback_url
     }
 
-def touch_location(country: str, room: Optional[str]) -> dict:
-    items = load_uploaded_items()
-    items.setdefault(country, {})
-    if room:
-        items[country].setdefault(room, [])
-    save_uploaded_items(items)
-    return items
+def store_upload_file(file_storage, category: str):
+    """
+    存檔：分塊串流寫入 blob store，同一份 chunk 同時算 sha256 / 解析 inspection 欄位
+    xlsx 是 zip，串流時無法逐行解析：存好後再用 openpyxl read-only 讀 blob
+    回傳 (StoredUpload, info)；非 inspection（或重複上傳）的 info 為 None
+    """
+    filename = secure_filename(file_storage.filename)
+    ext = validate_ext(filename)
+
+    streamed = category == "inspection" and ext != "xlsx"
+    collector = InspectionFieldCollector() if streamed else None
+    stored = put_file(
+        file_storage,
+        category,
+        filename,
+        consumers=[collector.feed] if collector else (),
+    )
+    if stored.is_duplicate or category != "inspection":
+        return stored, None
+    if collector is None:
+        return stored, parse_equipment_file(stored.path)
+    return stored, collector.result()
+
+
+def inspection_identity(info: dict) -> Tuple[str, str, str]:
+    """inspection 解析結果 → (oem_sn, vendor_sn, firmware)，缺欄位就 ValueError"""
+    oem_sn = (info.get("serial_number") or "").strip()
+    vendor_sn = (info.get("vendor_sn") or "").strip()
+    firmware = (info.get("firmware") or "").strip()
+
+    if not oem_sn:
+        raise ValueError("檔案缺少 Serial Number (oem_sn)")
+    if not vendor_sn:
+        raise ValueError("檔案缺少 Vendor SN (vendor_sn)")
+    if not firmware:
+        raise ValueError("檔案缺少 firmware (system_software/control_firmware)")
+    return oem_sn, vendor_sn, firmware
+
+
+def upsert_inspection_equipments(identities, room, equipment_type_id: int | None = None) -> list:
+    """
+    一次 upsert 多台設備（oem_sn 優先，其次 vendor_sn）
+    既有設備用一個 IN 查詢撈回來，不逐台 query
+    identities: [(oem_sn, vendor_sn, firmware), ...]，回傳同順序的 EquipmentInfo
+    """
+    identities = list(identities)
+    if not identities:
+        return []
+
+    oems = {i[0] for i in identities}
+    vendors = {i[1] for i in identities}
+    existing = EquipmentInfo.query.filter(or_(
+        EquipmentInfo.oem_sn.in_(oems),
+        EquipmentInfo.vendor_sn.in_(vendors),
+    )).all()
+    by_oem = {e.oem_sn: e for e in existing}
+    by_vendor = {e.vendor_sn: e for e in existing}
+
+    out = []
+    moved_from = set()
+    for oem_sn, vendor_sn, firmware in identities:
+        equipment = by_oem.get(oem_sn) or by_vendor.get(vendor_sn)
+
+        if not equipment:
+            equipment = EquipmentInfo(
+                oem_sn=oem_sn,
+                vendor_sn=vendor_sn,
+                firmware=firmware,
+                room_id=room.id,
+                equipment_type_id=equipment_type_id,
+            )
+            db.session.add(equipment)
+            by_oem[oem_sn] = equipment
+            by_vendor[vendor_sn] = equipment
+        else:
+            equipment.firmware = firmware
+            if equipment.room_id not in (None, room.id):
+                moved_from.add(equipment.room_id)
+            equipment.room_id = room.id
+            if equipment_type_id is not None:
+                equipment.equipment_type_id = equipment_type_id
+        out.append(equipment)
+
+    db.session.flush()
+    bump_data_version(STATS)
+    if moved_from:
+        # 設備換 room：舊 room 的 fleet report 也要重建
+        bump_room_versions(db.session.query(Room.id, Room.case_scene_id).filter(Room.id.in_(moved_from)).all())
+    return out
+
+
+def get_log_equipment(equipment_id: int | None):
+    # logs：禁止新建設備，必須綁既有 inspection 的 equipment
+    if not equipment_id:
+        raise ValueError("Logs 必須指定 equipment_id（請先上傳 inspection 並選定設備）")
+
+    equipment = EquipmentInfo.query.get(equipment_id)
+    if not equipment:
+        raise ValueError("找不到指定設備，請先上傳 inspection")
+    return equipment
+
 
 def upload_and_register_auto(
     file_storage,
@@ -356,96 +383,57 @@ def upload_and_register_auto(
     customer_changes: str = "",
     equipment_type_id: int | None = None,
     file_category: str | None = None,
-    equipment_id: int | None = None,   # ??logs ??綁設??
+    equipment_id: int | None = None,   # ✅ logs 必須綁設備
 ):
     if not file_storage or not file_storage.filename:
-        raise ValueError("沒?檔?")
+        raise ValueError("沒有檔案")
 
-    stored_path = None
+    stored = None
     manage_record=None
     c,loc = parse_case_scene(country_raw)
     #cs_key = f'{c}({loc})'
 
     try:
-        # ??確? location/room 存在
+        # ✅ 確保 location/room 存在
         cs, r = ensure_case_room(c,loc , room_raw)
         if not r:
-            raise ValueError("room 必填（EquipmentManage.room_id nullable=False?)
+            raise ValueError("room 必填（EquipmentManage.room_id nullable=False）")
 
         filename = secure_filename(file_storage.filename)
         validate_ext(filename)
 
-        # ??統???：用你寫??classify_upload
+        # ✅ 統一分類：用 classify_upload
         category = classify_upload(filename, file_category)
 
-        upload_root = current_app.config["UPLOAD_FOLDER"]
-        category_dir = os.path.join(upload_root, category.capitalize() if category != "logs" else "Logs")
-        os.makedirs(category_dir, exist_ok=True)
-
-        stored_path = os.path.join(category_dir, filename)
-        if os.path.exists(stored_path):
-            base, ext = os.path.splitext(filename)
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{base}_{ts}{ext}"
-            stored_path = os.path.join(category_dir, filename)
+        stored, info = store_upload_file(file_storage, category)
+        filename = stored.filename
 
-        # 存?
-        file_storage.seek(0)
-        with open(stored_path, "wb") as f:
-            f.write(file_storage.read())
+        # ✅ 內容完全相同的檔案已經上傳過：不再解析 / 寫 DB
+        if stored.is_duplicate:
+            current_app.logger.warning(
+                "[upload_and_register_auto] duplicate of %s sha256=%s, skipped",
+                stored.duplicate_of,
+                stored.sha256,
+            )
+            record_uploaded_files(cs, r, [(stored.filename, category, None)])
+            return stored, None, None
 
         equipment = None
 
-        # ??inspection：解?並 upsert
+        # ✅ inspection：解析並 upsert
         if category == "inspection":
-            info = parse_equipment_file(stored_path)
-
-            oem_sn = (info.get("serial_number") or "").strip()
-            vendor_sn = (info.get("vendor_sn") or "").strip()
-            firmware = (info.get("firmware") or "").strip()
-
-            if not oem_sn:
-                raise ValueError("檔?缺? Serial Number (oem_sn)")
-            if not vendor_sn:
-                raise ValueError("檔?缺? Vendor SN (vendor_sn)")
-            if not firmware:
-                raise ValueError("檔?缺? firmware (system_software/control_firmware)")
-
-            equipment = EquipmentInfo.query.filter_by(oem_sn=oem_sn).first() \
-                        or EquipmentInfo.query.filter_by(vendor_sn=vendor_sn).first()
-
-            if not equipment:
-                equipment = EquipmentInfo(
-                    oem_sn=oem_sn,
-                    vendor_sn=vendor_sn,
-                    firmware=firmware,
-                    room_id=r.id,
-                    equipment_type_id=equipment_type_id,
-                )
-                db.session.add(equipment)
-                db.session.flush()
-            else:
-                equipment.firmware = firmware
-                equipment.room_id = r.id
-                if equipment_type_id is not None:
-                    equipment.equipment_type_id = equipment_type_id
-                db.session.flush()
-
-        # ??logs：?止新建設??必?綁既??inspection ??equipment
-        elif category == "logs":
-            if not equipment_id:
-                raise ValueError("Logs 必??? equipment_id（?????inspection 並選定設??")
+            equipment = upsert_inspection_equipments([inspection_identity(info)], r, equipment_type_id)[0]
+            record_inspections([(filename, stored.sha256, info, equipment.id, r.id, stored.row.created_at)])
 
-            equipment = EquipmentInfo.query.get(equipment_id)
-            if not equipment:
-                raise ValueError("?????設??請?上傳 inspection")
+        # ✅ logs：綁既有設備
+        elif category == "logs":
+            equipment = get_log_equipment(equipment_id)
 
-        # ??other：??以?當作??DB（?規?必? equipment_id?
+        # ✅ other：只存檔，不寫 DB
         else:
-            # ??????你?求擴??
             pass
 
-        # ??logs / inspection ?可寫??manage record（可??
+        # ✅ logs / inspection 都寫一筆 manage record
         if equipment:
             manage_record = EquipmentManage(
                 equipment_info_id=equipment.id,
@@ -454,50 +442,41 @@ def upload_and_register_auto(
             )
             db.session.add(manage_record)
 
+        record_uploaded_files(cs, r, [(filename, category, getattr(equipment, "id", None))])
+
 #        db.session.commit()
         db.session.flush()
         current_app.logger.warning(
-           "[upload_and_register_auto] cs_id=%s room_id=%s category=%s file=%s equipment_id=%s",
+           "[upload_and_register_auto] cs_id=%s room_id=%s category=%s file=%s size=%s sha256=%s equipment_id=%s",
             getattr(cs, "id", None),
             getattr(r, "id", None),
             category,
             filename,
+            stored.size,
+            stored.sha256,
             getattr(equipment, "id", None),
         )
-        return stored_path, equipment, manage_record 
+        return stored, equipment, manage_record 
     
     except Exception:
 #        db.session.rollback()
-        if stored_path and os.path.exists(stored_path):
-            try:
-                os.remove(stored_path)
-            except Exception:
-                pass
+        discard_stored(stored)
         raise
 
 def save_feedback_with_photos(equipment, text: str, before_file, after_file, user_id: int):
-    upload_root = current_app.config["UPLOAD_FOLDER"]
-    photo_dir = os.path.join(upload_root, "FeedbackPhotos")
-    os.makedirs(photo_dir, exist_ok=True)
-
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    saved_paths = []  # ??記??次寫出??檔?，失?就??
+    saved = []  # 記錄這次寫出的照片，失敗就清掉
 
     def _save_one(file_obj, tag: str):
         if not file_obj or not getattr(file_obj, "filename", ""):
             return None
 
         fname = secure_filename(file_obj.filename)
-        stored = f"{equipment.id}_{tag}_{ts}_{fname}"
-        path = os.path.join(photo_dir, stored)
-
-        file_obj.seek(0)
-        with open(path, "wb") as f:
-            f.write(file_obj.read())
+        stored = put_file(file_obj, "feedback_photos", f"{equipment.id}_{tag}_{ts}_{fname}", dedupe=False)
 
-        saved_paths.append(path)  # ???入 cleanup ?單
-        return stored
+        saved.append(stored)  # 放入 cleanup 清單
+        return stored.filename
 
     try:
         before_name = _save_one(before_file, "before")
@@ -521,26 +500,22 @@ def save_feedback_with_photos(equipment, text: str, before_file, after_file, use
     except Exception:
         db.session.rollback()
 
-        # ??cleanup：??寫?去?照?刪????孤??
-        for p in saved_paths:
-            try:
-                if os.path.exists(p):
-                    os.remove(p)
-            except Exception:
-                pass
+        # ✅ cleanup：把這次新寫的照片 blob 刪掉，避免孤兒檔
+        for stored in saved:
+            discard_stored(stored)
 
         raise
 
 
 def parse_case_scene(raw: str):
     """
-    ?援?
+    ?�援�?
       1) USA(Quincy) -> ("USA", "Quincy")
-      2) USA / Quincy -> ("USA", "Quincy")  (?選)
+      2) USA / Quincy -> ("USA", "Quincy")  (?�選)
     """
     raw = (raw or "").strip()
     if not raw:
-        raise ValueError("country/case_scene 不可?空")
+        raise ValueError("country/case_scene 不可?�空")
 
     m = re.match(r"^(?P<country>[^()]+)\((?P<location>[^()]+)\)$", raw)
     if m:
@@ -549,26 +524,26 @@ def parse_case_scene(raw: str):
         return country,location
 
     raw = re.sub(r'\s+',' ',raw).strip()
-    # 沒括??就??部??country，location ????????不炸?
+    # 沒括?��?就�??�部??country，location ?��??��??��??��?不炸�?
     return raw, raw
 
 def ensure_case_room(
         country_or_country: str, 
         location_or_room: str | None = None, 
         room_raw: str | None = None):
-     # --- ?斷?哪種呼??---
+     # --- ?�斷?�哪種呼??---
     if room_raw is None:
-        # ????country_or_country = "USA(quincy)", location_or_room = room
+        # ?��??��?country_or_country = "USA(quincy)", location_or_room = room
         country_raw = country_or_country
         room_name = location_or_room
         country, location = parse_case_scene(country_raw)
     else:
-        # 三???country_or_country = "USA", location_or_room = "quincy", room_raw = room
+        # 三�??��?country_or_country = "USA", location_or_room = "quincy", room_raw = room
         country = country_or_country
         location = location_or_room or ""
         room_name = room_raw
 
-    # --- 清? ---
+    # --- 清�? ---
     country  = re.sub(r"\s+", " ", (country or "")).strip()
     location = re.sub(r"\s+", " ", (location or "")).strip()
     room_name = re.sub(r"\s+", " ", (room_name or "")).strip() or None
@@ -579,6 +554,7 @@ def ensure_case_room(
         cs = CaseScene(country=country, location=location)
         db.session.add(cs)
         db.session.flush()
+        bump_data_version(TREE)
 
     # 2) Room upsert
     r = None
@@ -588,13 +564,14 @@ def ensure_case_room(
             r = Room(case_scene_id=cs.id, room_name=room_name)
             db.session.add(r)
             db.session.flush()
+            bump_data_version(TREE)
 
     return cs, r
 
 def ensure_case_room_committed(cs_name: str, room_name: str):
     """
-    確? CaseScene/Room 存在，並完? commit??
-    ?傳 (cs, r)
+    確�? CaseScene/Room 存在，並完�? commit??
+    ?�傳 (cs, r)
     """
     print(">>> ensure_case_room_committed CALLED", cs_name, room_name)
     cs, r = ensure_case_room(cs_name, room_name)
@@ -603,13 +580,13 @@ def ensure_case_room_committed(cs_name: str, room_name: str):
 
 def resolve_case_context(cs_name: str) -> Dict[str, Any]:
     """
-    ?傳????作?下?（Case-level）」?
-    - Case 存?存在
-    - ?哪?rooms
-    - ?否?許?入 upload ?面
-    - ?否??submit ?????room
-    ???commit
-    ???redirect
+    ?�傳?��??��?作�?下�?（Case-level）」�?
+    - Case 存�?存在
+    - ?�哪�?rooms
+    - ?�否?�許?�入 upload ?�面
+    - ?�否??submit ?��??��?�?room
+    ??�?commit
+    ??�?redirect
     """
 
     country, location = parse_case_scene(cs_name)
@@ -619,7 +596,7 @@ def resolve_case_context(cs_name: str) -> Dict[str, Any]:
         location=location
     ).first()
 
-    # Case 不?????仍然?許??upload（由 submit ?建立?
+    # Case 不�?????仍然?�許??upload（由 submit ?�建立�?
     if not cs:
         return {
             "case": None,
@@ -627,7 +604,7 @@ def resolve_case_context(cs_name: str) -> Dict[str, Any]:
             "rooms": [],
             "has_rooms": False,
 
-            # 行為語?
+            # 行為語�?
             "can_enter_upload": True,
             "require_room_on_submit": True,
         }
@@ -646,13 +623,13 @@ def resolve_case_context(cs_name: str) -> Dict[str, Any]:
         "rooms": rooms,
         "has_rooms": len(rooms) > 0,
 
-        # 行為語?
-        "can_enter_upload": True,          # ??Case 層永?可??upload
-        "require_room_on_submit": True,    # ???正?出一定? room
+        # 行為語�?
+        "can_enter_upload": True,          # ??Case 層永?�可??upload
+        "require_room_on_submit": True,    # ???�正?�出一定�? room
     }
 
 def classify_upload(filename: str, file_category: str | None = None) -> str:
-    # file_category 來自?端 label（?已? file_category?
+    # file_category 來自?�端 label（�?已�? file_category�?
     if file_category:
         fc = file_category.strip().lower()
         if fc in {"inspection", "logs", "feedback", "other"}:
@@ -668,8 +645,8 @@ def classify_upload(filename: str, file_category: str | None = None) -> str:
 
 def create_location(raw_country: str, raw_room: str | None):
     """
-    建?/?新案場??room，並?步 JSON tree
-    ?傳?API ?? dict
+    建立/更新案場與 room（新建時 ensure_case_room 會 bump tree 的 data version）
+    回傳給 API 的 dict
     """
     c, loc = parse_case_scene(raw_country)
     country_key = f"{c}({loc})"
@@ -681,10 +658,6 @@ def create_location(raw_country: str, raw_room: str | None):
         db.session.rollback()
         raise
 
-    # DB ??後?????tree?
-    items = touch_location(country_key, raw_room)
-    current_app.uploaded_items = items
-
     return dict(
         country=country_key,
         room=raw_room,
@@ -695,104 +668,131 @@ def create_location(raw_country: str, raw_room: str | None):
 
 def create_upload(req):
     """
-    上傳/??寫入?主流?
-    ?傳 dict: {filename: "..."}
+    上傳/回饋寫入的主流程（multipart request）
+    回傳 dict: {filename: "..."}
     """
-    file_category = (req.form.get("file_category") or "inspection").lower()
-    file = req.files.get("file")
-    feedback_text = (req.form.get("feedback_text") or "").strip()
+    return register_upload(
+        file=req.files.get("file"),
+        country=req.form.get("country"),
+        room=req.form.get("room"),
+        file_category=req.form.get("file_category"),
+        feedback_text=req.form.get("feedback_text"),
+        equipment_type_id=req.form.get("equipment_type_id", type=int),
+        equipment_id=req.form.get("equipment_id", type=int),
+    )
 
-    country = (req.form.get("country") or "").strip()
-    room = (req.form.get("room") or "").strip()
 
+def validate_upload_target(country: str, room: str, file_category: str, equipment_id: int | None = None) -> str:
+    """
+    上傳前的共同檢查，回傳 country_key（例：USA(Quincy)）
+    """
     if not country:
         raise ValueError("country 必填")
 
     if not room and file_category in ("inspection", "logs", "feedback", "other"):
-        raise ValueError("請???/輸入 Room（??為空?")
+        raise ValueError("請選擇/輸入 Room（不可為空）")
 
     c, loc = parse_case_scene(country)
     country_key = f"{c}({loc})"
 
-    if file_category == "logs" and not req.form.get("equipment_id"):
-        raise ValueError("Logs 必???設?")
+    if file_category == "logs" and not equipment_id:
+        raise ValueError("Logs 必須選擇設備")
+
+    return country_key
+
+
+def register_upload(
+    file,
+    country: str,
+    room: str,
+    file_category: str | None = None,
+    feedback_text: str | None = None,
+    equipment_type_id: int | None = None,
+    equipment_id: int | None = None,
+):
+    """
+    create_upload 的本體：檔案（FileStorage 或 file-like + filename）→ DB + JSON tree
+    multipart / upload session / batch 都走這裡
+    """
+    file_category = (file_category or "inspection").lower()
+    feedback_text = (feedback_text or "").strip()
+    country = (country or "").strip()
+    room = (room or "").strip()
+
+    country_key = validate_upload_target(country, room, file_category, equipment_id)
 
     try:
         if file_category == "feedback":
             if not feedback_text:
-                raise ValueError("Feedback ?容不可?空")
+                raise ValueError("Feedback 內容不可為空")
 
             stored_filename = save_feedback_text(country_key, room, feedback_text)
+            cs, r = ensure_case_room(country_key, room)
+            record_uploaded_files(cs, r, [(stored_filename, "feedback", None)])
             db.session.commit()
+            duplicate = False
 
         else:
             if not file or file.filename == "":
-                raise ValueError("沒???檔?")
+                raise ValueError("沒有選擇檔案")
+
+            if is_archive(file.filename):
+                # zip：逐一 member 走批次流程（自己 commit / 更新 tree）
+                from .archive_service import register_upload_archive
+                return register_upload_archive(
+                    file=file,
+                    country=country_key,
+                    room=room,
+                    file_category=file_category,
+                    feedback_text=feedback_text,
+                    equipment_type_id=equipment_type_id,
+                    equipment_id=equipment_id,
+                )
 
             validate_ext(file.filename)
 
-            stored_path, equipment, manage_record = upload_and_register_auto(
+            stored, equipment, manage_record = upload_and_register_auto(
                 file_storage=file,
                 country_raw=country_key,
                 room_raw=room,
                 customer_changes=feedback_text,
-                equipment_type_id=req.form.get("equipment_type_id", type=int),
+                equipment_type_id=equipment_type_id,
                 file_category=file_category,
-                equipment_id=req.form.get("equipment_id", type=int),
+                equipment_id=equipment_id,
             )
             db.session.commit()
-            stored_filename = os.path.basename(stored_path)
+            stored_filename = stored.filename
+            duplicate = stored.is_duplicate
 
     except Exception:
         db.session.rollback()
         raise
 
-    # DB/檔???後更??tree
-    items = append_uploaded_item(country_key, room, stored_filename)
-    current_app.uploaded_items = items
-
-    return dict(filename=stored_filename)
-
-def pick_latest_inspection(room_files: list[str], inspection_dir: str) -> str | None:
-    cand = []
-    for fname in room_files or []:
-        lower = fname.lower()
-        if "inspection" in lower or lower.endswith(".csv") or lower.endswith(".txt"):
-            cand.append(fname)
-
-    latest = None
-    latest_mtime = -1
-
-    for fname in cand:
-        fpath = os.path.join(inspection_dir, fname)
-        if os.path.exists(fpath):
-            mt = os.path.getmtime(fpath)
-            if mt > latest_mtime:
-                latest_mtime = mt
-                latest = fname
-    return latest
+    return dict(filename=stored_filename, duplicate=duplicate)
 
 def build_case_room_report_ctx(case_scene_id: int, room_id: int, category: str):
     cs = CaseScene.query.get_or_404(case_scene_id)
     room = Room.query.filter_by(id=room_id, case_scene_id=case_scene_id).first_or_404()
     cs_key = f"{cs.country}({cs.location})"
 
-    uploaded_items = load_uploaded_items() or {}
-    room_files = (uploaded_items.get(cs_key, {}).get(room.room_name, []) or [])
-
-    base_dir = current_app.config.get("UPLOAD_FOLDER")
-    inspection_dir = os.path.join(base_dir, "Inspection") if base_dir else ""
+    room_files = room_uploaded_files(room.id)
+    uploaded_items = {cs_key: {room.room_name: room_files}}
 
-    latest = pick_latest_inspection(room_files, inspection_dir) if inspection_dir else None
+    # 該 room 的 upload index -> record：一次查詢，不碰檔案、不 parse（舊檔在啟動時補 record）
+    record = latest_room_inspection(room.id) if room_files else None
+    latest = record.filename if record else None
 
     report_ctx = {}
     report_filename = latest or ""
     if latest:
-        report_ctx = build_inspection_report_context(latest)
+        report_ctx = build_inspection_report_context(latest, record)
 
-    equipments = EquipmentInfo.query.filter_by(room_id=room.id).order_by(
-        EquipmentInfo.oem_sn.asc()
-    ).all()
+    equipments = (
+        EquipmentInfo.query.options(*equipment_list_options())
+        .filter_by(room_id=room.id)
+        .order_by(EquipmentInfo.oem_sn.asc())
+        .all()
+    )
 
     return dict(
         cs=cs,
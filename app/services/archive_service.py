@@ -0,0 +1,154 @@
+"""ZIP archive ingest.
+
+A field-tool export (.zip) is opened in place: members are streamed one by one
+straight into the normal batch registration (`register_upload_batch`), never
+unpacked to a temp folder. Each member is classified on its own name with
+`classify_upload`, so one archive can mix inspections, logs and other files
+(an explicit "logs" / "other" category forces it for every member).
+
+Zip-bomb guards (config):
+  ARCHIVE_MAX_MEMBERS       max entries in the archive
+  ARCHIVE_MAX_MEMBER_SIZE   max uncompressed bytes per member
+  ARCHIVE_MAX_TOTAL_SIZE    max uncompressed bytes for the whole archive
+  ARCHIVE_MAX_RATIO         max uncompressed/compressed ratio per member
+Declared sizes are checked up front and actual bytes are counted while
+reading, so a lying header does not get past the limits either.
+"""
+
+import os
+import posixpath
+import zipfile
+from typing import Any, Dict
+
+from flask import current_app
+from werkzeug.datastructures import FileStorage
+
+from .upload_batch_service import register_upload_batch
+
+
+class _Budget:
+    def __init__(self, total: int):
+        self.left = total
+
+
+class _ArchiveMember:
+    """Lazy, size-limited read stream over one zip member."""
+
+    def __init__(self, zf: zipfile.ZipFile, info: zipfile.ZipInfo, max_size: int, budget: _Budget):
+        self._zf = zf
+        self._info = info
+        self._limit = min(info.file_size, max_size)
+        self._budget = budget
+        self._fh = None
+        self._read = 0
+
+    def seek(self, pos: int, whence: int = 0) -> int:
+        if self._fh is not None or pos != 0 or whence != 0:
+            raise OSError("zip members can only be read once, from the start")
+        return 0
+
+    def read(self, n: int = -1) -> bytes:
+        try:
+            if self._fh is None:
+                self._fh = self._zf.open(self._info)
+            data = self._fh.read(n)
+        except (zipfile.BadZipFile, RuntimeError, NotImplementedError) as e:
+            # CRC mismatch / encrypted member / unsupported compression
+            raise ValueError(f"zip 內檔案無法讀取：{e}")
+
+        self._read += len(data)
+        self._budget.left -= len(data)
+        if self._read > self._limit:
+            raise ValueError("zip 內檔案超過大小上限（或 header 大小不符）")
+        if self._budget.left < 0:
+            raise ValueError("zip 解壓總大小超過上限")
+        if not data:
+            self.close()
+        return data
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+
+
+def _member_name(info: zipfile.ZipInfo) -> str:
+    return posixpath.basename(info.filename.replace("\\", "/"))
+
+
+def _is_ingestable(info: zipfile.ZipInfo) -> bool:
+    if info.is_dir():
+        return False
+    parts = info.filename.replace("\\", "/").split("/")
+    # macOS resource forks, dotfiles
+    if parts[0] == "__MACOSX" or _member_name(info).startswith("."):
+        return False
+    return bool(_member_name(info))
+
+
+def check_archive_limits(infos) -> None:
+    cfg = current_app.config
+    if len(infos) > cfg["ARCHIVE_MAX_MEMBERS"]:
+        raise ValueError(f"zip 內檔案數超過上限（{cfg['ARCHIVE_MAX_MEMBERS']}）")
+
+    total = 0
+    for info in infos:
+        if info.file_size > cfg["ARCHIVE_MAX_MEMBER_SIZE"]:
+            raise ValueError(f"zip 內檔案過大：{info.filename}")
+        if info.file_size > cfg["ARCHIVE_MAX_RATIO"] * max(info.compress_size, 1):
+            raise ValueError(f"zip 壓縮比異常（疑似 zip bomb）：{info.filename}")
+        total += info.file_size
+    if total > cfg["ARCHIVE_MAX_TOTAL_SIZE"]:
+        raise ValueError("zip 解壓總大小超過上限")
+
+
+def register_upload_archive(
+    file,
+    country: str,
+    room: str,
+    file_category: str | None = None,
+    feedback_text: str | None = None,
+    equipment_type_id: int | None = None,
+    equipment_id: int | None = None,
+) -> Dict[str, Any]:
+    """
+    Ingest every member of a .zip upload. Members are classified by name
+    unless the upload is explicitly "logs" / "other" (a log bundle); the
+    default "inspection" label means "auto" here. Returns the batch result
+    plus the archive name.
+    """
+    stream = getattr(file, "stream", file)
+    try:
+        stream.seek(0)
+        zf = zipfile.ZipFile(stream)
+    except (zipfile.BadZipFile, OSError):
+        raise ValueError("zip 檔案損毀或格式不正確")
+
+    fc = (file_category or "").strip().lower()
+    auto = fc not in ("logs", "other")
+
+    with zf:
+        infos = [i for i in zf.infolist() if _is_ingestable(i)]
+        check_archive_limits(infos)
+        if not infos:
+            raise ValueError("zip 內沒有可上傳的檔案")
+
+        budget = _Budget(current_app.config["ARCHIVE_MAX_TOTAL_SIZE"])
+        max_member = current_app.config["ARCHIVE_MAX_MEMBER_SIZE"]
+        members = [
+            FileStorage(stream=_ArchiveMember(zf, info, max_member, budget), filename=_member_name(info))
+            for info in infos
+        ]
+
+        out = register_upload_batch(
+            files=members,
+            country=country,
+            room=room,
+            file_category="inspection" if auto else fc,
+            auto_classify=auto,
+            feedback_text=feedback_text,
+            equipment_type_id=equipment_type_id,
+            equipment_id=equipment_id,
+            max_files=current_app.config["ARCHIVE_MAX_MEMBERS"],
+        )
+
+    return dict(filename=os.path.basename(file.filename or ""), archive=True, duplicate=False, **out)
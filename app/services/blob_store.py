@@ -0,0 +1,297 @@
+"""Content-addressed upload storage.
+
+Every upload is stored once per content under
+
+    UPLOAD_FOLDER/blobs/<sha[0:2]>/<sha[2:4]>/<sha256>
+
+and `StoredFile` maps the logical (category, filename) the UI shows to that
+blob. Identical re-uploads in the same category are detected by hash and
+short-circuited; nothing is stored or registered twice.
+
+A failed upload removes the blob it created only while nothing else uses it:
+no other `StoredFile` row references the hash, and no other upload reused the
+blob in the meantime (a reuse bumps the blob's mtime; the creator compares it
+with the mtime it wrote). Check and removal happen under `_BLOB_LOCK` and
+through a rename, so a concurrent reuse either keeps the blob or stores it
+again.
+
+Files written before the blob store existed still live in the flat
+`Inspection/`, `Logs/`, `Other/`, `FeedbackPhotos/` folders; `resolve_upload_path`
+falls back to them until `flask migrate-uploads` has moved them.
+"""
+
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import inspect as sa_inspect
+
+from ..extensions import db
+from ..models import StoredFile
+from .timing import timed_phase
+from .upload_stream import hash_file, stream_to_file
+
+# category -> legacy flat folder
+LEGACY_DIRS = {
+    "inspection": "Inspection",
+    "logs": "Logs",
+    "other": "Other",
+    "feedback_photos": "FeedbackPhotos",
+}
+
+# blob create / reuse / discard in this process
+_BLOB_LOCK = threading.Lock()
+
+
+@dataclass
+class StoredUpload:
+    filename: str            # logical name (what the UI / uploaded_items.json shows)
+    category: str
+    path: str                # blob path on disk
+    size: int
+    sha256: str
+    created_blob: bool       # False when the content was already in the store
+    duplicate_of: Optional[str] = None   # existing filename if short-circuited
+    row: Optional[StoredFile] = None     # the StoredFile added to the session
+    blob_mtime_ns: Optional[int] = None  # mtime of the blob as created (created_blob only)
+
+    @property
+    def is_duplicate(self) -> bool:
+        return self.duplicate_of is not None
+
+
+def blobs_root() -> str:
+    return os.path.join(current_app.config["UPLOAD_FOLDER"], "blobs")
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(blobs_root(), sha256[:2], sha256[2:4], sha256)
+
+
+def legacy_path(category: str, filename: str) -> str:
+    folder = LEGACY_DIRS.get(category, category.capitalize())
+    return os.path.join(current_app.config["UPLOAD_FOLDER"], folder, filename)
+
+
+def _mark_reused(path: str) -> None:
+    # any change of mtime tells the creator (discard_stored) the blob is shared now
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+
+
+def _commit_blob(tmp_path: str, sha256: str) -> Tuple[str, bool, Optional[int]]:
+    """Move a fully written temp file into the fan-out tree (or drop it if known)."""
+    final = blob_path(sha256)
+    with _BLOB_LOCK:
+        if os.path.exists(final):
+            try:
+                _mark_reused(final)
+                os.remove(tmp_path)
+                return final, False, None
+            except FileNotFoundError:
+                pass   # just discarded by a failed upload (another process): store ours
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        mtime_ns = os.stat(tmp_path).st_mtime_ns   # a rename keeps it
+        os.replace(tmp_path, final)
+        return final, True, mtime_ns
+
+
+def find_by_hash(category: str, sha256: str) -> Optional[StoredFile]:
+    return (
+        StoredFile.query
+        .filter_by(category=category, sha256=sha256)
+        .order_by(StoredFile.id.asc())
+        .first()
+    )
+
+
+def unique_logical_name(category: str, filename: str) -> str:
+    """同名已存在就加 timestamp（同一秒內再撞名就再加流水號）"""
+
+    def taken(name: str) -> bool:
+        if StoredFile.query.filter_by(category=category, filename=name).first():
+            return True
+        return os.path.exists(legacy_path(category, name))
+
+    if not taken(filename):
+        return filename
+
+    base, ext = os.path.splitext(filename)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    candidate = f"{base}_{ts}{ext}"
+    n = 1
+    while taken(candidate):
+        candidate = f"{base}_{ts}_{n}{ext}"
+        n += 1
+    return candidate
+
+
+@timed_phase("io")
+def put_file(
+    file_obj,
+    category: str,
+    filename: str,
+    consumers: Iterable[Callable[[bytes], None]] = (),
+    dedupe: bool = True,
+) -> StoredUpload:
+    """
+    Stream `file_obj` into the blob store (hash + consumers in the same pass)
+    and register its logical name. With `dedupe`, content already stored in
+    this category returns the existing entry instead (`duplicate_of`).
+    The `StoredFile` row is only added to the session; the caller commits.
+    """
+    tmp_dir = os.path.join(blobs_root(), "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+
+    stored = stream_to_file(file_obj, tmp_path, consumers=consumers)
+    try:
+        path, created, mtime_ns = _commit_blob(tmp_path, stored.sha256)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if dedupe:
+        existing = find_by_hash(category, stored.sha256)
+        if existing:
+            return StoredUpload(
+                filename=existing.filename,
+                category=category,
+                path=path,
+                size=stored.size,
+                sha256=stored.sha256,
+                created_blob=created,
+                duplicate_of=existing.filename,
+                blob_mtime_ns=mtime_ns,
+            )
+
+    name = unique_logical_name(category, filename)
+    row = StoredFile(category=category, filename=name, sha256=stored.sha256, size=stored.size)
+    db.session.add(row)
+    db.session.flush()
+
+    return StoredUpload(
+        filename=name,
+        category=category,
+        path=path,
+        size=stored.size,
+        sha256=stored.sha256,
+        created_blob=created,
+        row=row,
+        blob_mtime_ns=mtime_ns,
+    )
+
+
+def _blob_referenced(sha256: str, own: Optional[StoredFile]) -> bool:
+    q = StoredFile.query.filter(StoredFile.sha256 == sha256)
+    if own is not None and own.id is not None:
+        q = q.filter(StoredFile.id != own.id)
+    try:
+        with db.session.no_autoflush:
+            return q.first() is not None
+    except Exception:
+        return True   # session unusable: keep the blob (an orphan is harmless, a dangling row is not)
+
+
+def discard_stored(stored: Optional[StoredUpload]) -> None:
+    """Undo `put_file` after a failed registration (row if still pending, the blob if unused)."""
+    if not stored:
+        return
+    own = stored.row
+    if stored.row is not None and sa_inspect(stored.row).persistent:
+        try:
+            db.session.delete(stored.row)
+            db.session.flush()
+        except Exception:
+            pass   # session already failed; the caller's rollback drops the row
+    if not stored.created_blob:
+        return
+
+    with _BLOB_LOCK:
+        if _blob_referenced(stored.sha256, own):
+            return
+        trash = os.path.join(blobs_root(), "tmp", uuid.uuid4().hex)
+        try:
+            os.makedirs(os.path.dirname(trash), exist_ok=True)
+            os.replace(stored.path, trash)
+        except OSError:
+            return
+        try:
+            if os.stat(trash).st_mtime_ns != stored.blob_mtime_ns:
+                os.replace(trash, stored.path)   # reused meanwhile: put it back (same content)
+            else:
+                os.remove(trash)
+        except OSError:
+            pass
+
+
+@timed_phase("io")
+def resolve_upload_path(category: str, filename: str) -> Optional[str]:
+    """Logical filename -> file on disk (blob, else legacy flat folder)."""
+    row = StoredFile.query.filter_by(category=category, filename=filename).first()
+    if row:
+        path = blob_path(row.sha256)
+        if os.path.exists(path):
+            return path
+
+    path = legacy_path(category, filename)
+    if os.path.exists(path):
+        return path
+    return None
+
+
+def migrate_legacy_uploads(remove_originals: bool = True) -> dict:
+    """
+    Move files from the flat legacy folders into the blob store.
+    Safe to re-run: names already registered are skipped.
+    """
+    stats = dict(migrated=0, deduplicated=0, skipped=0)
+
+    for category, folder in LEGACY_DIRS.items():
+        src_dir = os.path.join(current_app.config["UPLOAD_FOLDER"], folder)
+        if not os.path.isdir(src_dir):
+            continue
+
+        for name in sorted(os.listdir(src_dir)):
+            src = os.path.join(src_dir, name)
+            if not os.path.isfile(src):
+                continue
+
+            row = StoredFile.query.filter_by(category=category, filename=name).first()
+            if row and os.path.exists(blob_path(row.sha256)):
+                stats["skipped"] += 1
+                if remove_originals:
+                    os.remove(src)
+                continue
+
+            sha256 = hash_file(src)
+            final = blob_path(sha256)
+            if os.path.exists(final):
+                stats["deduplicated"] += 1
+            else:
+                os.makedirs(os.path.dirname(final), exist_ok=True)
+                # copy-then-rename so an interrupted run never leaves a partial blob
+                tmp = os.path.join(blobs_root(), "tmp", uuid.uuid4().hex)
+                os.makedirs(os.path.dirname(tmp), exist_ok=True)
+                with open(src, "rb") as fin:
+                    stream_to_file(fin, tmp)
+                os.replace(tmp, final)
+
+            if row is None:
+                row = StoredFile(category=category, filename=name)
+                db.session.add(row)
+            row.sha256 = sha256
+            row.size = os.path.getsize(src)
+            row.created_at = datetime.fromtimestamp(os.path.getmtime(src))
+            db.session.commit()
+
+            if remove_originals:
+                os.remove(src)
+            stats["migrated"] += 1
+
+    return stats
@@ -0,0 +1,109 @@
+"""Data-version counters + versioned per-process caches.
+
+A version lives in the `data_versions` table and is bumped inside the same
+transaction as the change it describes, so every worker process sees the new
+version exactly when it sees the new data. A `VersionedCache` keeps one built
+value per process and rebuilds it only when the version moved; reading the
+version is a single primary-key lookup.
+
+  TREE   sidebar CaseScene -> Room tree (build_tree_items); bumped whenever a
+         case or room is added (ensure_case_room) or everything is reset.
+  STATS  per-room / per-case counters (fleet_stats); bumped when equipment is
+         upserted, upload index rows are added, or everything is reset.
+
+  room:<id> / case:<id>  (room_version / case_version) the fleet inspection
+         report of one room / case; bumped when upload index rows land in the
+         room or a device moves out of it. Reset moves all of them on (ids
+         can be reused once every row is gone).
+"""
+
+import threading
+from typing import Any, Callable
+
+from flask import current_app
+from sqlalchemy import or_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..extensions import db
+from ..models import DataVersion
+
+TREE = "tree"
+STATS = "stats"
+
+
+def bump_data_version(name: str) -> None:
+    """+1 in the caller's transaction (the caller commits)."""
+    table = DataVersion.__table__
+    stmt = (
+        sqlite_insert(table)
+        .values(name=name, version=1)
+        .on_conflict_do_update(index_elements=["name"], set_={"version": table.c.version + 1})
+    )
+    db.session.connection().execute(stmt)
+
+
+def room_version(room_id: int) -> str:
+    return f"room:{room_id}"
+
+
+def case_version(case_scene_id: int) -> str:
+    return f"case:{case_scene_id}"
+
+
+def bump_room_versions(rooms) -> None:
+    """rooms: [(room_id, case_scene_id)]; +1 for each room and its case (the caller commits)."""
+    names = set()
+    for room_id, case_scene_id in rooms:
+        names.add(room_version(room_id))
+        names.add(case_version(case_scene_id))
+    for name in sorted(names):
+        bump_data_version(name)
+
+
+def bump_all_room_versions() -> None:
+    table = DataVersion.__table__
+    db.session.connection().execute(
+        update(table)
+        .where(or_(table.c.name.like("room:%"), table.c.name.like("case:%")))
+        .values(version=table.c.version + 1)
+    )
+
+
+def get_data_version(name: str) -> int:
+    return db.session.query(DataVersion.version).filter_by(name=name).scalar() or 0
+
+
+class VersionedCache:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._version = None
+        self._value = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, build: Callable[[], Any]) -> Any:
+        # read the version *before* building: a value built from newer data is
+        # only ever stored under an older version, so it is rebuilt next time
+        version = get_data_version(self.name)
+        with self._lock:
+            if self._version == version:
+                self.hits += 1
+                return self._value
+            self.misses += 1
+
+        value = build()
+        with self._lock:
+            self._version, self._value = version, value
+        return value
+
+    def stats(self) -> dict:
+        return dict(version=self._version, hits=self.hits, misses=self.misses)
+
+
+def versioned_cache(name: str) -> VersionedCache:
+    caches = current_app.extensions.setdefault("versioned_caches", {})
+    cache = caches.get(name)
+    if cache is None:
+        cache = caches.setdefault(name, VersionedCache(name))
+    return cache
@@ -0,0 +1,122 @@
+"""DataTables server-side processing for the equipment grids.
+
+The grid sends draw / start / length / order / search (DataTables 2 protocol)
+and gets back only the visible page:
+  {draw, recordsTotal, recordsFiltered, data: [row, ...]}
+
+Ordering is restricted to a whitelist of columns (id as tie-breaker), the
+global search uses the FTS index (same matching as the room page `q`), and a
+room's unfiltered total comes from the cached fleet stats instead of a COUNT.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from ..extensions import db
+from ..models import EquipmentInfo, EquipmentType, Room
+from .fleet_stats import room_stats
+from .search_service import fts_query, match_equipment_ids
+
+# grid column (columns[i][data]) -> SQL expression
+DATATABLE_COLUMNS = {
+    "id": EquipmentInfo.id,
+    "vendor_sn": EquipmentInfo.vendor_sn,
+    "oem_sn": EquipmentInfo.oem_sn,
+    "macaddr": EquipmentInfo.macaddr,
+    "firmware": EquipmentInfo.firmware,
+    "room_name": Room.room_name,
+    "equipment_type": EquipmentType.name,
+}
+
+
+@dataclass
+class DataTablesRequest:
+    draw: int = 0
+    start: int = 0
+    length: int = 10
+    search: str = ""
+    # [(column name, "asc" | "desc")]
+    order: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def parse_datatables_request(args) -> DataTablesRequest:
+    """request.args (columns[i][data], order[i][column], ...) -> DataTablesRequest"""
+    max_length = current_app.config["DATATABLES_MAX_LENGTH"]
+
+    def _int(name, default):
+        try:
+            return int(args.get(name, default))
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} 必須是整數")
+
+    length = _int("length", 10)
+    if length < 0 or length > max_length:   # -1 = "All"
+        length = max_length
+
+    order = []
+    i = 0
+    while f"order[{i}][column]" in args:
+        idx = _int(f"order[{i}][column]", 0)
+        name = args.get(f"columns[{idx}][data]") or args.get(f"order[{i}][name]")
+        direction = (args.get(f"order[{i}][dir]") or "asc").lower()
+        if name in DATATABLE_COLUMNS and direction in ("asc", "desc"):
+            order.append((name, direction))
+        i += 1
+
+    return DataTablesRequest(
+        draw=_int("draw", 0),
+        start=max(_int("start", 0), 0),
+        length=length,
+        search=(args.get("search[value]") or "").strip(),
+        order=order,
+    )
+
+
+def equipment_datatable(req: DataTablesRequest, room_id: Optional[int] = None,
+                        case_scene_id: Optional[int] = None, type_id: Optional[int] = None) -> Dict[str, Any]:
+    where = []
+    if room_id:
+        where.append(EquipmentInfo.room_id == room_id)
+    if case_scene_id:
+        where.append(EquipmentInfo.room_id.in_(select(Room.id).where(Room.case_scene_id == case_scene_id)))
+    if type_id:
+        where.append(EquipmentInfo.equipment_type_id == type_id)
+
+    def _count(conditions) -> int:
+        return db.session.scalar(select(func.count()).select_from(EquipmentInfo).where(*conditions))
+
+    if room_id and not case_scene_id and not type_id:
+        total = room_stats(room_id)["equipment"]
+    else:
+        total = _count(where)
+
+    filtered_where = list(where)
+    # the search box may hold only quotes / spaces: nothing to filter on
+    if fts_query(req.search):
+        filtered_where.append(EquipmentInfo.id.in_(match_equipment_ids(req.search)))
+        filtered = _count(filtered_where)
+    else:
+        filtered = total
+
+    order_by = [
+        DATATABLE_COLUMNS[name].desc() if direction == "desc" else DATATABLE_COLUMNS[name].asc()
+        for name, direction in req.order
+    ] + [EquipmentInfo.id.asc()]
+
+    stmt = (
+        select(*[expr.label(name) for name, expr in DATATABLE_COLUMNS.items()],
+               EquipmentInfo.room_id, Room.case_scene_id)
+        .select_from(EquipmentInfo)
+        .outerjoin(Room, Room.id == EquipmentInfo.room_id)
+        .outerjoin(EquipmentType, EquipmentType.id == EquipmentInfo.equipment_type_id)
+        .where(*filtered_where)
+        .order_by(*order_by)
+        .offset(req.start)
+        .limit(req.length)
+    )
+    rows = [dict(row._mapping) for row in db.session.execute(stmt)]
+
+    return dict(draw=req.draw, recordsTotal=total, recordsFiltered=filtered, data=rows)
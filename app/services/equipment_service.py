@@ -5,3 +5,4 @@ from ._legacy import (
     build_room_equipments_ctx,
     get_case_context,
 )
+from .tree_service import list_case_scenes, list_case_rooms
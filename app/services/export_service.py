@@ -0,0 +1,248 @@
+"""Inventory / history export (CSV, XLSX) for a room, a case scene or the fleet.
+
+Rows come from one SELECT executed with `yield_per`, so the DB cursor is read
+in batches and never materialised; each device's latest inspection is a
+correlated LIMIT 1 lookup on ix_inspection_record_equipment_uploaded (no
+window over the whole table before the first row).
+
+  CSV   a generator: the header goes out at once, then every
+        EXPORT_CSV_FLUSH_ROWS rows; memory is one batch.
+  XLSX  openpyxl write-only workbook: rows are appended as inline strings
+        to a temporary sheet file, so memory stays flat too. The zip can only
+        be assembled once the last row is in (`Workbook.save`); the finished
+        file is then streamed from a temporary file in chunks.
+
+Text cells starting with = + - @ (or a tab / CR) are prefixed with `'` in
+both formats, so uploaded SN / firmware / notes never run as a formula when
+the file is opened in Excel.
+
+The export holds one read transaction for its duration (SQLite: writers wait
+until it finishes).
+"""
+
+import csv
+import io
+import tempfile
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from sqlalchemy import select
+
+from ..extensions import db
+from ..models import CaseScene, EquipmentInfo, EquipmentManage, EquipmentType, InspectionRecord, Room
+from .fleet_report import FLEET_REPORT_FIELDS
+
+EXPORT_FORMATS = ("csv", "xlsx")
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MIMETYPE = "text/csv; charset=utf-8"
+STREAM_CHUNK_SIZE = 64 * 1024
+# a text cell starting with one of these is a formula (or DDE) to a spreadsheet
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+EQUIPMENT_HEADER = (
+    ["Equipment ID", "Country", "Location", "Room", "Type", "OEM SN", "Vendor SN", "ATS", "MAC", "Firmware"]
+    + [label for label, _ in FLEET_REPORT_FIELDS]
+    + ["Inspection File", "Inspection Uploaded At"]
+)
+HISTORY_HEADER = ["History ID", "Equipment ID", "OEM SN", "Vendor SN", "Country", "Location", "Room", "Customer Changes"]
+
+# (sheet title, header, rows)
+Sheet = Tuple[str, Sequence[str], Iterable[Sequence[Any]]]
+
+
+def _scoped(stmt, room_col, room_id: Optional[int], case_scene_id: Optional[int]):
+    if room_id is not None:
+        stmt = stmt.where(room_col == room_id)
+    if case_scene_id is not None:
+        stmt = stmt.where(Room.case_scene_id == case_scene_id)
+    return stmt
+
+
+def _stream(stmt) -> Iterator[Any]:
+    yield from db.session.execute(stmt.execution_options(yield_per=current_app.config["EXPORT_YIELD_PER"]))
+
+
+def equipment_export_rows(room_id: Optional[int] = None, case_scene_id: Optional[int] = None) -> Iterator[list]:
+    """EquipmentInfo + room / case / type + latest inspection fields, one list per device (id order)."""
+    latest_id = (
+        select(InspectionRecord.id)
+        .where(InspectionRecord.equipment_id == EquipmentInfo.id)
+        .order_by(InspectionRecord.uploaded_at.desc(), InspectionRecord.id.desc())
+        .limit(1)
+        .correlate(EquipmentInfo)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            EquipmentInfo.id,
+            CaseScene.country,
+            CaseScene.location,
+            Room.room_name,
+            EquipmentType.name,
+            EquipmentInfo.oem_sn,
+            EquipmentInfo.vendor_sn,
+            EquipmentInfo.ats,
+            EquipmentInfo.macaddr,
+            EquipmentInfo.firmware,
+            InspectionRecord.fields,
+            InspectionRecord.filename,
+            InspectionRecord.uploaded_at,
+        )
+        .select_from(EquipmentInfo)
+        .outerjoin(Room, Room.id == EquipmentInfo.room_id)
+        .outerjoin(CaseScene, CaseScene.id == Room.case_scene_id)
+        .outerjoin(EquipmentType, EquipmentType.id == EquipmentInfo.equipment_type_id)
+        .outerjoin(InspectionRecord, InspectionRecord.id == latest_id)
+        .order_by(EquipmentInfo.id.asc())
+    )
+    stmt = _scoped(stmt, EquipmentInfo.room_id, room_id, case_scene_id)
+
+    for row in _stream(stmt):
+        fields = row.fields or {}
+        yield (
+            list(row[:10])
+            + [fields.get(key, "") for _, key in FLEET_REPORT_FIELDS]
+            + [row.filename, row.uploaded_at]
+        )
+
+
+def history_export_rows(room_id: Optional[int] = None, case_scene_id: Optional[int] = None) -> Iterator[list]:
+    """EquipmentManage records (room = where the change was recorded), in id order."""
+    stmt = (
+        select(
+            EquipmentManage.id,
+            EquipmentManage.equipment_info_id,
+            EquipmentInfo.oem_sn,
+            EquipmentInfo.vendor_sn,
+            CaseScene.country,
+            CaseScene.location,
+            Room.room_name,
+            EquipmentManage.customer_changes,
+        )
+        .select_from(EquipmentManage)
+        .outerjoin(EquipmentInfo, EquipmentInfo.id == EquipmentManage.equipment_info_id)
+        .outerjoin(Room, Room.id == EquipmentManage.room_id)
+        .outerjoin(CaseScene, CaseScene.id == Room.case_scene_id)
+        .order_by(EquipmentManage.id.asc())
+    )
+    stmt = _scoped(stmt, EquipmentManage.room_id, room_id, case_scene_id)
+
+    for row in _stream(stmt):
+        yield list(row)
+
+
+def safe_cell(value: Any) -> Any:
+    """Neutralise spreadsheet formulas in text cells (leading `'`); numbers / dates pass through."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(header: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """UTF-8 with BOM (Excel opens 中文 names correctly); header first, then batches of rows."""
+    flush_rows = current_app.config["EXPORT_CSV_FLUSH_ROWS"]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def drain() -> bytes:
+        data = buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+        return data
+
+    buf.write("\ufeff")
+    writer.writerow(header)
+    yield drain()
+
+    pending = 0
+    for row in rows:
+        writer.writerow(["" if v is None else safe_cell(v) for v in row])
+        pending += 1
+        if pending >= flush_rows:
+            yield drain()
+            pending = 0
+    if pending:
+        yield drain()
+
+
+def _xlsx_value(value: Any) -> Any:
+    # openpyxl rejects control characters in strings
+    if isinstance(value, str):
+        return safe_cell(ILLEGAL_CHARACTERS_RE.sub("", value))
+    return value
+
+
+def stream_xlsx(sheets: Iterable[Sheet]) -> Iterator[bytes]:
+    """Write-only workbook (one sheet per entry), then the saved file in chunks."""
+    wb = Workbook(write_only=True)
+    for title, header, rows in sheets:
+        ws = wb.create_sheet(title)
+        ws.append(list(header))
+        for row in rows:
+            ws.append([_xlsx_value(v) for v in row])
+
+    with tempfile.TemporaryFile() as f:
+        wb.save(f)
+        f.seek(0)
+        while True:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export_filename(kind: str, fmt: str, room: Optional[Room] = None, cs: Optional[CaseScene] = None) -> str:
+    if room is not None:
+        scope = f"room{room.id}"
+    elif cs is not None:
+        scope = f"case{cs.id}"
+    else:
+        scope = "fleet"
+    return f"{kind}_{scope}_{datetime.now():%Y%m%d-%H%M}.{fmt}"
+
+
+def export_stream(
+    kind: str,
+    fmt: str,
+    room_id: Optional[int] = None,
+    case_scene_id: Optional[int] = None,
+    with_history: bool = False,
+) -> Tuple[Iterator[bytes], str, str]:
+    """
+    kind: "equipment" | "history"; fmt: "csv" | "xlsx"
+    with_history: xlsx equipment export gets a second "History" sheet (a CSV holds one table)
+    回傳 (chunks, mimetype, download filename)；scope 不存在 -> LookupError
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if kind not in ("equipment", "history"):
+        raise ValueError("unknown export")
+    if with_history and fmt == "csv":
+        raise ValueError("history=1 needs xlsx (a CSV holds one table); export history separately")
+
+    room = cs = None
+    if room_id is not None:
+        room = db.session.get(Room, room_id)
+        if room is None or (case_scene_id is not None and room.case_scene_id != case_scene_id):
+            raise LookupError("room not found")
+    elif case_scene_id is not None:
+        cs = db.session.get(CaseScene, case_scene_id)
+        if cs is None:
+            raise LookupError("case scene not found")
+
+    scope = dict(room_id=room_id, case_scene_id=case_scene_id)
+    if kind == "equipment":
+        sheets: List[Sheet] = [("Equipment", EQUIPMENT_HEADER, equipment_export_rows(**scope))]
+        if with_history:
+            sheets.append(("History", HISTORY_HEADER, history_export_rows(**scope)))
+    else:
+        sheets = [("History", HISTORY_HEADER, history_export_rows(**scope))]
+
+    filename = export_filename(kind, fmt, room=room, cs=cs)
+    if fmt == "csv":
+        _, header, rows = sheets[0]
+        return stream_csv(header, rows), CSV_MIMETYPE, filename
+    return stream_xlsx(sheets), XLSX_MIMETYPE, filename
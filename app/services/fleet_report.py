@@ -0,0 +1,222 @@
+"""Fleet inspection report: every device of a room / case with its latest
+inspection fields side by side.
+
+Build:
+  1. inspection files uploaded to the room(s) that have no InspectionRecord
+     yet (they predate the table) are parsed in a process pool and stored, so
+     a file is parsed once, ever; records from before room_id / uploaded_at
+     get those from the upload index;
+  2. latest record per device: one ROW_NUMBER() query over
+     ix_inspection_record_equipment_uploaded, joined to the room's devices.
+
+The merged report is plain data, cached per process under the room / case
+data version (`room:<id>` / `case:<id>`): it is rebuilt only after a new
+upload lands in that room, or a device moves out of it.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from flask import abort, current_app
+from sqlalchemy import func, or_, select
+
+from ..extensions import db
+from ..models import CaseScene, EquipmentInfo, InspectionRecord, Room, StoredFile, UploadedFile
+from .blob_store import blob_path, legacy_path
+from .data_version import case_version, room_version, versioned_cache
+from .inspection_parser import parse_inspection_file
+from .inspection_records import record_inspections
+from .loading import equipment_list_options
+from .timing import timed_phase
+
+# (label, info key); Serial Number / Vendor SN are the device columns
+FLEET_REPORT_FIELDS = [
+    ("Model", "model"),
+    ("Part Number", "part_number"),
+    ("Last Inspect", "last_inspect"),
+    ("Eth1", "eth1"),
+    ("Eth2", "eth2"),
+    ("Eth3", "eth3"),
+    ("System Software", "system_software"),
+    ("Control Firmware", "control_firmware"),
+]
+
+
+def _parse_job(path: str) -> Optional[Dict[str, str]]:
+    # runs in a worker process: no app context, no DB
+    try:
+        return parse_inspection_file(path)
+    except Exception:
+        return None
+
+
+@timed_phase("io")
+def parse_inspection_files(paths: List[str]) -> List[Optional[Dict[str, str]]]:
+    """Parse files in a process pool (serially below FLEET_REPORT_PARALLEL_MIN); None = unreadable."""
+    workers = current_app.config["FLEET_REPORT_WORKERS"]
+    if workers <= 1 or len(paths) < current_app.config["FLEET_REPORT_PARALLEL_MIN"]:
+        return [_parse_job(p) for p in paths]
+
+    workers = min(workers, len(paths))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_parse_job, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+
+def _locate_records(room_ids: List[int]) -> int:
+    """Records written before room_id / uploaded_at existed: fill them from the rooms' upload index."""
+    rows = (
+        db.session.query(InspectionRecord, UploadedFile.room_id, UploadedFile.created_at)
+        .join(UploadedFile, UploadedFile.filename == InspectionRecord.filename)
+        .filter(
+            UploadedFile.room_id.in_(room_ids),
+            UploadedFile.category == "inspection",
+            or_(InspectionRecord.room_id.is_(None), InspectionRecord.uploaded_at.is_(None)),
+        )
+        .order_by(UploadedFile.id.asc())
+        .all()
+    )
+    located = set()
+    for record, room_id, created_at in rows:
+        if record.id in located:
+            continue   # first room the file was uploaded to
+        located.add(record.id)
+        record.room_id = record.room_id or room_id
+        record.uploaded_at = record.uploaded_at or created_at or record.parsed_at
+    return len(located)
+
+
+def record_unparsed_inspections(room_ids: List[int]) -> Dict[str, int]:
+    """Parse + store the rooms' inspection files that have no record yet (commits)."""
+    located = _locate_records(room_ids)
+    if located:
+        db.session.commit()
+
+    has_record = select(InspectionRecord.id).where(InspectionRecord.filename == UploadedFile.filename).exists()
+    uploads = (
+        db.session.query(UploadedFile.filename, UploadedFile.room_id, UploadedFile.created_at)
+        .filter(UploadedFile.room_id.in_(room_ids), UploadedFile.category == "inspection", ~has_record)
+        .order_by(UploadedFile.id.asc())
+        .all()
+    )
+    stats = dict(parsed=0, missing=0, located=located)
+    if not uploads:
+        return stats
+
+    first = {}
+    for filename, room_id, created_at in uploads:
+        first.setdefault(filename, (room_id, created_at))
+    stored = {
+        row.filename: row
+        for row in StoredFile.query.filter(StoredFile.category == "inspection", StoredFile.filename.in_(first))
+    }
+
+    jobs = []   # (filename, path, sha256, room_id, uploaded_at)
+    for filename, (room_id, created_at) in first.items():
+        row = stored.get(filename)
+        path = blob_path(row.sha256) if row else legacy_path("inspection", filename)
+        if not os.path.exists(path):
+            stats["missing"] += 1
+            continue
+        jobs.append((filename, path, row.sha256 if row else None, room_id, row.created_at if row else created_at))
+
+    infos = parse_inspection_files([job[1] for job in jobs])
+
+    # parse result -> device (oem_sn first, then vendor_sn), two IN queries for the whole batch
+    serials = {i.get("serial_number") for i in infos if i and i.get("serial_number")}
+    vendors = {i.get("vendor_sn") for i in infos if i and i.get("vendor_sn")}
+    by_oem = dict(db.session.query(EquipmentInfo.oem_sn, EquipmentInfo.id).filter(EquipmentInfo.oem_sn.in_(serials)))
+    by_vendor = dict(
+        db.session.query(EquipmentInfo.vendor_sn, EquipmentInfo.id).filter(EquipmentInfo.vendor_sn.in_(vendors))
+    )
+
+    entries = []
+    for (filename, _path, sha256, room_id, uploaded_at), info in zip(jobs, infos):
+        if info is None:
+            stats["missing"] += 1
+            continue
+        equipment_id = by_oem.get(info.get("serial_number")) or by_vendor.get(info.get("vendor_sn"))
+        entries.append((filename, sha256, info, equipment_id, room_id, uploaded_at))
+    record_inspections(entries)
+    db.session.commit()
+    stats["parsed"] = len(entries)
+    return stats
+
+
+def _latest_records(room_ids: List[int]) -> Dict[int, InspectionRecord]:
+    """equipment_id -> latest InspectionRecord, for the devices currently in the rooms."""
+    ranked = (
+        select(
+            InspectionRecord.id,
+            func.row_number().over(
+                partition_by=InspectionRecord.equipment_id,
+                order_by=(InspectionRecord.uploaded_at.desc(), InspectionRecord.id.desc()),
+            ).label("rn"),
+        )
+        .join(EquipmentInfo, EquipmentInfo.id == InspectionRecord.equipment_id)
+        .where(EquipmentInfo.room_id.in_(room_ids))
+        .subquery()
+    )
+    records = InspectionRecord.query.join(ranked, ranked.c.id == InspectionRecord.id).filter(ranked.c.rn == 1)
+    return {r.equipment_id: r for r in records}
+
+
+def _build_fleet_report(room_ids: List[int]) -> Dict[str, Any]:
+    stats = record_unparsed_inspections(room_ids) if room_ids else dict(parsed=0, missing=0, located=0)
+    latest = _latest_records(room_ids) if room_ids else {}
+    devices = (
+        EquipmentInfo.query.options(*equipment_list_options())
+        .filter(EquipmentInfo.room_id.in_(room_ids))
+        .order_by(EquipmentInfo.room_id.asc(), EquipmentInfo.oem_sn.asc())
+        .all()
+    ) if room_ids else []
+
+    rows = []
+    for e in devices:
+        record = latest.get(e.id)
+        fields = record.fields if record else {}
+        rows.append(dict(
+            equipment_id=e.id,
+            oem_sn=e.oem_sn,
+            vendor_sn=e.vendor_sn,
+            equipment_type=e.equipment_type.name if e.equipment_type else None,
+            room_id=e.room_id,
+            room_name=e.room.room_name if e.room else None,
+            filename=record.filename if record else None,
+            uploaded_at=record.uploaded_at if record else None,
+            fields={key: fields.get(key, "") for _, key in FLEET_REPORT_FIELDS},
+        ))
+
+    return dict(
+        columns=FLEET_REPORT_FIELDS,
+        rows=rows,
+        devices=len(rows),
+        inspected=sum(1 for r in rows if r["filename"]),
+        parsed=stats["parsed"],
+        missing=stats["missing"],
+        built_at=datetime.now(),
+    )
+
+
+def room_fleet_report(case_scene_id: int, room_id: int) -> Dict[str, Any]:
+    """{cs, room, report}; report cached until the next upload into the room."""
+    room = Room.query.filter_by(id=room_id, case_scene_id=case_scene_id).first()
+    if room is None:
+        abort(404)
+    report = versioned_cache(room_version(room.id)).get(lambda: _build_fleet_report([room.id]))
+    return dict(cs=room.case_scene, room=room, report=report)
+
+
+def case_fleet_report(case_scene_id: int) -> Dict[str, Any]:
+    """{cs, room: None, report} over every room of the case."""
+    cs = db.session.get(CaseScene, case_scene_id)
+    if cs is None:
+        abort(404)
+
+    def build():
+        room_ids = [rid for (rid,) in db.session.query(Room.id).filter(Room.case_scene_id == cs.id)]
+        return _build_fleet_report(room_ids)
+
+    report = versioned_cache(case_version(cs.id)).get(build)
+    return dict(cs=cs, room=None, report=report)
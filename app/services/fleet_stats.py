@@ -0,0 +1,90 @@
+"""Per-room / per-case counters for the tree and case pages.
+
+One grouped aggregate over equipment + upload index, cached per process and
+rebuilt only when the STATS data version moves. Upload / location services
+bump STATS in the same transaction as their change, so rendering counts costs
+one version lookup, not a COUNT per room.
+
+Per node:
+  equipment              total devices
+  equipment_by_type      {equipment_type_id (None = untyped): n}
+  uploads                total indexed uploads
+  uploads_by_category    {category: n}
+  latest_inspection_at   newest inspection upload (datetime | None)
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy import func
+
+from ..extensions import db
+from ..models import EquipmentInfo, Room, UploadedFile
+from .data_version import STATS, versioned_cache
+
+
+def empty_stats() -> Dict[str, Any]:
+    return dict(
+        equipment=0,
+        equipment_by_type={},
+        uploads=0,
+        uploads_by_category={},
+        latest_inspection_at=None,
+    )
+
+
+def _merge(into: Dict[str, Any], other: Dict[str, Any]) -> None:
+    into["equipment"] += other["equipment"]
+    into["uploads"] += other["uploads"]
+    for k, n in other["equipment_by_type"].items():
+        into["equipment_by_type"][k] = into["equipment_by_type"].get(k, 0) + n
+    for k, n in other["uploads_by_category"].items():
+        into["uploads_by_category"][k] = into["uploads_by_category"].get(k, 0) + n
+    latest = other["latest_inspection_at"]
+    if latest and (into["latest_inspection_at"] is None or latest > into["latest_inspection_at"]):
+        into["latest_inspection_at"] = latest
+
+
+def _build_fleet_stats() -> Dict[str, Dict[int, Dict[str, Any]]]:
+    rooms: Dict[int, Dict[str, Any]] = {}
+
+    def node(room_id):
+        return rooms.setdefault(room_id, empty_stats())
+
+    for room_id, type_id, n in (
+        db.session.query(EquipmentInfo.room_id, EquipmentInfo.equipment_type_id, func.count())
+        .filter(EquipmentInfo.room_id.isnot(None))
+        .group_by(EquipmentInfo.room_id, EquipmentInfo.equipment_type_id)
+    ):
+        s = node(room_id)
+        s["equipment"] += n
+        s["equipment_by_type"][type_id] = n
+
+    for room_id, category, n, latest in (
+        db.session.query(UploadedFile.room_id, UploadedFile.category, func.count(), func.max(UploadedFile.created_at))
+        .group_by(UploadedFile.room_id, UploadedFile.category)
+    ):
+        s = node(room_id)
+        s["uploads"] += n
+        s["uploads_by_category"][category] = n
+        if category == "inspection":
+            s["latest_inspection_at"] = latest
+
+    cases: Dict[int, Dict[str, Any]] = {}
+    for room_id, cs_id in db.session.query(Room.id, Room.case_scene_id):
+        if room_id in rooms:
+            _merge(cases.setdefault(cs_id, empty_stats()), rooms[room_id])
+
+    return dict(rooms=rooms, cases=cases)
+
+
+def get_fleet_stats() -> Dict[str, Dict[int, Dict[str, Any]]]:
+    """{"rooms": {room_id: stats}, "cases": {case_scene_id: stats}} (read-only)"""
+    return versioned_cache(STATS).get(_build_fleet_stats)
+
+
+def room_stats(room_id: int) -> Dict[str, Any]:
+    return get_fleet_stats()["rooms"].get(room_id) or empty_stats()
+
+
+def case_stats(case_scene_id: int) -> Dict[str, Any]:
+    return get_fleet_stats()["cases"].get(case_scene_id) or empty_stats()
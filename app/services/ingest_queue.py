@@ -0,0 +1,256 @@
+"""In-process background ingest queue.
+
+The request only streams the raw upload into a staging folder, records an
+`IngestJob` row and returns. Parsing, the `EquipmentInfo` upsert and the upload
+index update run in a small thread pool (`INGEST_WORKERS`), each job inside
+its own app context / DB session.
+
+Job state lives in the DB, so `/api/jobs/<id>` answers from any worker process
+even though the job runs in the process that accepted the upload. The queue
+itself does not survive a restart: `recover_ingest_jobs` (at startup, and for
+a stale job when it is polled) re-runs what was left behind while its staged
+file is still there and fails it otherwise. A worker claims a job with a
+conditional UPDATE, so a job submitted twice still runs once.
+"""
+
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from flask import abort, current_app
+from sqlalchemy import and_, or_, update
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+
+from ..extensions import db
+from ..models import IngestJob
+from ._legacy import (
+    classify_upload,
+    ensure_case_room,
+    is_archive,
+    register_upload,
+    validate_upload_ext,
+    validate_upload_target,
+)
+from .blob_store import find_by_hash
+from .upload_index import record_uploaded_files
+from .upload_stream import stream_to_file
+
+
+class IngestQueue:
+    def __init__(self, app, workers: int):
+        self.app = app
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    def submit(self, job_id: str):
+        fut = self._executor.submit(_run_job, self.app, job_id)
+        with self._lock:
+            self._futures.add(fut)
+        fut.add_done_callback(self._forget)
+        return fut
+
+    def _forget(self, fut) -> None:
+        with self._lock:
+            self._futures.discard(fut)
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Block until every submitted job has finished (tests / shutdown)."""
+        with self._lock:
+            pending = list(self._futures)
+        done, not_done = wait(pending, timeout=timeout)
+        return not not_done
+
+
+def get_ingest_queue() -> IngestQueue:
+    app = current_app._get_current_object()
+    queue = app.extensions.get("ingest_queue")
+    if queue is None:
+        queue = app.extensions["ingest_queue"] = IngestQueue(app, app.config["INGEST_WORKERS"])
+    return queue
+
+
+def _staging_dir(job_id: str) -> str:
+    return os.path.join(current_app.instance_path, "ingest_staging", job_id)
+
+
+def enqueue_upload(
+    file,
+    country: str,
+    room: str,
+    file_category: str | None = None,
+    feedback_text: str | None = None,
+    equipment_type_id: int | None = None,
+    equipment_id: int | None = None,
+    user_id: int | None = None,
+) -> Dict[str, Any]:
+    """Validate + stage the raw file, queue the ingest, return the job dict."""
+    file_category = (file_category or "inspection").lower()
+    country = (country or "").strip()
+    room = (room or "").strip()
+
+    country_key = validate_upload_target(country, room, file_category, equipment_id)
+    if file_category == "feedback":
+        raise ValueError("Feedback 不需要背景處理")
+    if not file or file.filename == "":
+        raise ValueError("沒有選擇檔案")
+
+    filename = secure_filename(file.filename)
+    validate_upload_ext(filename)
+
+    job_id = uuid.uuid4().hex
+    sdir = _staging_dir(job_id)
+    os.makedirs(sdir, exist_ok=True)
+    staged = stream_to_file(file, os.path.join(sdir, filename))
+
+    # identical content already stored in this category: done, nothing to parse
+    # (archives are never stored themselves, only their members)
+    duplicate = None
+    if not is_archive(filename):
+        duplicate = find_by_hash(classify_upload(filename, file_category), staged.sha256)
+
+    job = IngestJob(
+        id=job_id,
+        state="queued",
+        user_id=user_id,
+        filename=filename,
+        staged_path=staged.path,
+        country=country,
+        room=room,
+        file_category=file_category,
+        feedback_text=(feedback_text or "").strip() or None,
+        equipment_type_id=equipment_type_id,
+        equipment_id=equipment_id,
+        size=staged.size,
+        sha256=staged.sha256,
+    )
+    if duplicate:
+        now = datetime.now()
+        job.state = "succeeded"
+        job.duplicate = True
+        job.stored_filename = duplicate.filename
+        job.started_at = job.finished_at = now
+
+    try:
+        db.session.add(job)
+        if duplicate:
+            cs, r = ensure_case_room(country_key, room)
+            record_uploaded_files(cs, r, [(duplicate.filename, duplicate.category, None)])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        shutil.rmtree(sdir, ignore_errors=True)
+        raise
+
+    if duplicate:
+        shutil.rmtree(sdir, ignore_errors=True)
+    else:
+        get_ingest_queue().submit(job_id)
+    return job.to_dict()
+
+
+def _run_job(app, job_id: str) -> None:
+    with app.app_context():
+        claimed = db.session.execute(
+            update(IngestJob)
+            .where(IngestJob.id == job_id, IngestJob.state == "queued")
+            .values(state="running", started_at=datetime.now())
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return
+        job = db.session.get(IngestJob, job_id)
+
+        try:
+            with open(job.staged_path, "rb") as f:
+                out = register_upload(
+                    file=FileStorage(stream=f, filename=job.filename),
+                    country=job.country,
+                    room=job.room,
+                    file_category=job.file_category,
+                    feedback_text=job.feedback_text,
+                    equipment_type_id=job.equipment_type_id,
+                    equipment_id=job.equipment_id,
+                )
+            job = db.session.get(IngestJob, job_id)
+            job.state = "succeeded"
+            job.stored_filename = out.get("filename")
+            job.duplicate = bool(out.get("duplicate"))
+
+        except Exception as e:
+            db.session.rollback()
+            if not isinstance(e, ValueError):
+                app.logger.exception("ingest job %s failed", job_id)
+            job = db.session.get(IngestJob, job_id)
+            job.state = "failed"
+            job.error = str(e) or e.__class__.__name__
+
+        job.finished_at = datetime.now()
+        db.session.commit()
+        shutil.rmtree(os.path.dirname(job.staged_path), ignore_errors=True)
+
+
+def _stale_before() -> datetime:
+    return datetime.now() - timedelta(seconds=current_app.config["INGEST_JOB_STALE_SECONDS"])
+
+
+def _requeue_or_fail(jobs: List[IngestJob]) -> Dict[str, int]:
+    """Re-run jobs whose staged file survived, fail the rest (commits)."""
+    stats = dict(requeued=0, failed=0)
+    requeue = []
+    for job in jobs:
+        if os.path.exists(job.staged_path):
+            job.state = "queued"
+            job.started_at = None
+            requeue.append(job.id)
+            stats["requeued"] += 1
+        else:
+            job.state = "failed"
+            job.error = "處理中斷（服務重啟），暫存檔已不存在，請重新上傳"
+            job.finished_at = datetime.now()
+            stats["failed"] += 1
+    db.session.commit()
+
+    for job_id in requeue:
+        get_ingest_queue().submit(job_id)
+    return stats
+
+
+def recover_ingest_jobs() -> Dict[str, int]:
+    """
+    Jobs a previous process left behind: every queued job (a second submit is a
+    no-op) and running jobs started before INGEST_JOB_STALE_SECONDS ago.
+    """
+    jobs = IngestJob.query.filter(
+        or_(
+            IngestJob.state == "queued",
+            and_(IngestJob.state == "running", IngestJob.started_at < _stale_before()),
+        )
+    ).all()
+    if not jobs:
+        return dict(requeued=0, failed=0)
+    stats = _requeue_or_fail(jobs)
+    current_app.logger.warning("recovered ingest jobs: %s", stats)
+    return stats
+
+
+def _is_stale(job: IngestJob) -> bool:
+    since = job.started_at if job.state == "running" else job.queued_at
+    return job.state in ("queued", "running") and since is not None and since < _stale_before()
+
+
+def get_ingest_job(job_id: str, user) -> Dict[str, Any]:
+    job = db.session.get(IngestJob, job_id)
+    if job is None:
+        abort(404)
+    if job.user_id != user.id and not user.is_super():
+        abort(404)
+    # its process died after startup recovery ran: don't leave the client polling forever
+    if _is_stale(job):
+        _requeue_or_fail([job])
+    return job.to_dict()
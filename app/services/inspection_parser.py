@@ -0,0 +1,251 @@
+"""Inspection file parsing.
+
+`parse_equipment_file` (in `_legacy.py`) and the streaming upload pipeline both
+go through `InspectionFieldCollector`, so a file parsed from disk and a file
+parsed chunk-by-chunk while it is being uploaded give the same result.
+
+Matching is single-pass: the FIELD_MAP patterns are compiled into one
+alternation. A block of lines is lower-cased once and scanned with it, so
+only the few lines that mention a field are split in Python (the data rows
+of a result file never are); the field for a key (earliest FIELD_MAP entry
+wins, as before) is memoised per distinct key. Bulk re-ingest of historical
+inspections is dominated by this; `flask bench-parser` measures it
+(services/parser_bench.py).
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# key pattern (substring of the lower-cased key) -> info field
+FIELD_MAP = {
+    "inspection details": "inspection_details",
+    "last inspect": "last_inspect",
+    "serial number": "serial_number",
+    "Vendor SN": "vendor_sn",
+    "model": "model",
+    "part number": "part_number",
+    "eth1": "eth1",
+    "eth2": "eth2",
+    "eth3": "eth3",
+    "system software": "system_software",
+    "control firmware": "control_firmware",
+}
+
+# pattern (lower-cased) -> (priority = FIELD_MAP order, info field)
+_PRIORITY = {pattern.lower(): (i, field_name) for i, (pattern, field_name) in enumerate(FIELD_MAP.items())}
+
+# all patterns in one alternation, matched against lower-cased text (re.IGNORECASE
+# defeats the literal-prefix scan and is ~20x slower on this input)
+_ALTERNATION = "|".join(re.escape(p) for p in _PRIORITY)
+_ANY_RE = re.compile(_ALTERNATION)
+# every pattern at every position of a key (lookahead: overlapping hits too);
+# alternatives in priority order, so at one position the earlier entry is taken
+_KEY_RE = re.compile(f"(?=({_ALTERNATION}))")
+
+DEFAULT_MAX_LINES = 200
+READ_CHUNK_SIZE = 64 * 1024
+# longer "lines" (binary, no line breaks) count as one line and are skipped, never buffered
+MAX_LINE_BYTES = 64 * 1024
+_LINE_BREAK_RE = re.compile(rb"[\r\n]")
+
+
+def empty_info() -> Dict[str, str]:
+    return {v: "" for v in FIELD_MAP.values()}
+
+
+@lru_cache(maxsize=4096)
+def match_field(key: str) -> Optional[str]:
+    """Info field for a key (case-insensitive substring match, first FIELD_MAP entry wins)."""
+    best = None
+    for m in _KEY_RE.finditer(key.lower()):
+        hit = _PRIORITY[m.group(1)]
+        if best is None or hit < best:
+            best = hit
+    return best[1] if best else None
+
+
+def _split_line(line: str) -> Optional[Tuple[str, str]]:
+    """(key as written, value); see split_key_value for the formats."""
+    i = line.find(",")
+    if i >= 0:
+        return line[:i].strip(), line[i + 1:].strip()
+
+    i = line.find(":")
+    if i >= 0:
+        return line[:i].strip(), line[i + 1:].strip().strip("'\" ")
+
+    parts = line.split(None, 1)
+    if len(parts) == 2:
+        return parts[0], parts[1].strip().strip("'\" ")
+    return None
+
+
+def split_key_value(line: str) -> Optional[Tuple[str, str]]:
+    """
+    Split one stripped line into (lower-cased key, value):
+    1) 'A,B'
+    2) 'A: B'
+    3) 'A B'
+    """
+    kv = _split_line(line)
+    if kv is None:
+        return None
+    return kv[0].lower(), kv[1]
+
+
+def finalize_info(info: Dict[str, str]) -> Dict[str, str]:
+    # firmware = system_software + control_firmware
+    info["firmware"] = f"{info.get('system_software','')},{info.get('control_firmware','')}".strip(",")
+    return info
+
+
+class InspectionFieldCollector:
+    """
+    Incremental inspection parser.
+
+    Feed it raw bytes in arbitrary chunks (e.g. while the upload is streamed to
+    disk) or text lines, then call `result()`. Only the first `max_lines` lines
+    are inspected; anything after that is ignored without being buffered. A
+    line longer than MAX_LINE_BYTES counts toward the budget but is dropped,
+    so at most one such line is held.
+
+    Complete lines of a chunk are handled as one block: decoded once, line
+    breaks normalised, cut to the line budget, and only the lines that
+    mention a pattern (a key is part of its line) reach Python-level splitting.
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES):
+        self.max_lines = max_lines
+        self.info = empty_info()
+        self.line_count = 0
+        self._pending = b""
+        self._skipping = False   # inside an over-long line: drop bytes up to its line break
+
+    @property
+    def done(self) -> bool:
+        return self.line_count >= self.max_lines
+
+    def feed_line(self, raw: str) -> None:
+        if self.done:
+            return
+        self.line_count += 1
+        self._take(raw)
+
+    def _take(self, raw: str) -> None:
+        line = raw.strip()
+        if not line:
+            return
+
+        kv = _split_line(line)
+        if kv is None:
+            return
+        field_name = match_field(kv[0])
+        if field_name is not None:
+            self.info[field_name] = kv[1]
+
+    def feed(self, chunk: bytes) -> None:
+        if self.done or not chunk:
+            return
+
+        if self._skipping:
+            m = _LINE_BREAK_RE.search(chunk)
+            if m is None:
+                return
+            end = m.end()
+            if chunk[m.start():end + 1] == b"\r\n":
+                end += 1
+            self._skipping = False
+            chunk = chunk[end:]
+            if not chunk:
+                return
+
+        data = self._pending + chunk
+        # a trailing "\r" may be the first half of "\r\n": keep it for the next chunk
+        end = len(data) - 1 if data.endswith(b"\r") else len(data)
+        cut = max(data.rfind(b"\n", 0, end), data.rfind(b"\r", 0, end)) + 1
+        self._pending = data[cut:]
+        if cut:
+            self._feed_block(data[:cut])
+        if self.done:
+            self._pending = b""
+        elif len(self._pending) > MAX_LINE_BYTES:
+            self._pending = b""
+            self.line_count += 1
+            self._skipping = True
+
+    def _feed_block(self, block: bytes) -> None:
+        """block: complete lines (ends with a line break)."""
+        # universal newlines (as open() in text mode): "\r\n" is one line break, a lone "\r" is one too
+        text = block.decode("utf-8", errors="ignore").replace("\r\n", "\n").replace("\r", "\n")
+        budget = self.max_lines - self.line_count
+        lines = text.count("\n")
+        if lines > budget:
+            text = "\n".join(text.split("\n", budget)[:budget])
+            lines = budget
+        self.line_count += lines
+
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # some characters lower-case to several (e.g. "\u0130"): offsets differ, go line by line
+            for line in text.split("\n"):
+                self._take(line)
+            return
+
+        line_end = -1
+        for m in _ANY_RE.finditer(lowered):
+            pos = m.start()
+            if pos < line_end:
+                continue   # another pattern on a line already taken
+            line_end = text.find("\n", pos)
+            if line_end < 0:
+                line_end = len(text)
+            self._take(text[text.rfind("\n", 0, pos) + 1:line_end])
+
+    def result(self) -> Dict[str, str]:
+        if self._pending:
+            self._feed_block(self._pending + b"\n")
+            self._pending = b""
+        return finalize_info(dict(self.info))
+
+
+def parse_inspection_path(file_path: str, max_lines: int = DEFAULT_MAX_LINES) -> Dict[str, str]:
+    """Parse a file on disk; reads binary chunks only until `max_lines` lines were seen."""
+    collector = InspectionFieldCollector(max_lines=max_lines)
+    with open(file_path, "rb") as f:
+        while not collector.done:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            collector.feed(chunk)
+    return collector.result()
+
+
+def parse_inspection_rows(rows: Iterable[List[str]], max_lines: int = DEFAULT_MAX_LINES) -> Dict[str, str]:
+    """
+    Spreadsheet rows (cell texts, e.g. an XLSX sheet) -> info. Each row is read
+    like the line a CSV export of the sheet would have ('Serial Number,OEM-1';
+    a single 'Vendor SN: X' cell still splits on the colon).
+    """
+    collector = InspectionFieldCollector(max_lines=max_lines)
+    for cells in rows:
+        if collector.done:
+            break
+        start, end = 0, len(cells)
+        while start < end and not cells[start]:
+            start += 1
+        while end > start and not cells[end - 1]:
+            end -= 1
+        collector.feed_line(",".join(cells[start:end]))
+    return collector.result()
+
+
+def parse_inspection_file(file_path: str, max_lines: int = DEFAULT_MAX_LINES) -> Dict[str, str]:
+    """Text or XLSX file on disk -> info. Needs no app context (process-pool workers use it)."""
+    from .tabular_reader import is_xlsx_file, iter_xlsx_rows, text_row
+
+    if is_xlsx_file(file_path):
+        rows = (text_row(row) for row in iter_xlsx_rows(file_path, max_rows=max_lines))
+        return parse_inspection_rows(rows, max_lines=max_lines)
+    return parse_inspection_path(file_path, max_lines=max_lines)
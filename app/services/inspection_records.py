@@ -0,0 +1,178 @@
+"""Parsed inspection results (`InspectionRecord`).
+
+Inspection files are parsed once, while they are streamed in at ingest
+(`InspectionFieldCollector`), and the result is stored with the file's hash
+and equipment. Report pages read the record instead of locating the file on
+disk and parsing it again; only files that predate the table fall back to
+`parse_equipment_file`. Those are stored once at startup when any is
+missing (`init_inspection_records`), or by `flask backfill-inspections`.
+
+Each record also carries the room it was uploaded to and the real upload
+time (`StoredFile.created_at`), indexed as (room_id, uploaded_at) and
+(equipment_id, uploaded_at): "latest inspection of this room / device" is one
+query instead of stat'ing every file the room ever received. A room reaches
+its records through its upload index rows, so identical content that was
+deduplicated into a second room (one record, owned by the first room) counts
+in both.
+"""
+
+import os
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..extensions import db
+from ..models import InspectionRecord, StoredFile, UploadedFile
+
+# (filename, sha256, info, equipment_id, room_id, uploaded_at)
+RecordEntry = Tuple[str, Optional[str], Dict[str, str], Optional[int], Optional[int], Optional[datetime]]
+
+
+def record_inspections(entries: Iterable[RecordEntry]) -> int:
+    """
+    Insert / refresh records for parsed inspection files (one statement).
+    The caller commits. Returns the number of rows written.
+    uploaded_at=None (row not flushed yet) -> now.
+    """
+    now = datetime.now()
+    rows = [
+        dict(
+            filename=filename,
+            sha256=sha256,
+            fields=dict(info),
+            equipment_id=equipment_id,
+            room_id=room_id,
+            uploaded_at=uploaded_at or now,
+            parsed_at=now,
+        )
+        for filename, sha256, info, equipment_id, room_id, uploaded_at in entries
+    ]
+    if not rows:
+        return 0
+
+    stmt = sqlite_insert(InspectionRecord.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["filename"],
+        set_={
+            c: stmt.excluded[c]
+            for c in ("sha256", "fields", "equipment_id", "room_id", "uploaded_at", "parsed_at")
+        },
+    )
+    return db.session.connection().execute(stmt, rows).rowcount
+
+
+def get_inspection_record(filename: str) -> Optional[InspectionRecord]:
+    return InspectionRecord.query.filter_by(filename=filename).first()
+
+
+def latest_room_inspection(room_id: int) -> Optional[InspectionRecord]:
+    """
+    Most recently uploaded inspection of the room, via its upload index rows
+    (ix_uploaded_file_room_category, then the record by filename). A file
+    deduplicated into this room counts as of its upload here.
+    """
+    uploaded_here = func.max(
+        func.coalesce(InspectionRecord.uploaded_at, UploadedFile.created_at),
+        UploadedFile.created_at,
+    )
+    return (
+        InspectionRecord.query
+        .join(UploadedFile, UploadedFile.filename == InspectionRecord.filename)
+        .filter(UploadedFile.room_id == room_id, UploadedFile.category == "inspection")
+        .order_by(uploaded_here.desc(), InspectionRecord.id.desc())
+        .first()
+    )
+
+
+def latest_equipment_inspection(equipment_id: int) -> Optional[InspectionRecord]:
+    """Most recently uploaded inspection of the device (ix_inspection_record_equipment_uploaded)."""
+    return (
+        InspectionRecord.query.filter_by(equipment_id=equipment_id)
+        .order_by(InspectionRecord.uploaded_at.desc(), InspectionRecord.id.desc())
+        .first()
+    )
+
+
+def backfill_inspection_records() -> Dict[str, int]:
+    """
+    Parse inspection files that have no record yet (uploaded before the table
+    existed) and store them. Blob-store files and legacy flat files both count.
+    Records written before room_id / uploaded_at existed get those filled in.
+    """
+    from ._legacy import inspection_equipment, parse_equipment_file
+    from .blob_store import legacy_path, resolve_upload_path
+
+    stored = {
+        row.filename: row
+        for row in StoredFile.query.filter(StoredFile.category == "inspection")
+    }
+    # first room the file was uploaded to (+ when, for flat files without StoredFile)
+    uploads: Dict[str, Tuple[int, datetime]] = {}
+    for filename, room_id, created_at in (
+        db.session.query(UploadedFile.filename, UploadedFile.room_id, UploadedFile.created_at)
+        .filter(UploadedFile.category == "inspection")
+        .order_by(UploadedFile.id.asc())
+    ):
+        uploads.setdefault(filename, (room_id, created_at))
+
+    def uploaded(filename: str) -> Tuple[Optional[int], Optional[datetime]]:
+        room_id, at = uploads.get(filename, (None, None))
+        if filename in stored:
+            at = stored[filename].created_at
+        elif at is None:
+            path = legacy_path("inspection", filename)
+            if os.path.exists(path):
+                at = datetime.fromtimestamp(os.path.getmtime(path))
+        return room_id, at
+
+    stats = dict(parsed=0, missing=0, located=0)
+
+    records = InspectionRecord.query.all()
+    for record in records:
+        if record.room_id is None or record.uploaded_at is None:
+            room_id, at = uploaded(record.filename)
+            record.room_id = record.room_id or room_id
+            record.uploaded_at = record.uploaded_at or at or record.parsed_at
+            stats["located"] += 1
+
+    known = {record.filename for record in records}
+    entries = []
+    for filename in sorted((set(stored) | set(uploads)) - known):
+        path = resolve_upload_path("inspection", filename)
+        if not path:
+            stats["missing"] += 1
+            continue
+        info = parse_equipment_file(path)
+        eq = inspection_equipment(info)
+        sha256 = stored[filename].sha256 if filename in stored else None
+        entries.append((filename, sha256, info, eq.id if eq else None, *uploaded(filename)))
+        stats["parsed"] += 1
+
+    record_inspections(entries)
+    db.session.commit()
+    return stats
+
+
+def inspection_backfill_pending() -> bool:
+    """An uploaded inspection without a record, or a record still missing its room / upload time."""
+    in_uploads = select(UploadedFile.id).where(
+        UploadedFile.category == "inspection", UploadedFile.filename == InspectionRecord.filename
+    ).exists()
+    unrecorded = select(UploadedFile.id).where(
+        UploadedFile.category == "inspection",
+        ~select(InspectionRecord.id).where(InspectionRecord.filename == UploadedFile.filename).exists(),
+    ).exists()
+    unlocated = select(InspectionRecord.id).where(
+        or_(InspectionRecord.uploaded_at.is_(None), InspectionRecord.room_id.is_(None) & in_uploads)
+    ).exists()
+    return bool(db.session.scalar(select(or_(unrecorded, unlocated))))
+
+
+def init_inspection_records(app) -> None:
+    """create_app hook: store inspections that predate the table, once (report pages never parse)."""
+    with app.app_context():
+        if inspection_backfill_pending():
+            stats = backfill_inspection_records()
+            app.logger.warning("[backfill_inspection_records] %s", stats)
@@ -0,0 +1,19 @@
+"""Eager-loading options shared by the list / report / search services.
+
+Relationships on the legacy models are all `lazy=True` (one SELECT per row the
+first time a template touches `eq.room` or `eq.equipment_type`). Services that
+hand ORM rows to templates load what those templates use up front, in the
+same SELECT; tests/test_query_budget.py keeps the per-request count constant.
+"""
+
+from sqlalchemy.orm import joinedload
+
+from ..models import EquipmentInfo, Room
+
+
+def equipment_list_options():
+    """EquipmentInfo rows shown with room / case / type (room page, report, search)."""
+    return (
+        joinedload(EquipmentInfo.room).joinedload(Room.case_scene),
+        joinedload(EquipmentInfo.equipment_type),
+    )
@@ -0,0 +1,161 @@
+"""Log file summary for /equipment/logs/<filename> (logs_summary.html).
+
+One streaming pass over the rows (tabular_reader: CSV / TXT / LOG or XLSX in
+openpyxl read-only mode). The first non-empty row is the header; the time
+column is the first header mentioning time / date (or, failing that, the
+first column if its first value is a timestamp). Every other column whose
+non-blank values all parse as numbers is averaged per `window_minutes`
+bucket. Memory is bounded by the number of buckets (LOG_SUMMARY_MAX_BUCKETS),
+never by the file size.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+
+from .tabular_reader import cell_text, iter_table_rows
+from .timing import timed_phase
+
+_TIME_HINTS = ("time", "date")
+_EPOCH = datetime(1970, 1, 1)
+_TIME_FORMATS = ("%Y/%m/%d %H:%M:%S", "%Y/%m/%d %H:%M", "%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M")
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if not isinstance(value, str) or not value.strip():
+        return None
+    text = value.strip()
+    try:
+        return datetime.fromisoformat(text).replace(tzinfo=None)
+    except ValueError:
+        pass
+    for fmt in _TIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _as_float(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _bucket(ts: datetime, window_minutes: int) -> datetime:
+    minutes = (ts - _EPOCH) // timedelta(minutes=1)
+    return _EPOCH + timedelta(minutes=minutes - minutes % window_minutes)
+
+
+@timed_phase("io")
+def summarize_log_file(
+    file_path: str,
+    window_minutes: Optional[int] = None,
+    max_buckets: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    回傳 {total_rows, time_column, window_minutes, numeric_columns, summary_rows,
+          raw_samples, truncated, error}
+    summary_rows: [{"time_bucket": "YYYY-mm-dd HH:MM", <col>: avg, ...}]，依時間排序
+    """
+    cfg = current_app.config
+    window_minutes = window_minutes or cfg["LOG_SUMMARY_WINDOW_MINUTES"]
+    max_buckets = max_buckets or cfg["LOG_SUMMARY_MAX_BUCKETS"]
+    sample_rows = cfg["LOG_SUMMARY_SAMPLE_ROWS"]
+
+    result: Dict[str, Any] = dict(
+        total_rows=0,
+        time_column=None,
+        window_minutes=window_minutes,
+        numeric_columns=[],
+        summary_rows=[],
+        raw_samples=[],
+        truncated=False,
+        error=None,
+    )
+
+    header: List[str] = []
+    time_idx: Optional[int] = None
+    numeric_ok: List[int] = []
+    numeric_bad: List[int] = []
+    buckets: Dict[datetime, List[List[float]]] = {}   # bucket -> [sums, counts]
+
+    try:
+        for row in iter_table_rows(file_path):
+            if not header:
+                if all(_is_blank(v) for v in row):
+                    continue
+                header = [cell_text(v) or f"col{i + 1}" for i, v in enumerate(row)]
+                numeric_ok = [0] * len(header)
+                numeric_bad = [0] * len(header)
+                time_idx = next(
+                    (i for i, name in enumerate(header) if any(h in name.lower() for h in _TIME_HINTS)),
+                    None,
+                )
+                continue
+
+            if all(_is_blank(v) for v in row):
+                continue
+            result["total_rows"] += 1
+            if len(result["raw_samples"]) < sample_rows:
+                result["raw_samples"].append({name: cell_text(v) for name, v in zip(header, row)})
+
+            if time_idx is None and result["total_rows"] == 1 and row and _as_datetime(row[0]):
+                time_idx = 0
+
+            values = [None] * len(header)
+            for i, v in enumerate(row[:len(header)]):
+                if i == time_idx or _is_blank(v):
+                    continue
+                num = _as_float(v)
+                if num is None:
+                    numeric_bad[i] += 1
+                else:
+                    numeric_ok[i] += 1
+                    values[i] = num
+
+            ts = _as_datetime(row[time_idx]) if time_idx is not None and time_idx < len(row) else None
+            if ts is None:
+                continue
+            key = _bucket(ts, window_minutes)
+            acc = buckets.get(key)
+            if acc is None:
+                if len(buckets) >= max_buckets:
+                    result["truncated"] = True
+                    continue
+                acc = buckets[key] = [[0.0] * len(header), [0] * len(header)]
+            sums, counts = acc
+            for i, num in enumerate(values):
+                if num is not None:
+                    sums[i] += num
+                    counts[i] += 1
+    except Exception as e:
+        current_app.logger.warning("[summarize_log_file] %s: %s", file_path, e)
+        result["error"] = f"無法完整解析檔案：{e}"
+
+    if time_idx is None:
+        return result
+
+    numeric = [i for i in range(len(header)) if i != time_idx and numeric_ok[i] and not numeric_bad[i]]
+    result["time_column"] = header[time_idx]
+    result["numeric_columns"] = [header[i] for i in numeric]
+    for key in sorted(buckets):
+        sums, counts = buckets[key]
+        row = {"time_bucket": key.strftime("%Y-%m-%d %H:%M")}
+        for i in numeric:
+            row[header[i]] = round(sums[i] / counts[i], 3) if counts[i] else ""
+        result["summary_rows"].append(row)
+    return result
@@ -0,0 +1,127 @@
+"""Inspection parser throughput (`flask bench-parser`).
+
+Two corpora:
+  synthetic  generated *_Inspection_Result_*.csv files in the field tool's
+             layout (comma / colon / whitespace lines, padded with a data
+             section longer than the parser's line budget);
+  real       inspection files already uploaded: blob-store files whose
+             logical name matches *_Inspection_Result_*, flat legacy files in
+             UPLOAD_FOLDER/Inspection, plus any paths given on the command line.
+
+Each corpus is parsed `repeat` times and the best pass is reported as
+files/sec and MB/sec (MB = bytes on disk / 1e6, whole files, even though the
+parser stops after `max_lines` lines — that is what bulk re-ingest reads).
+"""
+
+import glob
+import os
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional
+
+from flask import current_app
+
+from ..models import StoredFile
+from .inspection_parser import parse_inspection_path
+
+INSPECTION_GLOB = "*_Inspection_Result_*.csv"
+# StoredFile.filename LIKE (sqlite: "_" is a wildcard, close enough for a sample)
+INSPECTION_LIKE = "%_Inspection_Result_%.csv"
+
+
+@dataclass
+class BenchResult:
+    corpus: str
+    files: int
+    bytes: int
+    seconds: float
+
+    @property
+    def files_per_sec(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return dict(
+            corpus=self.corpus,
+            files=self.files,
+            bytes=self.bytes,
+            seconds=round(self.seconds, 4),
+            files_per_sec=round(self.files_per_sec, 1),
+            mb_per_sec=round(self.mb_per_sec, 2),
+        )
+
+
+def synthetic_inspection_text(i: int, data_lines: int = 300) -> str:
+    lines = [
+        "Inspection Details,Routine",
+        "Last Inspect: '2025-10-24 13:18:06'",
+        f"Serial Number,OEM-{i:06d}",
+        f"Vendor SN,VSN-{i:06d}",
+        "Model CDU-900",
+        "Part Number: PN-42",
+        f"Eth1,10.0.{i // 250 % 250}.{i % 250}",
+        "Eth2,-",
+        "System Software,1.2.3",
+        "Control Firmware,4.5",
+        "",
+        "Timestamp,Supply Temp,Return Temp,Flow,Pressure",
+    ]
+    lines += [f"2025-10-24 13:{n // 60 % 60:02d}:{n % 60:02d},{20 + n % 7}.5,{30 + n % 5}.1,{n % 90},{n % 13}.0"
+              for n in range(data_lines)]
+    return "\r\n".join(lines) + "\r\n"
+
+
+def write_synthetic_corpus(folder: str, count: int, data_lines: int = 300) -> List[str]:
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"OEM-{i:06d}_Inspection_Result_20251024_{i:06d}.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(synthetic_inspection_text(i, data_lines))
+        paths.append(path)
+    return paths
+
+
+def real_inspection_paths(extra: Iterable[str] = (), limit: Optional[int] = None) -> List[str]:
+    """Uploaded inspection files (blob store + flat legacy folder) and `extra` files / folders."""
+    from .blob_store import blob_path
+
+    paths = []
+    for path in extra:
+        if os.path.isdir(path):
+            paths += sorted(glob.glob(os.path.join(path, "**", INSPECTION_GLOB), recursive=True))
+        elif os.path.isfile(path):
+            paths.append(path)
+
+    rows = StoredFile.query.filter(
+        StoredFile.category == "inspection",
+        StoredFile.filename.like(INSPECTION_LIKE),
+    ).order_by(StoredFile.id.asc())
+    paths += [p for p in (blob_path(row.sha256) for row in rows) if os.path.exists(p)]
+
+    legacy_folder = os.path.join(current_app.config["UPLOAD_FOLDER"], "Inspection")
+    paths += sorted(glob.glob(os.path.join(legacy_folder, INSPECTION_GLOB)))
+
+    paths = list(dict.fromkeys(paths))
+    return paths[:limit] if limit else paths
+
+
+def benchmark_parser(
+    corpus: str,
+    paths: List[str],
+    repeat: int = 3,
+    parse: Callable[[str], dict] = parse_inspection_path,
+) -> BenchResult:
+    """Best of `repeat` passes over `paths` (the first pass also warms the OS page cache)."""
+    size = sum(os.path.getsize(p) for p in paths)
+    best = float("inf")
+    for _ in range(max(repeat, 1)):
+        started = perf_counter()
+        for path in paths:
+            parse(path)
+        best = min(best, perf_counter() - started)
+    return BenchResult(corpus=corpus, files=len(paths), bytes=size, seconds=best if paths else 0.0)
@@ -0,0 +1,137 @@
+"""Read API for integrations: case scenes, rooms, equipment (JSON).
+
+Keyset pagination on the primary key: a page is `WHERE id > :after ORDER BY id
+LIMIT n+1`, so page 1000 costs the same index range scan as page 1 (no
+OFFSET). `next_after` is the last id of the page, None on the last page.
+
+Sparse fieldsets: `fields` names the columns to return; only those columns
+(and the joins they need) end up in the SELECT. `id` is always included,
+it is the cursor. Equipment filters follow `EquipmentQuery` (q = FTS match,
+type_id) plus room_id / case_scene_id.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import select
+
+from ..domain import EquipmentQuery
+from ..extensions import db
+from ..models import CaseScene, EquipmentInfo, EquipmentType, Room
+from .search_service import fts_query, match_equipment_ids
+from .tree_service import _name_like
+
+# field name -> (column expression, join it needs | None)
+FieldMap = Dict[str, Tuple[Any, Optional[str]]]
+
+CASE_SCENE_FIELDS: FieldMap = {
+    "id": (CaseScene.id, None),
+    "country": (CaseScene.country, None),
+    "location": (CaseScene.location, None),
+    "name": (CaseScene.country + "(" + CaseScene.location + ")", None),
+}
+
+ROOM_FIELDS: FieldMap = {
+    "id": (Room.id, None),
+    "name": (Room.room_name, None),
+    "case_scene_id": (Room.case_scene_id, None),
+}
+
+EQUIPMENT_FIELDS: FieldMap = {
+    "id": (EquipmentInfo.id, None),
+    "vendor_sn": (EquipmentInfo.vendor_sn, None),
+    "oem_sn": (EquipmentInfo.oem_sn, None),
+    "macaddr": (EquipmentInfo.macaddr, None),
+    "ats": (EquipmentInfo.ats, None),
+    "firmware": (EquipmentInfo.firmware, None),
+    "room_id": (EquipmentInfo.room_id, None),
+    "equipment_type_id": (EquipmentInfo.equipment_type_id, None),
+    "case_scene_id": (Room.case_scene_id, "room"),
+    "equipment_type": (EquipmentType.name, "equipment_type"),
+}
+
+_JOINS: Dict[str, Callable] = {
+    "room": lambda stmt: stmt.outerjoin(Room, Room.id == EquipmentInfo.room_id),
+    "equipment_type": lambda stmt: stmt.outerjoin(
+        EquipmentType, EquipmentType.id == EquipmentInfo.equipment_type_id
+    ),
+}
+
+
+def parse_fields(raw: str | None, available: FieldMap) -> List[str]:
+    """"vendor_sn,room_id" -> ["id", "vendor_sn", "room_id"]; None / "" -> all fields."""
+    names = [f.strip() for f in (raw or "").split(",") if f.strip()]
+    if not names:
+        return list(available)
+
+    unknown = [f for f in names if f not in available]
+    if unknown:
+        raise ValueError(f"未知的 fields：{', '.join(unknown)}（可用：{', '.join(available)}）")
+    return ["id"] + [f for f in dict.fromkeys(names) if f != "id"]
+
+
+def _page_size(limit: int | None) -> int:
+    cfg = current_app.config
+    if not limit or limit <= 0:
+        return cfg["API_PAGE_SIZE"]
+    return min(limit, cfg["API_PAGE_MAX"])
+
+
+def _page(model, available: FieldMap, fields: str | None, where: list,
+          after: int | None, limit: int | None) -> Dict[str, Any]:
+    names = parse_fields(fields, available)
+    size = _page_size(limit)
+
+    stmt = select(*[available[n][0].label(n) for n in names]).select_from(model)
+    for join in dict.fromkeys(available[n][1] for n in names):
+        if join:
+            stmt = _JOINS[join](stmt)
+    if after:
+        where = [*where, model.id > after]
+    stmt = stmt.where(*where).order_by(model.id.asc()).limit(size + 1)
+
+    rows = db.session.execute(stmt).all()
+    has_more = len(rows) > size
+    rows = rows[:size]
+    return dict(
+        fields=names,
+        items=[dict(row._mapping) for row in rows],
+        next_after=(rows[-1].id if has_more else None),
+    )
+
+
+def read_case_scenes(fields: str | None = None, q: str | None = None,
+                     after: int | None = None, limit: int | None = None) -> Dict[str, Any]:
+    where = []
+    like = _name_like(q)
+    if like:
+        where.append(CASE_SCENE_FIELDS["name"][0].ilike(like))
+    return _page(CaseScene, CASE_SCENE_FIELDS, fields, where, after, limit)
+
+
+def read_rooms(fields: str | None = None, case_scene_id: int | None = None, q: str | None = None,
+               after: int | None = None, limit: int | None = None) -> Dict[str, Any]:
+    where = []
+    if case_scene_id:
+        where.append(Room.case_scene_id == case_scene_id)
+    like = _name_like(q)
+    if like:
+        where.append(Room.room_name.ilike(like))
+    return _page(Room, ROOM_FIELDS, fields, where, after, limit)
+
+
+def read_equipment(query: EquipmentQuery, fields: str | None = None,
+                   room_id: int | None = None, case_scene_id: int | None = None,
+                   after: int | None = None, limit: int | None = None) -> Dict[str, Any]:
+    where = []
+    if room_id:
+        where.append(EquipmentInfo.room_id == room_id)
+    if case_scene_id:
+        where.append(EquipmentInfo.room_id.in_(
+            select(Room.id).where(Room.case_scene_id == case_scene_id)
+        ))
+    if fts_query(query.q):
+        where.append(EquipmentInfo.id.in_(match_equipment_ids(query.q)))
+    if query.type_id:
+        where.append(EquipmentInfo.equipment_type_id == query.type_id)
+    return _page(EquipmentInfo, EQUIPMENT_FIELDS, fields, where, after, limit)
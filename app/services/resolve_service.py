@@ -0,0 +1,121 @@
+"""Bulk identifier resolve: SN / MAC -> equipment, room, case.
+
+For sync jobs that need to map thousands of identifiers at once. Inputs are
+deduplicated and looked up in chunks with set-based queries:
+  - vendor / OEM SN: exact `IN (...)` on the unique SN indexes;
+  - MAC: identifiers left over are normalised (upper-case, separators
+    stripped) and matched against the `ix_equipment_mac_normalized`
+    expression index, so "aa-bb-cc-..." finds "AA:BB:CC:...".
+Every query selects plain columns with the room / case joined in, so the cost
+is a handful of index probes per chunk regardless of fleet size.
+"""
+
+from typing import Any, Dict, Iterable, List
+
+from flask import current_app
+from sqlalchemy import literal_column, or_
+
+from ..extensions import db
+from ..models import CaseScene, EquipmentInfo, Room
+from .search_service import MAC_NORMALIZED_SQL, normalize_identifier
+
+_COLUMNS = (
+    EquipmentInfo.id,
+    EquipmentInfo.vendor_sn,
+    EquipmentInfo.oem_sn,
+    EquipmentInfo.macaddr,
+    EquipmentInfo.room_id,
+    Room.room_name,
+    Room.case_scene_id,
+    CaseScene.country,
+    CaseScene.location,
+)
+
+
+def _chunks(values: List[str], size: int) -> Iterable[List[str]]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _select(*where):
+    return (
+        db.session.query(*_COLUMNS)
+        .outerjoin(Room, Room.id == EquipmentInfo.room_id)
+        .outerjoin(CaseScene, CaseScene.id == Room.case_scene_id)
+        .filter(*where)
+    )
+
+
+def _match(identifier: str, field: str, row) -> Dict[str, Any]:
+    return dict(
+        identifier=identifier,
+        matched_field=field,
+        equipment_id=row.id,
+        vendor_sn=row.vendor_sn,
+        oem_sn=row.oem_sn,
+        macaddr=row.macaddr,
+        room_id=row.room_id,
+        room_name=row.room_name,
+        case_scene_id=row.case_scene_id,
+        case_name=f"{row.country}({row.location})" if row.country is not None else None,
+    )
+
+
+def parse_identifiers(values) -> List[str]:
+    """Validate the request list: strings, stripped, deduplicated (order kept)."""
+    if not isinstance(values, list):
+        raise ValueError("identifiers 必須是字串陣列")
+    limit = current_app.config["RESOLVE_MAX_IDENTIFIERS"]
+    if len(values) > limit:
+        raise ValueError(f"一次最多 {limit} 筆 identifiers")
+
+    out = {}
+    for v in values:
+        if not isinstance(v, (str, int)):
+            raise ValueError("identifiers 必須是字串陣列")
+        v = str(v).strip()
+        if v:
+            out.setdefault(v, None)
+    return list(out)
+
+
+def resolve_identifiers(identifiers: List[str]) -> Dict[str, Any]:
+    """
+    回傳 {matches: [{identifier, matched_field, equipment_id, vendor_sn, oem_sn,
+                    macaddr, room_id, room_name, case_scene_id, case_name}],
+          misses: [identifier]}
+    matches / misses 依輸入順序；一個 identifier 可能對到多台設備（例如同時是
+    某台的 vendor SN 與另一台的 OEM SN）。
+    """
+    size = current_app.config["RESOLVE_CHUNK_SIZE"]
+    found: Dict[str, List[Dict[str, Any]]] = {}
+
+    for chunk in _chunks(identifiers, size):
+        wanted = set(chunk)
+        for row in _select(or_(EquipmentInfo.vendor_sn.in_(chunk), EquipmentInfo.oem_sn.in_(chunk))):
+            for field in ("vendor_sn", "oem_sn"):
+                value = getattr(row, field)
+                if value in wanted:
+                    found.setdefault(value, []).append(_match(value, field, row))
+
+    # 剩下的當作 MAC（格式不拘）
+    by_mac: Dict[str, List[str]] = {}
+    for ident in identifiers:
+        if ident not in found:
+            norm = normalize_identifier(ident)
+            if norm:
+                by_mac.setdefault(norm, []).append(ident)
+
+    mac_expr = literal_column(MAC_NORMALIZED_SQL)
+    for chunk in _chunks(list(by_mac), size):
+        for row in _select(mac_expr.in_(chunk)).add_columns(mac_expr.label("mac_normalized")):
+            for ident in by_mac.get(row.mac_normalized, ()):
+                found.setdefault(ident, []).append(_match(ident, "macaddr", row))
+
+    matches, misses = [], []
+    for ident in identifiers:
+        if ident in found:
+            matches.extend(found[ident])
+        else:
+            misses.append(ident)
+    return dict(matches=matches, misses=misses)
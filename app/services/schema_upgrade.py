@@ -0,0 +1,83 @@
+"""Bring an existing database up to the current models.
+
+`db.create_all()` only creates missing tables: columns added to a model later
+(e.g. `ingest_jobs.duplicate`) and indexes added to existing tables (the FK /
+lookup indexes in models/_legacy.py) never reach a database created by an
+older version. `upgrade_schema()` fills that gap, idempotently:
+
+  - ALTER TABLE ... ADD COLUMN for model columns the table lacks (NOT NULL
+    columns get their scalar default as SQL DEFAULT; columns SQLite cannot
+    add — primary key / unique / NOT NULL without default — are reported);
+  - CREATE INDEX for every model index that does not exist yet;
+  - ANALYZE when an index was created, so the planner has statistics.
+
+Runs at startup (create_app) and as `flask upgrade-db`.
+"""
+
+from typing import Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import inspect, literal
+from sqlalchemy.schema import Column, CreateColumn
+
+from ..extensions import db
+
+
+def _add_column_ddl(table_name: str, col: Column, dialect) -> Optional[str]:
+    if col.primary_key or col.unique:
+        return None
+
+    ddl = str(CreateColumn(col).compile(dialect=dialect))
+    if not col.nullable and col.server_default is None:
+        default = col.default.arg if col.default is not None and col.default.is_scalar else None
+        if default is None:
+            return None
+        value = literal(default, col.type).compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+        ddl += f" DEFAULT {value}"
+    return f'ALTER TABLE "{table_name}" ADD COLUMN {ddl}'
+
+
+def _index_names(conn, table_name: str) -> set:
+    # sqlite_master, not the inspector: reflection skips expression indexes (with a warning each start)
+    rows = conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table_name,)
+    )
+    return {name for (name,) in rows}
+
+
+def upgrade_schema() -> Dict[str, List[str]]:
+    """
+    回傳 {columns: ["table.col"], indexes: ["ix_..."], skipped: ["table.col"]}
+    全部空 = 已是最新
+    """
+    out: Dict[str, List[str]] = dict(columns=[], indexes=[], skipped=[])
+
+    with db.engine.begin() as conn:
+        insp = inspect(conn)
+        for table in db.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing:
+                    continue
+                ddl = _add_column_ddl(table.name, col, conn.dialect)
+                if ddl is None:
+                    out["skipped"].append(f"{table.name}.{col.name}")
+                    continue
+                conn.exec_driver_sql(ddl)
+                out["columns"].append(f"{table.name}.{col.name}")
+
+            indexes = _index_names(conn, table.name)
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
+                    out["indexes"].append(index.name)
+
+        if out["indexes"]:
+            conn.exec_driver_sql("ANALYZE")
+
+    if any(out.values()):
+        current_app.logger.warning("[upgrade_schema] %s", out)
+    return out
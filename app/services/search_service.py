@@ -0,0 +1,327 @@
+"""Fleet-wide equipment search (SQLite FTS5).
+
+`equipment_fts` holds one row per EquipmentInfo (rowid = equipment id) with
+vendor SN, OEM SN, MAC, ATS, firmware, room name and case name. SQLite
+triggers keep it in sync on every insert / update / delete of equipment and
+on room / case renames, so no service has to remember to update it.
+
+Queries are tokenised like the index (unicode61: "OEM-0001" -> "oem" "0001");
+every term is a prefix match and all terms must match. Results are ranked by
+bm25 with SN columns weighted highest.
+
+`equipment_trigram` is the typo-tolerant side (FTS5 `trigram` tokenizer) over
+normalised SN / MAC values (upper-case, separators stripped), maintained by
+the same kind of triggers. A lookup ORs the query's trigrams, lets SQLite pick
+the best candidates by bm25 and only re-scores those few with trigram Jaccard
+similarity (same measure as pg_trgm), so no row is scored in Python unless it
+already shares trigrams with the query.
+"""
+
+import re
+from typing import Any, Dict, List
+
+from flask import current_app
+from sqlalchemy import Integer, column, text
+
+from ..extensions import db
+from ..models import EquipmentInfo
+from .loading import equipment_list_options
+
+FTS_TABLE = "equipment_fts"
+
+# bm25 weights, same order as the FTS columns
+_FTS_COLUMNS = ("vendor_sn", "oem_sn", "macaddr", "ats", "firmware", "room_name", "case_name")
+_WEIGHTS = (10.0, 10.0, 8.0, 4.0, 1.0, 2.0, 2.0)
+
+_ROW_SELECT = """
+    SELECT e.id, e.vendor_sn, e.oem_sn, e.macaddr, e.ats, e.firmware,
+           r.room_name, cs.country || '(' || cs.location || ')'
+    FROM equipment_info e
+    LEFT JOIN rooms r ON r.id = e.room_id
+    LEFT JOIN case_scene cs ON cs.id = r.case_scene_id
+"""
+
+_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {", ".join(_FTS_COLUMNS)},
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3 4'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS equipment_fts_ai AFTER INSERT ON equipment_info BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {", ".join(_FTS_COLUMNS)})
+        {_ROW_SELECT} WHERE e.id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS equipment_fts_au AFTER UPDATE ON equipment_info BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, {", ".join(_FTS_COLUMNS)})
+        {_ROW_SELECT} WHERE e.id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS equipment_fts_ad AFTER DELETE ON equipment_info BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS equipment_fts_room_au AFTER UPDATE OF room_name ON rooms BEGIN
+        UPDATE {FTS_TABLE} SET room_name = new.room_name
+        WHERE rowid IN (SELECT id FROM equipment_info WHERE room_id = new.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS equipment_fts_case_au AFTER UPDATE OF country, location ON case_scene BEGIN
+        UPDATE {FTS_TABLE} SET case_name = new.country || '(' || new.location || ')'
+        WHERE rowid IN (
+            SELECT e.id FROM equipment_info e JOIN rooms r ON r.id = e.room_id
+            WHERE r.case_scene_id = new.id
+        );
+    END
+    """,
+]
+
+
+TRIGRAM_TABLE = "equipment_trigram"
+_TRIGRAM_COLUMNS = ("vendor_sn", "oem_sn", "macaddr")
+_SEPARATORS = (":", "-", ".", " ", "_", "/")
+
+
+def _sql_normalize(expr: str) -> str:
+    for sep in _SEPARATORS:
+        expr = f"replace({expr}, '{sep}', '')"
+    return f"upper({expr})"
+
+
+# normalised MAC (expression index, used by resolve_service for exact lookups)
+MAC_NORMALIZED_SQL = _sql_normalize("macaddr")
+
+_TRIGRAM_SELECT = f"""
+    SELECT e.id, {_sql_normalize("e.vendor_sn")}, {_sql_normalize("e.oem_sn")},
+           {_sql_normalize("coalesce(e.macaddr, '')")}
+    FROM equipment_info e
+"""
+
+_TRIGRAM_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TRIGRAM_TABLE} USING fts5(
+        {", ".join(_TRIGRAM_COLUMNS)},
+        tokenize = 'trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS equipment_trigram_ai AFTER INSERT ON equipment_info BEGIN
+        INSERT INTO {TRIGRAM_TABLE}(rowid, {", ".join(_TRIGRAM_COLUMNS)})
+        {_TRIGRAM_SELECT} WHERE e.id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS equipment_trigram_au
+    AFTER UPDATE OF vendor_sn, oem_sn, macaddr ON equipment_info BEGIN
+        DELETE FROM {TRIGRAM_TABLE} WHERE rowid = old.id;
+        INSERT INTO {TRIGRAM_TABLE}(rowid, {", ".join(_TRIGRAM_COLUMNS)})
+        {_TRIGRAM_SELECT} WHERE e.id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS equipment_trigram_ad AFTER DELETE ON equipment_info BEGIN
+        DELETE FROM {TRIGRAM_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"CREATE INDEX IF NOT EXISTS ix_equipment_mac_normalized ON equipment_info ({MAC_NORMALIZED_SQL})",
+]
+
+# table -> (DDL, back-fill SELECT, columns)
+_INDEXES = {
+    FTS_TABLE: (_SCHEMA, _ROW_SELECT, _FTS_COLUMNS),
+    TRIGRAM_TABLE: (_TRIGRAM_SCHEMA, _TRIGRAM_SELECT, _TRIGRAM_COLUMNS),
+}
+
+
+def ensure_search_index() -> list:
+    """
+    Create the FTS tables + triggers if missing (startup). A newly created
+    index is back-filled from equipment_info. Returns the tables (re)built.
+    """
+    built = []
+    for table, (ddl_list, _, _) in _INDEXES.items():
+        exists = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": table}
+        ).first()
+        for ddl in ddl_list:
+            db.session.execute(text(ddl))
+        if not exists:
+            _rebuild(table)
+            built.append(table)
+    db.session.commit()
+    return built
+
+
+def _rebuild(table: str) -> None:
+    _, select_sql, columns = _INDEXES[table]
+    db.session.execute(text(f"DELETE FROM {table}"))
+    db.session.execute(text(f"INSERT INTO {table}(rowid, {', '.join(columns)}) {select_sql}"))
+
+
+def rebuild_search_index() -> None:
+    """Re-fill both indexes from equipment_info (caller commits)."""
+    for table in _INDEXES:
+        _rebuild(table)
+
+
+def fts_query(q: str) -> str:
+    """User input -> FTS5 MATCH expression ('' when nothing searchable)."""
+    terms = re.findall(r'[^\s"]+', q or "")
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def match_equipment_ids(q: str):
+    """Subquery of matching equipment ids (for `EquipmentInfo.id.in_(...)`); none when nothing searchable."""
+    fts_q = fts_query(q)
+    if not fts_q:
+        # MATCH '' is an FTS5 syntax error
+        return text(f"SELECT rowid FROM {FTS_TABLE} WHERE 0").columns(column("rowid", Integer))
+    return (
+        text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_q")
+        .bindparams(fts_q=fts_q)
+        .columns(column("rowid", Integer))
+    )
+
+
+def _equipment_rows(ids) -> Dict[int, EquipmentInfo]:
+    return {
+        e.id: e
+        for e in EquipmentInfo.query
+        .options(*equipment_list_options())
+        .filter(EquipmentInfo.id.in_(list(ids)))
+    }
+
+
+def _equipment_dict(e: EquipmentInfo) -> Dict[str, Any]:
+    room = e.room
+    cs = room.case_scene if room else None
+    return dict(
+        id=e.id,
+        vendor_sn=e.vendor_sn,
+        oem_sn=e.oem_sn,
+        macaddr=e.macaddr,
+        ats=e.ats,
+        firmware=e.firmware,
+        room_id=room.id if room else None,
+        room_name=room.room_name if room else None,
+        case_scene_id=cs.id if cs else None,
+        case_name=f"{cs.country}({cs.location})" if cs else None,
+        equipment_type=e.equipment_type.name if e.equipment_type else None,
+    )
+
+
+def search_equipments(q: str, limit: int | None = None) -> List[Dict[str, Any]]:
+    """
+    回傳依 bm25 排序的設備：
+      [{id, vendor_sn, oem_sn, macaddr, ats, firmware, room_id, room_name,
+        case_scene_id, case_name, equipment_type, score}, ...]
+    """
+    match = fts_query(q)
+    if not match:
+        return []
+
+    limit = min(limit or current_app.config["SEARCH_PAGE_SIZE"], current_app.config["SEARCH_PAGE_MAX"])
+    weights = ", ".join(str(w) for w in _WEIGHTS)
+    hits = db.session.execute(
+        text(
+            f"SELECT rowid, bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH :q ORDER BY score LIMIT :limit"
+        ),
+        {"q": match, "limit": limit},
+    ).all()
+    if not hits:
+        return []
+
+    equipments = _equipment_rows(h.rowid for h in hits)
+
+    out = []
+    for h in hits:
+        e = equipments.get(h.rowid)
+        if e is None:
+            continue
+        # bm25: smaller is better -> expose as "higher is better"
+        out.append(dict(_equipment_dict(e), score=round(-h.score, 4)))
+    return out
+
+
+def normalize_identifier(value: str | None) -> str:
+    """SN / MAC as indexed: upper-case, separators stripped."""
+    value = (value or "").upper()
+    for sep in _SEPARATORS:
+        value = value.replace(sep, "")
+    return value
+
+
+def _fts_phrase(value: str) -> str:
+    # FTS5 string: an embedded `"` is written as `""`
+    return '"' + value.replace('"', '""') + '"'
+
+
+def trigrams(value: str) -> set:
+    value = value.lower()
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    """Trigram Jaccard similarity of two normalised identifiers (0..1)."""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    shared = len(ta & tb)
+    return shared / (len(ta) + len(tb) - shared)
+
+
+def similar_equipments(q: str, k: int | None = None) -> List[Dict[str, Any]]:
+    """
+    Typo-tolerant SN / MAC lookup, best first:
+      [{...equipment..., similarity, matched_field, matched_value}, ...]
+    Only candidates sharing trigrams with `q` (top by bm25) are re-scored.
+    """
+    cfg = current_app.config
+    needle = normalize_identifier(q)
+    grams = trigrams(needle)
+    if not grams:
+        return []
+
+    k = min(k or cfg["TRIGRAM_TOP_K"], cfg["SEARCH_PAGE_MAX"])
+    match = " OR ".join(_fts_phrase(g) for g in sorted(grams))
+    candidates = db.session.execute(
+        text(
+            f"SELECT rowid, {', '.join(_TRIGRAM_COLUMNS)} FROM {TRIGRAM_TABLE} "
+            f"WHERE {TRIGRAM_TABLE} MATCH :q ORDER BY bm25({TRIGRAM_TABLE}) LIMIT :limit"
+        ),
+        {"q": match, "limit": k * cfg["TRIGRAM_CANDIDATES_PER_RESULT"]},
+    ).all()
+
+    scored = []
+    for row in candidates:
+        best = max(
+            ((similarity(needle, row[i + 1] or ""), field) for i, field in enumerate(_TRIGRAM_COLUMNS)),
+            key=lambda x: x[0],
+        )
+        if best[0] >= cfg["TRIGRAM_MIN_SIMILARITY"]:
+            scored.append((best[0], best[1], row.rowid))
+    scored.sort(key=lambda x: (-x[0], x[2]))
+    scored = scored[:k]
+
+    equipments = _equipment_rows(rowid for _, _, rowid in scored)
+    out = []
+    for sim, field, rowid in scored:
+        e = equipments.get(rowid)
+        if e is None:
+            continue
+        out.append(dict(
+            _equipment_dict(e),
+            similarity=round(sim, 4),
+            matched_field=field,
+            matched_value=getattr(e, field),
+        ))
+    return out
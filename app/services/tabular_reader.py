@@ -0,0 +1,86 @@
+"""Row-by-row readers for uploaded tables (CSV / TXT / LOG and XLSX).
+
+XLSX goes through openpyxl's read-only mode: the sheet XML is streamed and
+each row is yielded as it is parsed, so a large vendor workbook never sits in
+memory as a whole (only shared strings / styles do). Blob-store files carry
+no extension, so the format is decided from the content (zip magic + the
+workbook part), not the name.
+"""
+
+import csv
+import zipfile
+from datetime import date, datetime, time
+from typing import Any, Iterator, List, Optional, Sequence
+
+from openpyxl import load_workbook
+
+XLSX_MAGIC = b"PK\x03\x04"
+TEXT_DELIMITERS = ",\t;|"
+SNIFF_BYTES = 8 * 1024
+
+
+def is_xlsx_file(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            if f.read(4) != XLSX_MAGIC:
+                return False
+        with zipfile.ZipFile(path) as zf:
+            return "xl/workbook.xml" in zf.namelist()
+    except (OSError, zipfile.BadZipFile):
+        return False
+
+
+def iter_xlsx_rows(path: str, max_rows: Optional[int] = None) -> Iterator[tuple]:
+    """Cell values of the first sheet, one tuple per row (read-only, streamed)."""
+    # file object, not the path: openpyxl refuses paths without an .xlsx suffix (blobs)
+    with open(path, "rb") as f:
+        wb = load_workbook(f, read_only=True, data_only=True)
+        try:
+            ws = wb.worksheets[0]
+            # 部分匯出工具寫的 <dimension> 不準（例如只寫 A1）：不信任它，整張讀到底
+            ws.reset_dimensions()
+            for i, row in enumerate(ws.iter_rows(values_only=True)):
+                if max_rows is not None and i >= max_rows:
+                    break
+                yield row
+        finally:
+            wb.close()
+
+
+def iter_text_rows(path: str, max_rows: Optional[int] = None) -> Iterator[List[str]]:
+    """CSV-like text rows; the delimiter is sniffed from the head of the file (default ',')."""
+    with open(path, "r", encoding="utf-8", errors="ignore", newline="") as f:
+        head = f.read(SNIFF_BYTES)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(head, delimiters=TEXT_DELIMITERS)
+        except csv.Error:
+            dialect = csv.excel
+        for i, row in enumerate(csv.reader(f, dialect)):
+            if max_rows is not None and i >= max_rows:
+                break
+            yield row
+
+
+def iter_table_rows(path: str, max_rows: Optional[int] = None) -> Iterator[Sequence[Any]]:
+    """XLSX rows carry typed values (datetime / float); text rows are strings."""
+    if is_xlsx_file(path):
+        return iter_xlsx_rows(path, max_rows=max_rows)
+    return iter_text_rows(path, max_rows=max_rows)
+
+
+def cell_text(value: Any) -> str:
+    """A cell as the text a CSV export of the sheet would contain."""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def text_row(row: Sequence[Any]) -> List[str]:
+    return [cell_text(v) for v in row]
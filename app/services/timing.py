@@ -0,0 +1,164 @@
+"""Per-request timing: Server-Timing header + one structured log line.
+
+Phases:
+  db    SQL statements (SQLAlchemy engine events)
+  tpl   Jinja render_template calls (Flask template signals)
+  io    file helpers decorated with @timed_phase("io") (parse / resolve / stat)
+  app   the rest of the request (total - db - tpl - io)
+
+Phases nest (a template touching a lazy relationship runs SQL, a file helper
+may query StoredFile); every frame records its *exclusive* time, so the phases
+add up to the request total instead of double counting.
+
+Switched by `SERVER_TIMING`. When off, no hooks are installed and
+`timed_phase` costs one `g` lookup per call.
+"""
+
+import json
+from functools import wraps
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from flask import before_render_template, current_app, g, has_app_context, request, template_rendered
+from sqlalchemy import event
+
+from ..extensions import db
+
+PHASES = ("db", "tpl", "io")
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = perf_counter()
+        self.durations: Dict[str, float] = {p: 0.0 for p in PHASES}
+        self.counts: Dict[str, int] = {p: 0 for p in PHASES}
+        # open frames: [phase, start, time spent in child frames]
+        self._stack: List[list] = []
+
+    def push(self, phase: str) -> None:
+        self._stack.append([phase, perf_counter(), 0.0])
+
+    def pop(self, phase: str) -> None:
+        if not any(frame[0] == phase for frame in self._stack):
+            return
+        # unwind to the matching frame (a failed statement may not have closed)
+        while self._stack:
+            name, start, children = self._stack.pop()
+            elapsed = perf_counter() - start
+            self.durations[name] += elapsed - children
+            self.counts[name] += 1
+            if self._stack:
+                self._stack[-1][2] += elapsed
+            if name == phase:
+                return
+
+    def summary(self) -> Dict[str, float]:
+        total = perf_counter() - self.started
+        out = {"total": total}
+        out.update(self.durations)
+        out["app"] = max(total - sum(self.durations.values()), 0.0)
+        return out
+
+
+def current_timing() -> Optional[RequestTiming]:
+    if not has_app_context():
+        return None
+    return g.get("request_timing")
+
+
+def timed_phase(phase: str):
+    """Decorator: count the call as `phase` of the current request (if timing is on)."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t = current_timing()
+            if t is None:
+                return fn(*args, **kwargs)
+            t.push(phase)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                t.pop(phase)
+        return wrapper
+    return deco
+
+
+def server_timing_header(summary: Dict[str, float], counts: Dict[str, int]) -> str:
+    parts = []
+    for name in ("db", "tpl", "io", "app", "total"):
+        entry = f"{name};dur={summary[name] * 1000:.1f}"
+        if name in counts:
+            entry += f';desc="{counts[name]}"'
+        parts.append(entry)
+    return ", ".join(parts)
+
+
+def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+    t = current_timing()
+    if t is not None:
+        t.push("db")
+
+
+def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+    t = current_timing()
+    if t is not None:
+        t.pop("db")
+
+
+def _on_db_error(exception_context):
+    t = current_timing()
+    if t is not None:
+        t.pop("db")
+
+
+def _before_render(sender, template, context, **extra):
+    t = current_timing()
+    if t is not None:
+        t.push("tpl")
+
+
+def _rendered(sender, template, context, **extra):
+    t = current_timing()
+    if t is not None:
+        t.pop("tpl")
+
+
+def init_timing(app) -> None:
+    """create_app hook: install the hooks only when SERVER_TIMING is on."""
+    if not app.config.get("SERVER_TIMING"):
+        return
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", _before_cursor)
+    event.listen(engine, "after_cursor_execute", _after_cursor)
+    event.listen(engine, "handle_error", _on_db_error)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+
+    @app.before_request
+    def _start_timing():
+        g.request_timing = RequestTiming()
+
+    @app.after_request
+    def _finish_timing(response):
+        t = g.pop("request_timing", None)
+        if t is None:
+            return response
+
+        summary = t.summary()
+        response.headers["Server-Timing"] = server_timing_header(summary, t.counts)
+
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            **{f"{k}_ms": round(v * 1000, 1) for k, v in summary.items()},
+            **{f"{k}_count": n for k, n in t.counts.items()},
+        }
+        slow = summary["total"] * 1000 >= current_app.config["SERVER_TIMING_SLOW_MS"]
+        # fast requests only at DEBUG: with SERVER_TIMING on, INFO would log every request
+        log = current_app.logger.warning if slow else current_app.logger.debug
+        log("[timing] %s", json.dumps(record, ensure_ascii=False))
+        return response
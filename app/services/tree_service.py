@@ -0,0 +1,76 @@
+"""Lazy sidebar tree (JSON).
+
+Base pages only ship the first page of case scenes; rooms of a case are
+fetched when its node is expanded. Both lists are keyset-paginated on id
+(`after` = last id of the previous page) and filterable by name.
+"""
+
+from typing import Any, Dict
+
+from flask import abort, current_app
+from ..extensions import db
+from ..models import CaseScene, Room
+from ._legacy import build_tree_items
+
+
+def _page_size(limit: int | None) -> int:
+    cfg = current_app.config
+    if not limit or limit <= 0:
+        return cfg["TREE_PAGE_SIZE"]
+    return min(limit, cfg["TREE_PAGE_MAX"])
+
+
+def _name_like(q: str | None) -> str | None:
+    q = (q or "").strip()
+    return f"%{q}%" if q else None
+
+
+def list_case_scenes(q: str | None = None, limit: int | None = None, after: int | None = None) -> Dict[str, Any]:
+    """
+    回傳 {items: [{id, name, room_count}], next_after}
+    next_after 為 None 表示沒有下一頁
+    """
+    size = _page_size(limit)
+    name = CaseScene.country + "(" + CaseScene.location + ")"
+
+    cs_q = db.session.query(CaseScene.id, name)
+    like = _name_like(q)
+    if like:
+        cs_q = cs_q.filter(name.ilike(like))
+    if after:
+        cs_q = cs_q.filter(CaseScene.id > after)
+    rows = cs_q.order_by(CaseScene.id.asc()).limit(size + 1).all()
+
+    has_more = len(rows) > size
+    rows = rows[:size]
+
+    # room 數：直接用已快取的 tree（不另外 COUNT）
+    room_counts = {cs["id"]: len(cs["rooms"]) for cs in build_tree_items()}
+
+    return dict(
+        items=[dict(id=cs_id, name=cs_name, room_count=room_counts.get(cs_id, 0)) for cs_id, cs_name in rows],
+        next_after=(rows[-1][0] if has_more else None),
+    )
+
+
+def list_case_rooms(case_scene_id: int, q: str | None = None, limit: int | None = None, after: int | None = None) -> Dict[str, Any]:
+    """回傳 {case_scene_id, items: [{id, name}], next_after}；case 不存在 -> 404"""
+    if db.session.get(CaseScene, case_scene_id) is None:
+        abort(404)
+
+    size = _page_size(limit)
+    room_q = db.session.query(Room.id, Room.room_name).filter(Room.case_scene_id == case_scene_id)
+    like = _name_like(q)
+    if like:
+        room_q = room_q.filter(Room.room_name.ilike(like))
+    if after:
+        room_q = room_q.filter(Room.id > after)
+    rows = room_q.order_by(Room.id.asc()).limit(size + 1).all()
+
+    has_more = len(rows) > size
+    rows = rows[:size]
+    return dict(
+        case_scene_id=case_scene_id,
+        items=[dict(id=room_id, name=room_name) for room_id, room_name in rows],
+        next_after=(rows[-1][0] if has_more else None),
+    )
@@ -0,0 +1,146 @@
+"""Multi-file batch upload.
+
+All files of a batch belong to one case/room. They are streamed to disk and
+parsed first; every file that passes validation is then upserted in a single
+transaction (one set-based equipment lookup, one commit, upload index rows
+included). The result reports success/failure per file.
+"""
+
+from typing import Any, Dict, List
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from ..extensions import db
+from ..models import EquipmentManage
+from .blob_store import discard_stored
+from .inspection_records import record_inspections
+from .upload_index import record_uploaded_files
+from ._legacy import (
+    classify_upload,
+    ensure_case_room,
+    get_log_equipment,
+    inspection_identity,
+    store_upload_file,
+    upsert_inspection_equipments,
+    validate_ext,
+    validate_upload_target,
+)
+
+
+def register_upload_batch(
+    files: List[Any],
+    country: str,
+    room: str,
+    file_category: str | None = None,
+    feedback_text: str | None = None,
+    equipment_type_id: int | None = None,
+    equipment_id: int | None = None,
+    auto_classify: bool = False,
+    max_files: int | None = None,
+) -> Dict[str, Any]:
+    """
+    auto_classify: 每個檔案依檔名各自分類（zip 壓縮檔內容），不套用 file_category
+
+    回傳 dict:
+      {country, room, succeeded, failed,
+       results: [{file, success, filename?, category?, equipment_id?, error?}, ...]}
+    """
+    file_category = (file_category or "inspection").strip().lower()
+    feedback_text = (feedback_text or "").strip()
+    country = (country or "").strip()
+    room = (room or "").strip()
+
+    files = [f for f in (files or []) if f and f.filename]
+    if not files:
+        raise ValueError("沒有選擇檔案")
+    max_files = max_files or current_app.config["UPLOAD_BATCH_MAX_FILES"]
+    if len(files) > max_files:
+        raise ValueError(f"一次最多上傳 {max_files} 個檔案")
+    if file_category == "feedback":
+        raise ValueError("Feedback 不支援批次上傳")
+
+    country_key = validate_upload_target(country, room, file_category, equipment_id)
+
+    results: List[Dict[str, Any]] = []
+    pending: List[Dict[str, Any]] = []   # stored + validated, waiting for DB
+
+    try:
+        cs, r = ensure_case_room(country_key, room)
+        log_equipment = None
+
+        # 1) stream + parse every file; per-file validation errors don't stop the batch
+        for f in files:
+            res = {"file": f.filename, "success": False}
+            results.append(res)
+            stored = None
+            try:
+                validate_ext(secure_filename(f.filename))
+                category = classify_upload(f.filename, None if auto_classify else file_category)
+                if category == "logs" and log_equipment is None:
+                    log_equipment = get_log_equipment(equipment_id)
+                stored, info = store_upload_file(f, category)
+                res.update(filename=stored.filename, category=category)
+
+                # identical content already uploaded: nothing to parse / upsert
+                if stored.is_duplicate:
+                    res.update(success=True, duplicate=True)
+                    continue
+
+                identity = inspection_identity(info) if category == "inspection" else None
+                pending.append(dict(res=res, stored=stored, category=category, identity=identity, info=info))
+            except ValueError as e:
+                discard_stored(stored)
+                res["error"] = str(e)
+
+        # 2) one set-based upsert for all inspections
+        inspections = [p for p in pending if p["category"] == "inspection"]
+        equipments = upsert_inspection_equipments([p["identity"] for p in inspections], r, equipment_type_id)
+        for p, eq in zip(inspections, equipments):
+            p["equipment"] = eq
+        record_inspections([
+            (p["stored"].filename, p["stored"].sha256, p["info"], p["equipment"].id, r.id, p["stored"].row.created_at)
+            for p in inspections
+        ])
+        for p in pending:
+            if p["category"] == "logs":
+                p["equipment"] = log_equipment
+
+        for p in pending:
+            eq = p.get("equipment")
+            if eq is not None:
+                db.session.add(EquipmentManage(
+                    equipment_info_id=eq.id,
+                    room_id=r.id,
+                    customer_changes=feedback_text or None,
+                ))
+                p["res"]["equipment_id"] = eq.id
+            p["res"]["success"] = True
+
+        record_uploaded_files(cs, r, [
+            (x["filename"], x["category"], x.get("equipment_id")) for x in results if x["success"]
+        ])
+
+        # 3) one commit for the whole batch (equipment + manage records + index)
+        db.session.commit()
+
+    except Exception:
+        db.session.rollback()
+        for p in pending:
+            discard_stored(p["stored"])
+        raise
+
+    stored_names = [x["filename"] for x in results if x["success"]]
+
+    current_app.logger.warning(
+        "[register_upload_batch] cs_id=%s room_id=%s files=%s ok=%s failed=%s",
+        cs.id, r.id, len(files), len(stored_names), len(files) - len(stored_names),
+    )
+
+    return dict(
+        country=country_key,
+        room=room,
+        succeeded=len(stored_names),
+        failed=len(files) - len(stored_names),
+        results=results,
+    )
@@ -0,0 +1,189 @@
+"""Upload index: which files were uploaded to which case / room.
+
+Backed by the `UploadedFile` table (replaces `instance/uploaded_items.json`,
+which `import_uploaded_items_json` imports once at startup). Room pages read
+only their own rows via `room_uploaded_files`; `load_uploaded_items` builds
+the full nested {case_key: {room: [filenames]}} shape (no page needs it).
+
+Multi-worker safety:
+  - writes are `INSERT ... ON CONFLICT DO NOTHING` on (room_id, filename), so
+    two workers registering the same file never fail or lose an entry;
+  - readers query the table, so a write in any worker is seen by all;
+  - the one-time JSON import runs under an OS file lock.
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..extensions import db
+from ..models import CaseScene, Room, StoredFile, UploadedFile
+from .blob_store import LEGACY_DIRS
+from .data_version import STATS, bump_data_version, bump_room_versions
+
+LEGACY_INDEX = "uploaded_items.json"
+
+# (filename, category, equipment_id)
+IndexEntry = Tuple[str, str, Optional[int]]
+
+
+def record_uploaded_files(cs: CaseScene, room: Room, entries: Iterable[IndexEntry]) -> int:
+    """
+    Add index rows for a room; names already listed there are skipped (also
+    when another worker inserts them concurrently). The caller commits.
+    Returns the number of new rows.
+    """
+    rows = [
+        dict(
+            case_scene_id=cs.id,
+            room_id=room.id,
+            category=category,
+            filename=filename,
+            equipment_id=equipment_id,
+        )
+        for filename, category, equipment_id in entries
+    ]
+    if not rows:
+        return 0
+
+    stmt = sqlite_insert(UploadedFile.__table__).on_conflict_do_nothing(index_elements=["room_id", "filename"])
+    added = db.session.connection().execute(stmt, rows).rowcount
+    if added:
+        bump_data_version(STATS)
+        bump_room_versions([(room.id, cs.id)])
+    return added
+
+
+def room_uploaded_files(room_id: int, category: str | None = None) -> List[str]:
+    """Filenames uploaded to one room, in upload order."""
+    q = db.session.query(UploadedFile.filename).filter(UploadedFile.room_id == room_id)
+    if category:
+        q = q.filter(UploadedFile.category == category)
+    return [name for (name,) in q.order_by(UploadedFile.id.asc())]
+
+
+def load_uploaded_items() -> Dict[str, Dict[str, List[str]]]:
+    """Whole index as the old JSON shape: {"USA(Quincy)": {"R1": [filenames]}}."""
+    items: Dict[str, Dict[str, List[str]]] = {}
+    keys = {}
+    for cs in CaseScene.query.order_by(CaseScene.id.asc()):
+        keys[cs.id] = f"{cs.country}({cs.location})"
+        items.setdefault(keys[cs.id], {})
+
+    rows = (
+        db.session.query(Room.case_scene_id, Room.room_name, UploadedFile.filename)
+        .outerjoin(UploadedFile, UploadedFile.room_id == Room.id)
+        .order_by(Room.id.asc(), UploadedFile.id.asc())
+    )
+    for cs_id, room_name, filename in rows:
+        files = items.setdefault(keys.get(cs_id, ""), {}).setdefault(room_name, [])
+        if filename:
+            files.append(filename)
+    return items
+
+
+def _guess_category(filename: str, stored: Dict[str, str]) -> str:
+    from ._legacy import classify_upload
+
+    if filename in stored:
+        return stored[filename]
+    upload_root = current_app.config["UPLOAD_FOLDER"]
+    for category, folder in LEGACY_DIRS.items():
+        if os.path.exists(os.path.join(upload_root, folder, filename)):
+            return category
+    if os.path.exists(os.path.join(upload_root, "Feedback", filename)):
+        return "feedback"
+    return classify_upload(filename)
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive OS lock on `path` (blocks until the other worker releases it)."""
+    with open(path, "a+b") as fh:
+        if os.name == "nt":
+            import msvcrt
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def import_uploaded_items_json(path: str | None = None) -> Optional[dict]:
+    """
+    One-time import of the legacy JSON index into `uploaded_files`.
+    The file is renamed to *.imported afterwards, so re-running is a no-op;
+    workers starting together serialize on a lock file and only one imports.
+    Returns None when there is nothing to import.
+    """
+    path = path or os.path.join(current_app.instance_path, LEGACY_INDEX)
+    if not os.path.exists(path):
+        return None
+
+    with _file_lock(path + ".lock"):
+        return _import_uploaded_items_json(path)
+
+
+def _import_uploaded_items_json(path: str) -> Optional[dict]:
+    from ._legacy import ensure_case_room
+
+    if not os.path.exists(path):
+        return None   # imported by another worker while we waited for the lock
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        current_app.logger.warning("[import_uploaded_items_json] %s is not a JSON object, skipped", path)
+        return None
+
+    all_names = {name for rooms in data.values() if isinstance(rooms, dict)
+                 for files in rooms.values() for name in (files or [])}
+    stored = {}
+    for category, filename in db.session.query(StoredFile.category, StoredFile.filename).filter(
+        StoredFile.filename.in_(all_names)
+    ):
+        stored.setdefault(filename, category)
+
+    stats = dict(cases=0, rooms=0, files=0)
+    try:
+        for cs_key, rooms in data.items():
+            cs, _ = ensure_case_room(cs_key, None)
+            stats["cases"] += 1
+            for room_name, files in (rooms or {}).items():
+                cs, r = ensure_case_room(cs_key, room_name)
+                if not r:
+                    continue
+                stats["rooms"] += 1
+                stats["files"] += record_uploaded_files(cs, r, [
+                    (name, _guess_category(name, stored), None) for name in (files or [])
+                ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    os.replace(path, path + ".imported")
+    current_app.logger.warning("[import_uploaded_items_json] %s", stats)
+    return stats
+
+
+def init_upload_index(app) -> None:
+    """create_app hook: import the legacy JSON once."""
+    with app.app_context():
+        import_uploaded_items_json()
@@ -2,9 +2,13 @@
 
 from ._legacy import (
     init_upload_folders,
-    load_uploaded_items,
-    save_uploaded_items,
-    append_uploaded_item,
     validate_ext,
     save_feedback_text,
 )
+from .upload_index import (
+    load_uploaded_items,
+    record_uploaded_files,
+    room_uploaded_files,
+    import_uploaded_items_json,
+    init_upload_index,
+)
@@ -0,0 +1,300 @@
+"""Resumable (chunked) upload sessions.
+
+Flow:
+  1) create_upload_session()   -> session id + chunk size
+  2) put_upload_chunk() x N    -> chunks can be sent in any order / in parallel
+  3) get_upload_session()      -> which chunks/offsets already arrived (resume)
+  4) complete_upload_session() -> chunks are streamed, in order, into the
+                                  normal `register_upload` flow
+
+Session state lives on disk under `instance/upload_sessions/<id>/` so every
+worker process sees the same sessions.
+"""
+
+import bisect
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Any, Dict, List
+
+from flask import abort, current_app
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+
+from ._legacy import register_upload, validate_upload_ext, validate_upload_target
+from .upload_stream import stream_to_file
+
+SESSION_META = "session.json"
+
+
+def _sessions_root() -> str:
+    root = os.path.join(current_app.instance_path, "upload_sessions")
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def _session_dir(session_id: str) -> str:
+    # session ids are uuid4 hex; anything else cannot be ours
+    if not session_id or not session_id.isalnum():
+        abort(404)
+    return os.path.join(_sessions_root(), session_id)
+
+
+def _chunk_path(sdir: str, index: int) -> str:
+    return os.path.join(sdir, f"{index:06d}.part")
+
+
+def _load_meta(session_id: str, user_id: int) -> Dict[str, Any]:
+    path = os.path.join(_session_dir(session_id), SESSION_META)
+    if not os.path.exists(path):
+        abort(404)
+    with open(path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("user_id") != user_id:
+        abort(404)
+    return meta
+
+
+def _expected_chunk_size(meta: Dict[str, Any], index: int) -> int:
+    start = index * meta["chunk_size"]
+    return min(meta["chunk_size"], meta["size"] - start)
+
+
+def _received_chunks(sdir: str, meta: Dict[str, Any]) -> List[int]:
+    return [i for i in range(meta["total_chunks"]) if os.path.exists(_chunk_path(sdir, i))]
+
+
+def _opt_int(v):
+    if v in (None, ""):
+        return None
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        raise ValueError(f"不是整數: {v}")
+
+
+def purge_stale_upload_sessions() -> int:
+    """Remove sessions older than UPLOAD_SESSION_TTL seconds."""
+    ttl = current_app.config["UPLOAD_SESSION_TTL"]
+    root = _sessions_root()
+    now = time.time()
+    removed = 0
+    for name in os.listdir(root):
+        sdir = os.path.join(root, name)
+        try:
+            if now - os.path.getmtime(sdir) > ttl:
+                shutil.rmtree(sdir, ignore_errors=True)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def create_upload_session(data: Dict[str, Any], user_id: int) -> Dict[str, Any]:
+    """
+    data: filename, size, country, room, file_category,
+          feedback_text, equipment_type_id, equipment_id, chunk_size (optional)
+    """
+    filename = secure_filename((data.get("filename") or "").strip())
+    if not filename:
+        raise ValueError("filename 必填")
+    validate_upload_ext(filename)
+
+    try:
+        size = int(data.get("size"))
+    except (TypeError, ValueError):
+        raise ValueError("size 必須是整數")
+    if size <= 0:
+        raise ValueError("size 必須大於 0")
+    if size > current_app.config["UPLOAD_SESSION_MAX_SIZE"]:
+        raise ValueError("檔案超過上限")
+
+    file_category = (data.get("file_category") or "inspection").strip().lower()
+    if file_category == "feedback":
+        raise ValueError("Feedback 不需要上傳檔案")
+
+    country = (data.get("country") or "").strip()
+    room = (data.get("room") or "").strip()
+    equipment_id = _opt_int(data.get("equipment_id"))
+    validate_upload_target(country, room, file_category, equipment_id)
+
+    chunk_size = _opt_int(data.get("chunk_size")) or current_app.config["UPLOAD_SESSION_CHUNK_SIZE"]
+    chunk_size = max(current_app.config["UPLOAD_SESSION_MIN_CHUNK_SIZE"], chunk_size)
+    total_chunks = (size + chunk_size - 1) // chunk_size
+
+    purge_stale_upload_sessions()
+
+    session_id = uuid.uuid4().hex
+    sdir = _session_dir(session_id)
+    os.makedirs(sdir)
+
+    meta = dict(
+        id=session_id,
+        user_id=user_id,
+        filename=filename,
+        size=size,
+        chunk_size=chunk_size,
+        total_chunks=total_chunks,
+        country=country,
+        room=room,
+        file_category=file_category,
+        feedback_text=(data.get("feedback_text") or "").strip(),
+        equipment_type_id=_opt_int(data.get("equipment_type_id")),
+        equipment_id=equipment_id,
+        created_at=time.time(),
+    )
+    with open(os.path.join(sdir, SESSION_META), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    return _session_status(sdir, meta)
+
+
+def _session_status(sdir: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+    received = _received_chunks(sdir, meta)
+    received_set = set(received)
+    return dict(
+        session_id=meta["id"],
+        filename=meta["filename"],
+        size=meta["size"],
+        chunk_size=meta["chunk_size"],
+        total_chunks=meta["total_chunks"],
+        received_chunks=received,
+        received_offsets=[i * meta["chunk_size"] for i in received],
+        received_bytes=sum(_expected_chunk_size(meta, i) for i in received),
+        missing_chunks=[i for i in range(meta["total_chunks"]) if i not in received_set],
+        complete=len(received) == meta["total_chunks"],
+    )
+
+
+def get_upload_session(session_id: str, user_id: int) -> Dict[str, Any]:
+    meta = _load_meta(session_id, user_id)
+    return _session_status(_session_dir(session_id), meta)
+
+
+def put_upload_chunk(session_id: str, index: int, stream, user_id: int, sha256: str | None = None) -> Dict[str, Any]:
+    """
+    Store chunk `index` (0-based). Re-sending a chunk simply replaces it, so a
+    client can retry blindly after a dropped connection.
+    Returns a small acknowledgement; the full status (O(total_chunks)) is
+    get_upload_session's job.
+    """
+    meta = _load_meta(session_id, user_id)
+    sdir = _session_dir(session_id)
+
+    if index < 0 or index >= meta["total_chunks"]:
+        raise ValueError(f"chunk index 超出範圍 (0..{meta['total_chunks'] - 1})")
+
+    final_path = _chunk_path(sdir, index)
+    tmp_path = f"{final_path}.{uuid.uuid4().hex}.tmp"
+    expected = _expected_chunk_size(meta, index)
+    # one byte past the expected size is enough to reject an oversized body
+    stored = stream_to_file(stream, tmp_path, max_bytes=expected + 1)
+
+    try:
+        if stored.size > expected:
+            raise ValueError(f"chunk {index} 大小不符：超過 {expected}")
+        if stored.size != expected:
+            raise ValueError(f"chunk {index} 大小不符：收到 {stored.size}，應為 {expected}")
+        if sha256 and sha256.lower() != stored.sha256:
+            raise ValueError(f"chunk {index} sha256 不符")
+        # atomic: a half-written chunk is never visible as received
+        os.replace(tmp_path, final_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    os.utime(sdir)
+    return dict(session_id=meta["id"], index=index, size=stored.size, sha256=stored.sha256)
+
+
+class _ChunkReader:
+    """Read-only, seekable file-like object over the chunk files in order."""
+
+    def __init__(self, paths: List[str]):
+        self._paths = paths
+        self._offsets = []          # start offset of each chunk
+        total = 0
+        for p in paths:
+            self._offsets.append(total)
+            total += os.path.getsize(p)
+        self._size = total
+        self._pos = 0
+        self._idx = -1
+        self._fh = None
+
+    def _open(self, idx: int):
+        if self._idx != idx:
+            self.close()
+            self._fh = open(self._paths[idx], "rb")
+            self._idx = idx
+        return self._fh
+
+    def read(self, n: int = -1) -> bytes:
+        if n is None or n < 0:
+            return b"".join(iter(lambda: self.read(1024 * 1024), b""))
+        if n == 0 or self._pos >= self._size:
+            return b""
+
+        idx = bisect.bisect_right(self._offsets, self._pos) - 1
+        fh = self._open(idx)
+        fh.seek(self._pos - self._offsets[idx])
+        data = fh.read(n)
+        self._pos += len(data)
+        return data
+
+    def seek(self, pos: int, whence: int = 0) -> int:
+        if whence == 1:
+            pos += self._pos
+        elif whence == 2:
+            pos += self._size
+        if pos < 0:
+            raise OSError("negative seek position")
+        self._pos = pos
+        return pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seekable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+        self._idx = -1
+
+
+def complete_upload_session(session_id: str, user_id: int) -> Dict[str, Any]:
+    """All chunks received -> run the normal upload flow, then drop the session."""
+    meta = _load_meta(session_id, user_id)
+    sdir = _session_dir(session_id)
+
+    status = _session_status(sdir, meta)
+    if not status["complete"]:
+        raise ValueError(f"尚有 {len(status['missing_chunks'])} 個 chunk 未上傳")
+
+    reader = _ChunkReader([_chunk_path(sdir, i) for i in range(meta["total_chunks"])])
+    try:
+        out = register_upload(
+            file=FileStorage(stream=reader, filename=meta["filename"]),
+            country=meta["country"],
+            room=meta["room"],
+            file_category=meta["file_category"],
+            feedback_text=meta["feedback_text"],
+            equipment_type_id=meta["equipment_type_id"],
+            equipment_id=meta["equipment_id"],
+        )
+    finally:
+        reader.close()
+
+    shutil.rmtree(sdir, ignore_errors=True)
+    return out
+
+
+def abort_upload_session(session_id: str, user_id: int) -> None:
+    _load_meta(session_id, user_id)
+    shutil.rmtree(_session_dir(session_id), ignore_errors=True)
@@ -0,0 +1,87 @@
+"""Chunked upload writer.
+
+Uploads are copied to disk in fixed-size chunks. Every chunk is also fed to the
+content hash and to any extra consumers (e.g. the inspection field collector),
+so a file is read exactly once and memory per upload stays bounded by
+`CHUNK_SIZE`.
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+@dataclass(frozen=True)
+class StreamResult:
+    path: str
+    size: int
+    sha256: str
+
+
+def iter_chunks(file_obj, chunk_size: int = CHUNK_SIZE, max_bytes: Optional[int] = None):
+    """Yield `file_obj` (FileStorage or file-like) from the start in chunks; at most `max_bytes` in total."""
+    if hasattr(file_obj, "seek"):
+        try:
+            file_obj.seek(0)
+        except Exception:
+            pass
+
+    left = max_bytes
+    while left is None or left > 0:
+        chunk = file_obj.read(chunk_size if left is None else min(chunk_size, left))
+        if not chunk:
+            break
+        if left is not None:
+            left -= len(chunk)
+        yield chunk
+
+
+def stream_to_file(
+    file_obj,
+    dest_path: str,
+    consumers: Iterable[Callable[[bytes], None]] = (),
+    chunk_size: int = CHUNK_SIZE,
+    max_bytes: Optional[int] = None,
+) -> StreamResult:
+    """
+    Write `file_obj` to `dest_path` chunk by chunk.
+    Each chunk is hashed (sha256) and passed to every consumer.
+    Reading stops after `max_bytes` (caller compares `size` with its limit).
+    A partially written file is removed if anything fails.
+    """
+    consumers = list(consumers)
+    h = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(dest_path, "wb") as f:
+            for chunk in iter_chunks(file_obj, chunk_size, max_bytes=max_bytes):
+                f.write(chunk)
+                h.update(chunk)
+                size += len(chunk)
+                for consume in consumers:
+                    consume(chunk)
+    except Exception:
+        if os.path.exists(dest_path):
+            try:
+                os.remove(dest_path)
+            except Exception:
+                pass
+        raise
+
+    return StreamResult(path=dest_path, size=size, sha256=h.hexdigest())
+
+
+def hash_file(path: str, chunk_size: int = CHUNK_SIZE, consumers: Optional[Iterable[Callable[[bytes], None]]] = None) -> str:
+    """sha256 of a file on disk, read in chunks."""
+    consumers = list(consumers or ())
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter_chunks(f, chunk_size):
+            h.update(chunk)
+            for consume in consumers:
+                consume(chunk)
+    return h.hexdigest()
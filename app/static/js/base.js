@@ -1,11 +1,119 @@
 (function () {
   const ctx = window.APP_CTX || {};
 
+  // ===== Sidebar tree：只有第一頁 case 由 server render，其餘 lazy load =====
+  async function getJSON(url, params) {
+    const u = new URL(url, window.location.origin);
+    Object.entries(params || {}).forEach(([k, v]) => {
+      if (v !== undefined && v !== null && v !== "") u.searchParams.set(k, v);
+    });
+    const r = await fetch(u, { headers: { Accept: "application/json" } });
+    if (!r.ok) throw new Error("HTTP " + r.status);
+    return r.json();
+  }
+
+  function moreButton(cls, after) {
+    const btn = document.createElement("button");
+    btn.type = "button";
+    btn.className = "btn btn-link btn-sm p-0 ms-3 " + cls;
+    btn.textContent = "更多…";
+    btn.dataset.after = after;
+    return btn;
+  }
+
+  function countBadge(n) {
+    const b = document.createElement("span");
+    b.className = "badge rounded-pill bg-light text-dark ms-1";
+    b.title = "設備數";
+    b.textContent = n;
+    return b;
+  }
+
+  function roomNode(room, selectedRoom) {
+    const li = document.createElement("li");
+    li.className = "room-node";
+    const a = document.createElement("a");
+    a.href = room.url;
+    a.textContent = room.name;
+    if (String(room.id) === selectedRoom) a.classList.add("fw-bold");
+    li.appendChild(a);
+    if (room.equipment_count) li.appendChild(countBadge(room.equipment_count));
+    return li;
+  }
+
+  function caseNode(cs) {
+    const li = document.createElement("li");
+    li.className = "cs-node";
+    li.dataset.id = cs.id;
+    li.dataset.roomsUrl = cs.rooms_url;
+
+    const a = document.createElement("a");
+    a.href = cs.url;
+    a.textContent = cs.name;
+    a.style.cssText = "display:inline-block; color:inherit; text-decoration:none; font-weight:700;";
+    li.appendChild(a);
+    if (cs.equipment_count) li.appendChild(countBadge(cs.equipment_count));
+
+    if (cs.room_count > 0) {
+      const caret = document.createElement("span");
+      caret.className = "caret";
+      caret.style.marginLeft = "6px";
+      caret.textContent = "▾";
+      const ul = document.createElement("ul");
+      ul.className = "nested room-list";
+      li.append(caret, ul);
+    }
+    return li;
+  }
+
+  async function loadRooms(tree, li, after) {
+    const list = li.querySelector(":scope > .room-list");
+    if (!list) return;
+    const d = await getJSON(li.dataset.roomsUrl, { after });
+    d.items.forEach((room) => list.appendChild(roomNode(room, tree.dataset.selectedRoom)));
+
+    li.querySelector(":scope > .room-more")?.remove();
+    if (d.next_after) li.appendChild(moreButton("room-more", d.next_after));
+    li.dataset.loaded = "1";
+  }
+
+  async function loadCases(tree, after) {
+    const list = tree.querySelector(".cs-list");
+    const d = await getJSON(tree.dataset.caseScenesUrl, { q: tree.dataset.q, after });
+    if (!after) list.innerHTML = "";
+    d.items.forEach((cs) => list.appendChild(caseNode(cs)));
+
+    const more = tree.querySelector(".tree-more");
+    more.dataset.after = d.next_after || "";
+    more.hidden = !d.next_after;
+  }
+
+  async function expandSelectedCase(tree) {
+    const id = tree.dataset.selectedCase;
+    if (!id) return;
+    const li = tree.querySelector(`.cs-node[data-id="${id}"]`);
+    if (!li || !li.querySelector(":scope > .room-list")) return;
+    li.classList.add("active");
+    await loadRooms(tree, li);
+  }
+
   function initTreeToggle() {
     const tree = document.querySelector(".tree");
     if (!tree) return;
 
-    tree.addEventListener("click", (e) => {
+    tree.addEventListener("click", async (e) => {
+      const btn = e.target.closest(".tree-more, .room-more");
+      if (btn) {
+        btn.disabled = true;
+        try {
+          if (btn.classList.contains("tree-more")) await loadCases(tree, btn.dataset.after);
+          else await loadRooms(tree, btn.closest("li"), btn.dataset.after);
+        } finally {
+          btn.disabled = false;
+        }
+        return;
+      }
+
       const caret = e.target.closest(".caret");
       if (!caret) return;
 
@@ -18,7 +126,26 @@
       const li = caret.closest("li");
       if (!li) return;
       li.classList.toggle("active");
+
+      // 第一次展開 case 才去抓 rooms
+      if (li.classList.contains("cs-node") && li.classList.contains("active") && !li.dataset.loaded) {
+        li.dataset.loaded = "1";
+        loadRooms(tree, li).catch(() => { delete li.dataset.loaded; });
+      }
     });
+
+    const filter = tree.querySelector(".tree-filter");
+    let timer = null;
+    filter?.addEventListener("input", () => {
+      clearTimeout(timer);
+      timer = setTimeout(() => {
+        tree.dataset.q = filter.value.trim();
+        loadCases(tree).catch(() => {});
+      }, 250);
+    });
+
+    const ready = tree.dataset.autoload === "1" ? loadCases(tree) : Promise.resolve();
+    ready.then(() => expandSelectedCase(tree)).catch(() => {});
   }
 
   function initResetButton() {
@@ -31,7 +158,7 @@
       const ok = await Swal.fire({
         icon: "warning",
         title: "確定要 Reset？",
-        text: "會清空 DB + 刪除 uploads + 清掉 uploaded_items.json",
+        text: "會清空 DB + 刪除 uploads",
         showCancelButton: true,
         confirmButtonText: "我確定",
         cancelButtonText: "取消",
@@ -0,0 +1,41 @@
+(function () {
+  "use strict";
+
+  // 設備清單：DataTables server-side，只抓目前這一頁（/api/equipment/datatable）
+  const PAGE_LENGTH = 50;
+  const SEARCH_DELAY_MS = 400;
+
+  function initEquipmentTable(table) {
+    const text = DataTable.render.text();   // escape，不直接塞 HTML
+
+    const columns = Array.from(table.querySelectorAll("thead th")).map((th) => {
+      const name = th.dataset.dtColumn;
+      if (name === "feedback_url") {
+        return {
+          data: name,
+          orderable: false,
+          searchable: false,
+          render: (url, type) => (type === "display" && url ? `<a href="${url}">新增/查看</a>` : ""),
+        };
+      }
+      return { data: name, render: text, defaultContent: "-" };
+    });
+
+    return new DataTable(table, {
+      serverSide: true,
+      processing: true,
+      ajax: { url: table.dataset.dtSource },
+      columns: columns,
+      order: [[2, "asc"]],   // OEM SN（和舊的 room 頁一樣）
+      pageLength: PAGE_LENGTH,
+      lengthMenu: [25, 50, 100, 500],
+      searchDelay: SEARCH_DELAY_MS,
+      search: { search: table.dataset.dtSearch || "" },
+      language: { emptyTable: table.dataset.dtEmpty || "No data" },
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", () => {
+    document.querySelectorAll("table[data-dt-source]").forEach(initEquipmentTable);
+  });
+})();
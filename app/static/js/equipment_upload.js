@@ -5,6 +5,12 @@
   const CFG = window.EQUIPMENT_UPLOAD_CFG || {};
   const ADD_LOCATION_URL = CFG.addLocationUrl || "";
   const UPLOAD_URL = CFG.uploadUrl || ""; // 目前用不到（我們用 form.action），留著未來可用
+  const UPLOAD_SESSIONS_URL = CFG.uploadSessionsUrl || "";
+
+  // 大檔走可續傳的 upload session（分塊 PUT、斷線只補缺的 chunk）
+  const CHUNKED_THRESHOLD = 16 * 1024 * 1024;
+  const CHUNK_PARALLEL = 3;
+  const CHUNK_RETRIES = 5;
 
   function syncUploadUI() {
     const cat = (document.getElementById("file-category")?.value || "inspection").toLowerCase();
@@ -115,6 +121,96 @@
     });
   }
 
+  function sleep(ms) {
+    return new Promise((r) => setTimeout(r, ms));
+  }
+
+  async function fetchJson(url, opts) {
+    const resp = await fetch(url, opts);
+    let d = null;
+    try {
+      d = await resp.json();
+    } catch {}
+    if (!resp.ok || !d?.success) {
+      const err = new Error(d?.error?.message || d?.message || `HTTP ${resp.status}`);
+      err.status = resp.status;
+      throw err;
+    }
+    return d;
+  }
+
+  // 同一個檔案（name + size + lastModified）重新送出時沿用舊 session
+  function sessionKey(file) {
+    return `eq-upload-session:${file.name}:${file.size}:${file.lastModified}`;
+  }
+
+  async function openSession(file, fd) {
+    const key = sessionKey(file);
+    const oldId = localStorage.getItem(key);
+    if (oldId) {
+      try {
+        return await fetchJson(`${UPLOAD_SESSIONS_URL}/${oldId}`);
+      } catch (err) {
+        localStorage.removeItem(key);
+      }
+    }
+
+    const d = await fetchJson(UPLOAD_SESSIONS_URL, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        filename: file.name,
+        size: file.size,
+        country: fd.get("country"),
+        room: fd.get("room"),
+        file_category: fd.get("file_category"),
+        feedback_text: fd.get("feedback_text"),
+        equipment_type_id: fd.get("equipment_type_id"),
+        equipment_id: fd.get("equipment_id"),
+      }),
+    });
+    localStorage.setItem(key, d.session_id);
+    return d;
+  }
+
+  async function putChunk(sessionId, file, chunkSize, index) {
+    const start = index * chunkSize;
+    const blob = file.slice(start, Math.min(start + chunkSize, file.size));
+    const url = `${UPLOAD_SESSIONS_URL}/${sessionId}/chunks/${index}`;
+
+    for (let attempt = 1; ; attempt++) {
+      try {
+        return await fetchJson(url, { method: "PUT", body: blob });
+      } catch (err) {
+        // 4xx 不是網路問題，重送也沒用
+        if (attempt >= CHUNK_RETRIES || (err.status >= 400 && err.status < 500)) throw err;
+        await sleep(500 * 2 ** attempt);
+      }
+    }
+  }
+
+  async function chunkedUpload(file, fd, onProgress) {
+    const session = await openSession(file, fd);
+    const { session_id: sessionId, chunk_size: chunkSize } = session;
+    const missing = [...session.missing_chunks];
+    let sent = session.received_bytes;
+    onProgress(sent, file.size);
+
+    const worker = async () => {
+      while (missing.length) {
+        const index = missing.shift();
+        await putChunk(sessionId, file, chunkSize, index);
+        sent += Math.min(chunkSize, file.size - index * chunkSize);
+        onProgress(sent, file.size);
+      }
+    };
+    await Promise.all(Array.from({ length: CHUNK_PARALLEL }, worker));
+
+    const d = await fetchJson(`${UPLOAD_SESSIONS_URL}/${sessionId}/complete`, { method: "POST" });
+    localStorage.removeItem(sessionKey(file));
+    return d;
+  }
+
   function bindUpload() {
     const form = document.getElementById("upload-form");
     if (!form) return;
@@ -163,6 +259,25 @@
       if (pct) pct.textContent = "0%";
       if (done) done.style.display = "none";
 
+      const file = document.getElementById("file-input")?.files?.[0];
+      if (UPLOAD_SESSIONS_URL && cat !== "feedback" && file && file.size > CHUNKED_THRESHOLD) {
+        try {
+          await chunkedUpload(file, fd, (loaded, total) => {
+            const p = Math.round((loaded / total) * 100);
+            if (bar) bar.style.width = `${p}%`;
+            if (pct) pct.textContent = `${p}%`;
+          });
+          if (done) done.style.display = "block";
+          if (window.Swal) await Swal.fire({ icon: "success", title: "上傳完成", timer: 900, showConfirmButton: false });
+          window.location.reload();
+        } catch (err) {
+          console.error(err);
+          const msg = err?.message || "";
+          window.Swal ? Swal.fire({ icon: "error", title: "上傳失敗（可重新送出續傳）", text: msg }) : alert(`上傳失敗: ${msg}`);
+        }
+        return;
+      }
+
       const xhr = new XMLHttpRequest();
       xhr.open("POST", form.action); // 用 form.action 最穩
 
@@ -0,0 +1,63 @@
+# tests/conftest.py
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.extensions import db
+
+
+@contextmanager
+def count_queries():
+    """Collect every SQL statement sent to the DB inside the block (list of str)."""
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app(test_config={"TESTING": True}, instance_path=str(tmp_path / "instance"))
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    def _login(username="superuser", password="superpass"):
+        return client.post("/login", data={"username": username, "password": password})
+    return _login
+
+
+def make_inspection_text(serial="OEM-0001", vendor="VSN-0001", software="1.2.3", control="4.5"):
+    # same layout as *_Inspection_Result_*.csv exported by the field tool
+    return (
+        "Inspection Details,Routine\n"
+        "Last Inspect,2025-10-24 13:18:06\n"
+        f"Serial Number,{serial}\n"
+        f"Vendor SN,{vendor}\n"
+        "Model,CDU-900\n"
+        "Part Number,PN-42\n"
+        "Eth1,10.0.0.1\n"
+        f"System Software,{software}\n"
+        f"Control Firmware,{control}\n"
+    )
@@ -0,0 +1,116 @@
+# tests/test_blob_store.py
+import hashlib
+import io
+import os
+
+from app.extensions import db
+from app.models import EquipmentManage, StoredFile
+from app.services import migrate_legacy_uploads, resolve_upload_path
+from app.services.blob_store import discard_stored, put_file
+
+from .conftest import make_inspection_text
+
+
+def _upload(client, text, name="OEM-1_Inspection_Result_1.csv", room="R1"):
+    return client.post(
+        "/api/uploads",
+        data={
+            "country": "USA(Quincy)",
+            "room": room,
+            "file_category": "inspection",
+            "file": (io.BytesIO(text.encode()), name),
+        },
+        content_type="multipart/form-data",
+    )
+
+
+def test_upload_goes_to_fanout_blob(app, client, login):
+    login()
+    text = make_inspection_text()
+    r = _upload(client, text)
+    assert r.status_code == 200
+    assert r.get_json()["duplicate"] is False
+
+    sha = hashlib.sha256(text.encode()).hexdigest()
+    path = resolve_upload_path("inspection", "OEM-1_Inspection_Result_1.csv")
+    assert path == os.path.join(app.config["UPLOAD_FOLDER"], "blobs", sha[:2], sha[2:4], sha)
+
+    r = client.get("/equipment/report/raw/OEM-1_Inspection_Result_1.csv")
+    assert r.status_code == 200
+    assert r.data == text.encode()
+
+
+def test_identical_reupload_is_short_circuited(app, client, login):
+    login()
+    text = make_inspection_text()
+    _upload(client, text)
+    r = _upload(client, text, name="renamed_Inspection_Result_2.csv")
+
+    out = r.get_json()
+    assert out["duplicate"] is True
+    assert out["filename"] == "OEM-1_Inspection_Result_1.csv"
+    assert StoredFile.query.count() == 1
+    assert EquipmentManage.query.count() == 1
+
+
+def test_same_name_different_content_gets_new_name(app, client, login):
+    login()
+    _upload(client, make_inspection_text(software="1.0"))
+    out = _upload(client, make_inspection_text(software="2.0")).get_json()
+    assert out["duplicate"] is False
+    assert out["filename"] != "OEM-1_Inspection_Result_1.csv"
+    assert StoredFile.query.count() == 2
+
+
+def test_migrate_legacy_flat_folders(app):
+    root = app.config["UPLOAD_FOLDER"]
+    os.makedirs(os.path.join(root, "Inspection"))
+    os.makedirs(os.path.join(root, "Logs"))
+    for folder, name in (("Inspection", "a.csv"), ("Inspection", "b.csv"), ("Logs", "c.log")):
+        with open(os.path.join(root, folder, name), "w") as f:
+            f.write("same content")
+
+    assert resolve_upload_path("inspection", "a.csv") == os.path.join(root, "Inspection", "a.csv")
+
+    stats = migrate_legacy_uploads()
+    assert stats == dict(migrated=3, deduplicated=2, skipped=0)
+    assert os.listdir(os.path.join(root, "Inspection")) == []
+
+    path = resolve_upload_path("logs", "c.log")
+    assert "blobs" in path
+    with open(path) as f:
+        assert f.read() == "same content"
+
+    assert migrate_legacy_uploads()["migrated"] == 0
+
+
+def test_failed_upload_keeps_a_blob_another_upload_reused(app):
+    first = put_file(io.BytesIO(b"same bytes"), "other", "a.txt")
+    assert first.created_blob
+    # same content, other category: reuses the blob and commits its row
+    second = put_file(io.BytesIO(b"same bytes"), "logs", "b.log")
+    assert not second.created_blob and second.path == first.path
+    db.session.commit()
+
+    discard_stored(first)
+    db.session.commit()
+    assert os.path.exists(second.path)
+    assert resolve_upload_path("logs", "b.log") == second.path
+
+
+def test_failed_upload_keeps_a_blob_reused_but_not_yet_committed(app):
+    first = put_file(io.BytesIO(b"pending bytes"), "other", "a.txt")
+    db.session.rollback()   # the row is gone; the blob is still first's
+    put_file(io.BytesIO(b"pending bytes"), "logs", "b.log")
+    db.session.rollback()   # nothing references it, but it was reused meanwhile
+
+    discard_stored(first)
+    assert os.path.exists(first.path)
+
+
+def test_failed_upload_removes_its_unused_blob(app):
+    stored = put_file(io.BytesIO(b"lonely bytes"), "other", "a.txt")
+    discard_stored(stored)
+    db.session.rollback()
+    assert not os.path.exists(stored.path)
+    assert StoredFile.query.count() == 0
@@ -0,0 +1,70 @@
+# tests/test_equipment_datatable.py
+from app.extensions import db
+from app.models import EquipmentInfo
+from app.services._legacy import ensure_case_room
+
+
+def _seed(n=120):
+    cs, r1 = ensure_case_room("USA(Quincy)", "Hall-A")
+    _, r2 = ensure_case_room("USA(Quincy)", "Hall-B")
+    db.session.add_all([
+        EquipmentInfo(vendor_sn=f"VSN-{i:04d}", oem_sn=f"OEM-{i:04d}", firmware=f"fw{i % 3}", room_id=r1.id)
+        for i in range(n)
+    ] + [EquipmentInfo(vendor_sn="OTHER-1", oem_sn="OTHER-1", firmware="fw", room_id=r2.id)])
+    db.session.commit()
+    return cs, r1
+
+
+def _dt(client, room_id, **extra):
+    args = {
+        "draw": 3, "start": 0, "length": 10,
+        "columns[0][data]": "id", "columns[1][data]": "vendor_sn", "columns[2][data]": "oem_sn",
+        "order[0][column]": 2, "order[0][dir]": "asc", "search[value]": "",
+        "room_id": room_id,
+    }
+    args.update(extra)
+    return client.get("/api/equipment/datatable", query_string=args).get_json()
+
+
+def test_server_side_paging_order_search(app, client, login):
+    login()
+    _, r1 = _seed()
+
+    d = _dt(client, r1.id)
+    assert (d["draw"], d["recordsTotal"], d["recordsFiltered"]) == (3, 120, 120)
+    assert [x["oem_sn"] for x in d["data"]] == [f"OEM-{i:04d}" for i in range(10)]
+    assert d["data"][0]["room_name"] == "Hall-A" and d["data"][0]["feedback_url"]
+
+    d = _dt(client, r1.id, start=110, **{"order[0][dir]": "desc"})
+    assert [x["oem_sn"] for x in d["data"]] == [f"OEM-{i:04d}" for i in range(9, -1, -1)]
+
+    d = _dt(client, r1.id, **{"search[value]": "OEM-0042"})
+    assert (d["recordsTotal"], d["recordsFiltered"]) == (120, 1)
+    assert d["data"][0]["vendor_sn"] == "VSN-0042"
+
+    # 不在白名單的欄位不能拿來排序；length=-1 受上限保護
+    d = _dt(client, r1.id, length=-1, **{"columns[2][data]": "password"})
+    assert len(d["data"]) == 120 and d["data"][0]["id"] < d["data"][1]["id"]
+    assert client.get("/api/equipment/datatable?start=x").status_code == 400
+
+
+def test_search_without_terms_is_no_filter(app, client, login):
+    login()
+    _, r1 = _seed(5)
+    for value in ('"', " ", '""'):
+        d = _dt(client, r1.id, **{"search[value]": value})
+        assert (d["recordsTotal"], d["recordsFiltered"]) == (5, 5)
+
+
+def test_room_page_ships_no_rows(app, client, login):
+    login()
+    cs, r1 = _seed(n=5)
+    html = client.get(
+        f"/equipment/case-scenes/{cs.id}/rooms/{r1.id}/equipments?tab=list&q=abc"
+    ).get_data(as_text=True)
+    assert f"room_id={r1.id}" in html and 'data-dt-search="abc"' in html
+    assert "OEM-0001" not in html and "datatables.min.js" in html
+
+    # 上傳頁仍要整個清單給 Logs 選設備
+    html = client.get(f"/equipment/case-scenes/{cs.id}/rooms/{r1.id}/equipments?tab=upload").get_data(as_text=True)
+    assert "OEM-0001" in html
@@ -0,0 +1,74 @@
+# tests/test_equipment_lookup.py
+from sqlalchemy import text
+
+from app.extensions import db
+from app.models import EquipmentInfo
+from app.services import similar_equipments
+from app.services._legacy import ensure_case_room
+from app.services.search_service import similarity
+
+
+def _seed():
+    _, r1 = ensure_case_room("USA(Quincy)", "Hall-A")
+    db.session.add_all([
+        EquipmentInfo(vendor_sn="VSN-48213", oem_sn="OEM-77120", macaddr="aa:bb:cc:00:00:01", firmware="1.0", room_id=r1.id),
+        EquipmentInfo(vendor_sn="VSN-48299", oem_sn="OEM-77555", macaddr="aa:bb:cc:00:00:02", firmware="1.0", room_id=r1.id),
+        EquipmentInfo(vendor_sn="ZZQ-00001", oem_sn="XYZ-00001", firmware="1.0", room_id=r1.id),
+    ])
+    db.session.commit()
+
+
+def test_similarity():
+    assert similarity("VSN48213", "VSN48213") == 1.0
+    assert 0 < similarity("VSN48213", "VSN48218") < 1
+    assert similarity("AB", "AB") == 0.0
+
+
+def test_one_typo_finds_the_device(app):
+    _seed()
+    # 最後一碼打錯 / 中間一碼打錯 / 少了分隔符號
+    for q in ("VSN-48218", "VSN-4B213", "vsn48213"):
+        hit = similar_equipments(q)[0]
+        assert (hit["vendor_sn"], hit["matched_field"]) == ("VSN-48213", "vendor_sn")
+        assert hit["room_name"] == "Hall-A"
+
+    hit = similar_equipments("AA-BB-CC-00-00-02")[0]
+    assert (hit["oem_sn"], hit["matched_field"], hit["similarity"]) == ("OEM-77555", "macaddr", 1.0)
+
+    assert len(similar_equipments("VSN-48213", k=1)) == 1
+    assert similar_equipments("QQQQQQ") == []
+    assert similar_equipments("ab") == []
+
+
+def test_index_follows_upserts(app):
+    _seed()
+    eq = EquipmentInfo.query.filter_by(vendor_sn="ZZQ-00001").one()
+    eq.vendor_sn = "NEW-31415"
+    db.session.commit()
+    assert similar_equipments("NEW-31416")[0]["id"] == eq.id
+    assert all(h["vendor_sn"] != "ZZQ-00001" for h in similar_equipments("ZZQ-00001"))
+
+    EquipmentInfo.query.delete()
+    db.session.commit()
+    assert db.session.execute(text("SELECT count(*) FROM equipment_trigram")).scalar() == 0
+
+
+def test_lookup_api(app, client, login):
+    login()
+    _seed()
+    d = client.get("/api/equipment/lookup?q=OEM-77121&k=2").get_json()
+    assert d["items"][0]["oem_sn"] == "OEM-77120" and d["items"][0]["url"].endswith("tab=list")
+    assert len(d["items"]) <= 2
+    assert client.get("/api/equipment/lookup?q=ab").status_code == 400
+
+    html = client.get("/equipment/search?q=OEM-77121").get_data(as_text=True)
+    assert "OEM77120" in html or "OEM-77120" in html
+
+
+def test_quotes_in_query_are_literal(app, client, login):
+    login()
+    _seed()
+    assert similar_equipments('"""') == []
+    assert similar_equipments('VSN-"48213')[0]["vendor_sn"] == "VSN-48213"
+    r = client.get('/api/equipment/lookup?q=AB"CD')
+    assert r.status_code == 200 and r.get_json()["items"] == []
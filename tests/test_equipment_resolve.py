@@ -0,0 +1,67 @@
+# tests/test_equipment_resolve.py
+from sqlalchemy import event, text
+
+from app.extensions import db
+from app.models import EquipmentInfo
+from app.services import resolve_identifiers
+from app.services._legacy import ensure_case_room
+from app.services.search_service import MAC_NORMALIZED_SQL
+
+
+def _seed(n=0):
+    _, r1 = ensure_case_room("USA(Quincy)", "Hall-A")
+    db.session.add_all([
+        EquipmentInfo(vendor_sn="VSN-1", oem_sn="OEM-1", macaddr="aa:bb:cc:00:00:01", firmware="1", room_id=r1.id),
+        EquipmentInfo(vendor_sn="VSN-2", oem_sn="OEM-2", firmware="1"),
+    ])
+    db.session.add_all([
+        EquipmentInfo(vendor_sn=f"BULK-V{i}", oem_sn=f"BULK-O{i}", firmware="1", room_id=r1.id) for i in range(n)
+    ])
+    db.session.commit()
+
+
+def test_resolve_mixed_identifiers(app):
+    _seed()
+    out = resolve_identifiers(["OEM-1", "VSN-2", "AA-BB-CC-00-00-01", "nope"])
+    got = [(m["identifier"], m["matched_field"], m["vendor_sn"], m["case_name"]) for m in out["matches"]]
+    assert got == [
+        ("OEM-1", "oem_sn", "VSN-1", "USA(Quincy)"),
+        ("VSN-2", "vendor_sn", "VSN-2", None),
+        ("AA-BB-CC-00-00-01", "macaddr", "VSN-1", "USA(Quincy)"),
+    ]
+    assert out["misses"] == ["nope"]
+
+
+def test_resolve_is_set_based(app):
+    _seed(n=1200)
+    statements = []
+    listener = lambda *a: statements.append(a[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        ids = [f"BULK-V{i}" for i in range(1200)] + [f"miss-{i}" for i in range(800)]
+        out = resolve_identifiers(ids)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert len(out["matches"]) == 1200 and len(out["misses"]) == 800
+    # 2000 ids / 500 per chunk -> 4 SN queries + 2 MAC queries
+    assert len([s for s in statements if "equipment_info" in s]) <= 6
+
+
+def test_mac_lookup_uses_expression_index(app):
+    plan = db.session.execute(text(
+        f"EXPLAIN QUERY PLAN SELECT id FROM equipment_info WHERE {MAC_NORMALIZED_SQL} IN ('AABBCC000001')"
+    )).all()
+    assert "ix_equipment_mac_normalized" in " ".join(str(r[-1]) for r in plan)
+
+
+def test_resolve_api(app, client, login):
+    login()
+    _seed()
+    d = client.post("/api/equipment/resolve", json={"identifiers": ["VSN-1", "VSN-1", " x "]}).get_json()
+    assert (d["count"], d["matched"], d["misses"]) == (2, 1, ["x"])
+    assert d["matches"][0]["equipment_id"]
+
+    assert client.post("/api/equipment/resolve", json={"identifiers": "VSN-1"}).status_code == 400
+    too_many = {"identifiers": [str(i) for i in range(app.config["RESOLVE_MAX_IDENTIFIERS"] + 1)]}
+    assert client.post("/api/equipment/resolve", json=too_many).status_code == 400
@@ -0,0 +1,82 @@
+# tests/test_equipment_search.py
+from sqlalchemy import text
+
+from app.domain import EquipmentQuery
+from app.extensions import db
+from app.models import EquipmentInfo, Room
+from app.services import build_room_equipments_ctx, search_equipments
+from app.services._legacy import ensure_case_room
+from app.services.search_service import match_equipment_ids
+
+
+def _seed():
+    cs, r1 = ensure_case_room("USA(Quincy)", "Hall-A")
+    _, r2 = ensure_case_room("TW(Taipei)", "Hall-B")
+    db.session.add_all([
+        EquipmentInfo(vendor_sn="VSN-1001", oem_sn="OEM-0001", macaddr="aa:bb:cc:00:00:01", firmware="1.0", room_id=r1.id),
+        EquipmentInfo(vendor_sn="VSN-1002", oem_sn="OEM-0002", macaddr="aa:bb:cc:00:00:02", firmware="1.0", room_id=r1.id),
+        EquipmentInfo(vendor_sn="VSN-2001", oem_sn="X-0001", firmware="2.0", room_id=r2.id),
+    ])
+    db.session.commit()
+    return r1, r2
+
+
+def test_search_is_ranked_and_fleet_wide(app):
+    _seed()
+    assert [x["oem_sn"] for x in search_equipments("OEM-0002")] == ["OEM-0002"]
+    assert {x["oem_sn"] for x in search_equipments("0001")} == {"OEM-0001", "X-0001"}
+    assert [x["oem_sn"] for x in search_equipments("aa:bb:cc:00:00:01")] == ["OEM-0001"]
+
+    # prefix + case / room names
+    assert {x["oem_sn"] for x in search_equipments("VSN-10")} == {"OEM-0001", "OEM-0002"}
+    hit = search_equipments("taipei")[0]
+    assert (hit["oem_sn"], hit["room_name"], hit["case_name"]) == ("X-0001", "Hall-B", "TW(Taipei)")
+
+    # an SN hit outranks a firmware-only hit
+    assert search_equipments("2.0 X")[0]["oem_sn"] == "X-0001"
+    assert search_equipments('"') == []
+
+
+def test_index_follows_updates_and_deletes(app):
+    r1, r2 = _seed()
+    eq = EquipmentInfo.query.filter_by(oem_sn="OEM-0001").one()
+    eq.oem_sn = "OEM-9999"
+    eq.room_id = r2.id
+    db.session.commit()
+    assert search_equipments("OEM-0001") == []
+    assert search_equipments("OEM-9999")[0]["room_name"] == "Hall-B"
+
+    Room.query.filter_by(id=r2.id).update({"room_name": "Hall-Z"})
+    db.session.commit()
+    assert search_equipments("hall-z")[0]["oem_sn"] in {"OEM-9999", "X-0001"}
+
+    EquipmentInfo.query.delete()
+    db.session.commit()
+    assert db.session.execute(text("SELECT count(*) FROM equipment_fts")).scalar() == 0
+
+
+def test_room_filter_uses_index(app):
+    r1, _ = _seed()
+    with app.test_request_context():
+        out = build_room_equipments_ctx(r1.case_scene_id, r1.id, EquipmentQuery(q="0001"))
+    assert [e.oem_sn for e in out["equipments"]] == ["OEM-0001"]
+
+
+def test_query_without_terms_matches_nothing(app):
+    r1, _ = _seed()
+    for q in ('"', " ", '" "'):
+        assert db.session.execute(match_equipment_ids(q)).all() == []
+        assert search_equipments(q) == []
+        with app.test_request_context():
+            # nothing searchable: the room list is not filtered
+            out = build_room_equipments_ctx(r1.case_scene_id, r1.id, EquipmentQuery(q=q))
+        assert len(out["equipments"]) == 2
+
+
+def test_search_page_and_api(app, client, login):
+    login()
+    _seed()
+    d = client.get("/api/equipment/search?q=OEM-0001").get_json()
+    assert d["count"] == 1 and d["items"][0]["url"].endswith("tab=list")
+    html = client.get("/equipment/search?q=OEM-0001").get_data(as_text=True)
+    assert "OEM-0001" in html and "OEM-0002" not in html
@@ -0,0 +1,111 @@
+# tests/test_export.py
+import csv
+import io
+
+from openpyxl import load_workbook
+
+from app.extensions import db
+from app.models import CaseScene, EquipmentManage, Room
+from tests.conftest import make_inspection_text
+
+
+def _upload(client, name, text, room="Hall-A"):
+    r = client.post(
+        "/api/uploads",
+        data={
+            "country": "USA(Quincy)",
+            "room": room,
+            "file_category": "inspection",
+            "file": (io.BytesIO(text.encode()), name),
+        },
+        content_type="multipart/form-data",
+    )
+    assert r.status_code < 300, r.get_json()
+
+
+def _seed(client, login):
+    login()
+    _upload(client, "OEM-1_Inspection_Result_1.csv", make_inspection_text("OEM-1", "VSN-1", software="1.0"))
+    _upload(client, "OEM-1_Inspection_Result_2.csv", make_inspection_text("OEM-1", "VSN-1", software="2.0"))
+    _upload(client, "OEM-2_Inspection_Result_1.csv", make_inspection_text("OEM-2", "VSN-2"), room="Hall-B")
+    return CaseScene.query.one(), Room.query.filter_by(room_name="Hall-A").one()
+
+
+def _csv_rows(resp):
+    text = resp.get_data().decode("utf-8-sig")
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def test_csv_export_streams_devices_with_latest_inspection(app, client, login):
+    cs, room = _seed(client, login)
+
+    r = client.get("/api/export/equipment.csv")
+    assert r.status_code == 200 and r.is_streamed
+    assert r.mimetype == "text/csv"
+    assert 'filename="equipment_fleet_' in r.headers["Content-Disposition"]
+    rows = {row["OEM SN"]: row for row in _csv_rows(r)}
+    assert sorted(rows) == ["OEM-1", "OEM-2"]
+    assert rows["OEM-1"]["System Software"] == "2.0"
+    assert rows["OEM-1"]["Inspection File"] == "OEM-1_Inspection_Result_2.csv"
+    assert rows["OEM-2"]["Room"] == "Hall-B" and rows["OEM-2"]["Model"] == "CDU-900"
+
+    # scoped: room / case
+    assert [row["OEM SN"] for row in _csv_rows(client.get(f"/api/export/equipment.csv?room_id={room.id}"))] == ["OEM-1"]
+    assert len(_csv_rows(client.get(f"/api/export/equipment.csv?case_scene_id={cs.id}"))) == 2
+
+
+def test_csv_header_is_the_first_chunk(app, client, login):
+    _seed(client, login)
+    app.config["EXPORT_CSV_FLUSH_ROWS"] = 1
+
+    r = client.get("/api/export/equipment.csv")
+    chunks = list(r.response)
+    assert chunks[0].decode("utf-8-sig").startswith("Equipment ID,Country")
+    assert len(chunks) == 3     # header + one per device
+
+
+def test_xlsx_export_with_history_sheet(app, client, login):
+    cs, room = _seed(client, login)
+    db.session.add(EquipmentManage(equipment_info_id=1, customer_changes="fan replaced", room_id=room.id))
+    db.session.commit()
+
+    r = client.get(f"/api/export/equipment.xlsx?case_scene_id={cs.id}&history=1")
+    assert r.status_code == 200 and r.is_streamed
+    wb = load_workbook(io.BytesIO(r.get_data()), read_only=True)
+    assert wb.sheetnames == ["Equipment", "History"]
+    equipment = list(wb["Equipment"].iter_rows(values_only=True))
+    assert equipment[0][:3] == ("Equipment ID", "Country", "Location") and len(equipment) == 3
+    history = list(wb["History"].iter_rows(values_only=True))
+    assert history[-1][-1] == "fan replaced"
+
+    rows = _csv_rows(client.get(f"/api/export/history.csv?room_id={room.id}"))
+    assert rows[-1]["Customer Changes"] == "fan replaced"
+    assert {row["Room"] for row in rows} == {"Hall-A"}
+
+
+def test_export_errors(app, client, login):
+    cs, room = _seed(client, login)
+
+    assert client.get("/api/export/equipment.csv?history=1").status_code == 400
+    assert client.get("/api/export/equipment.pdf").status_code == 404
+    assert client.get("/api/export/equipment.csv?room_id=999").status_code == 404
+    assert client.get(f"/api/export/equipment.csv?room_id={room.id}&case_scene_id=999").status_code == 404
+    assert client.get("/api/export/history.xlsx?case_scene_id=999").status_code == 404
+
+
+def test_formula_cells_are_neutralised(app, client, login):
+    cs, room = _seed(client, login)
+    db.session.add(EquipmentManage(equipment_info_id=1, customer_changes='=HYPERLINK("http://x","y")', room_id=room.id))
+    db.session.add(EquipmentManage(equipment_info_id=1, customer_changes="-2+3", room_id=room.id))
+    db.session.commit()
+
+    rows = _csv_rows(client.get(f"/api/export/history.csv?room_id={room.id}"))
+    assert [row["Customer Changes"] for row in rows[-2:]] == ["'=HYPERLINK(\"http://x\",\"y\")", "'-2+3"]
+    # ordinary values untouched
+    assert _csv_rows(client.get("/api/export/equipment.csv"))[0]["OEM SN"] == "OEM-1"
+
+    r = client.get(f"/api/export/history.xlsx?room_id={room.id}")
+    wb = load_workbook(io.BytesIO(r.get_data()))
+    cells = [row[-1] for row in wb["History"].iter_rows(min_row=2, values_only=True)]
+    assert cells[-2:] == ["'=HYPERLINK(\"http://x\",\"y\")", "'-2+3"]
+    assert all(c.data_type != "f" for row in wb["History"].iter_rows() for c in row)
@@ -0,0 +1,119 @@
+# tests/test_fleet_report.py
+import io
+import os
+
+from app.extensions import db
+from app.models import CaseScene, EquipmentInfo, InspectionRecord, Room
+from app.services import case_fleet_report, record_uploaded_files, room_fleet_report, versioned_cache
+from app.services._legacy import ensure_case_room
+from app.services.data_version import room_version
+from tests.conftest import make_inspection_text
+
+
+def _upload(client, name, text, room="Hall-A"):
+    r = client.post(
+        "/api/uploads",
+        data={
+            "country": "USA(Quincy)",
+            "room": room,
+            "file_category": "inspection",
+            "file": (io.BytesIO(text.encode()), name),
+        },
+        content_type="multipart/form-data",
+    )
+    assert r.status_code < 300, r.get_json()
+
+
+def _legacy_files(app, room, n):
+    """inspection files from before InspectionRecord: flat folder + upload index only"""
+    cs = room.case_scene
+    folder = os.path.join(app.config["UPLOAD_FOLDER"], "Inspection")
+    os.makedirs(folder, exist_ok=True)
+    names = []
+    for i in range(n):
+        name = f"OEM-L{i}_Inspection_Result_1.csv"
+        with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+            f.write(make_inspection_text(f"OEM-L{i}", f"VSN-L{i}", software=f"9.{i}"))
+        names.append(name)
+    record_uploaded_files(cs, room, [(name, "inspection", None) for name in names])
+    db.session.commit()
+    return names
+
+
+def test_room_report_has_latest_inspection_per_device(app, client, login):
+    login()
+    _upload(client, "OEM-1_Inspection_Result_1.csv", make_inspection_text("OEM-1", "VSN-1", software="1.0"))
+    _upload(client, "OEM-1_Inspection_Result_2.csv", make_inspection_text("OEM-1", "VSN-1", software="2.0"))
+    _upload(client, "OEM-2_Inspection_Result_1.csv", make_inspection_text("OEM-2", "VSN-2"))
+    cs, room = CaseScene.query.one(), Room.query.one()
+
+    report = room_fleet_report(cs.id, room.id)["report"]
+    rows = {r["oem_sn"]: r for r in report["rows"]}
+    assert (report["devices"], report["inspected"]) == (2, 2)
+    assert rows["OEM-1"]["filename"] == "OEM-1_Inspection_Result_2.csv"
+    assert rows["OEM-1"]["fields"]["system_software"] == "2.0"
+    assert rows["OEM-2"]["fields"]["model"] == "CDU-900"
+
+    html = client.get(f"/equipment/case-scenes/{cs.id}/rooms/{room.id}/fleet-report").get_data(as_text=True)
+    assert "OEM-1_Inspection_Result_2.csv" in html and "CDU-900" in html
+
+
+def test_unrecorded_files_are_parsed_in_a_process_pool(app):
+    app.config.update(FLEET_REPORT_WORKERS=2, FLEET_REPORT_PARALLEL_MIN=2)
+    cs, room = ensure_case_room("USA(Quincy)", "Hall-A")
+    names = _legacy_files(app, room, 4)
+    # devices exist (registered earlier), their files were never parsed into records
+    db.session.add_all([
+        EquipmentInfo(oem_sn=f"OEM-L{i}", vendor_sn=f"VSN-L{i}", firmware="x", room_id=room.id) for i in range(4)
+    ])
+    db.session.commit()
+
+    report = room_fleet_report(cs.id, room.id)["report"]
+    assert report["parsed"] == 4 and report["inspected"] == 4
+    assert sorted(r["fields"]["system_software"] for r in report["rows"]) == ["9.0", "9.1", "9.2", "9.3"]
+    records = InspectionRecord.query.filter(InspectionRecord.filename.in_(names)).all()
+    assert len(records) == 4 and {r.room_id for r in records} == {room.id}
+
+
+def test_report_is_cached_until_an_upload_lands_in_the_room(app, client, login):
+    login()
+    _upload(client, "OEM-1_Inspection_Result_1.csv", make_inspection_text("OEM-1", "VSN-1"))
+    cs, room = CaseScene.query.one(), Room.query.one()
+
+    first = room_fleet_report(cs.id, room.id)["report"]
+    cache = versioned_cache(room_version(room.id))
+    assert room_fleet_report(cs.id, room.id)["report"] is first
+    assert cache.hits == 1
+
+    # upload elsewhere: this room's report stays cached
+    _upload(client, "OEM-9_Inspection_Result_1.csv", make_inspection_text("OEM-9", "VSN-9"), room="Hall-B")
+    assert room_fleet_report(cs.id, room.id)["report"] is first
+
+    _upload(client, "OEM-2_Inspection_Result_1.csv", make_inspection_text("OEM-2", "VSN-2"))
+    rebuilt = room_fleet_report(cs.id, room.id)["report"]
+    assert rebuilt is not first
+    assert sorted(r["oem_sn"] for r in rebuilt["rows"]) == ["OEM-1", "OEM-2"]
+
+    # a device moving to Hall-B leaves Hall-A's report
+    _upload(client, "OEM-2_Inspection_Result_2.csv", make_inspection_text("OEM-2", "VSN-2", software="3"), room="Hall-B")
+    assert [r["oem_sn"] for r in room_fleet_report(cs.id, room.id)["report"]["rows"]] == ["OEM-1"]
+
+
+def test_case_report_and_api(app, client, login):
+    login()
+    _upload(client, "OEM-1_Inspection_Result_1.csv", make_inspection_text("OEM-1", "VSN-1"))
+    _upload(client, "OEM-2_Inspection_Result_1.csv", make_inspection_text("OEM-2", "VSN-2"), room="Hall-B")
+    cs = CaseScene.query.one()
+
+    report = case_fleet_report(cs.id)["report"]
+    assert sorted((r["room_name"], r["oem_sn"]) for r in report["rows"]) == [("Hall-A", "OEM-1"), ("Hall-B", "OEM-2")]
+
+    body = client.get(f"/api/case-scenes/{cs.id}/fleet-report").get_json()
+    assert body["devices"] == 2 and body["room_id"] is None
+    assert "system_software" in body["columns"] and body["rows"][0]["uploaded_at"]
+
+    room = Room.query.filter_by(room_name="Hall-B").one()
+    body = client.get(f"/api/case-scenes/{cs.id}/rooms/{room.id}/fleet-report").get_json()
+    assert [r["oem_sn"] for r in body["rows"]] == ["OEM-2"]
+    assert client.get(f"/api/case-scenes/{cs.id}/rooms/999/fleet-report").status_code == 404
+    assert client.get(f"/equipment/case-scenes/{cs.id}/fleet-report").status_code == 200
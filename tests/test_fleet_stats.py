@@ -0,0 +1,74 @@
+# tests/test_fleet_stats.py
+import io
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import CaseScene, Room
+from app.services import STATS, case_stats, get_fleet_stats, room_stats, versioned_cache
+
+from .conftest import make_inspection_text
+
+
+def _upload(client, room, sn, name=None, category="inspection", type_id=1, software="1.2.3"):
+    text = make_inspection_text(sn, sn, software=software) if category == "inspection" else "log line\n"
+    return client.post(
+        "/api/uploads",
+        data={
+            "country": "USA(Quincy)",
+            "room": room,
+            "file_category": category,
+            "equipment_type_id": type_id,
+            "file": (io.BytesIO(text.encode()), name or f"{sn}_Inspection_Result_1.csv"),
+        },
+        content_type="multipart/form-data",
+    )
+
+
+def test_counts_follow_uploads(app, client, login):
+    login()
+    _upload(client, "R1", "OEM-1")
+    _upload(client, "R1", "OEM-2", type_id=2)
+    _upload(client, "R2", "OEM-3")
+    _upload(client, "R2", "x", name="notes.txt", category="other")
+
+    r1 = Room.query.filter_by(room_name="R1").one()
+    r2 = Room.query.filter_by(room_name="R2").one()
+    s1 = room_stats(r1.id)
+    assert s1["equipment"] == 2
+    assert s1["equipment_by_type"] == {1: 1, 2: 1}
+    assert s1["uploads_by_category"] == {"inspection": 2}
+    assert s1["latest_inspection_at"] is not None
+
+    assert room_stats(r2.id)["uploads_by_category"] == {"inspection": 1, "other": 1}
+    cs = case_stats(CaseScene.query.one().id)
+    assert (cs["equipment"], cs["uploads"]) == (3, 4)
+    assert cs["equipment_by_type"] == {1: 2, 2: 1}
+
+    # re-inspection moves OEM-3 to R1: both rooms updated
+    _upload(client, "R1", "OEM-3", name="OEM-3_Inspection_Result_2.csv", software="2.0")
+    assert room_stats(r1.id)["equipment"] == 3
+    assert room_stats(r2.id)["equipment"] == 0
+
+
+def test_case_page_renders_counts_without_per_room_queries(app, client, login):
+    login()
+    for i in range(6):
+        _upload(client, f"R{i}", f"OEM-{i}")
+    cs_id = CaseScene.query.one().id
+    client.get(f"/equipment/case-scenes/{cs_id}")   # warm the caches
+
+    statements = []
+    listener = lambda *a: statements.append(a[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        html = client.get(f"/equipment/case-scenes/{cs_id}").get_data(as_text=True)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert "設備 6 台" in html
+    assert "設備 1 台" in html
+    assert not any("count(" in s.lower() for s in statements)
+    before = versioned_cache(STATS).stats()["misses"]
+    get_fleet_stats()
+    assert versioned_cache(STATS).stats()["misses"] == before
@@ -0,0 +1,96 @@
+# tests/test_ingest_queue.py
+import io
+import os
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import EquipmentInfo, IngestJob
+from app.services import get_ingest_queue, recover_ingest_jobs
+
+from .conftest import make_inspection_text
+
+
+def _post(client, text, **headers):
+    return client.post(
+        "/api/uploads",
+        data={
+            "country": "USA(Quincy)",
+            "room": "R1",
+            "file_category": "inspection",
+            "file": (io.BytesIO(text.encode()), "OEM-1_Inspection_Result_1.csv"),
+        },
+        content_type="multipart/form-data",
+        headers=headers,
+    )
+
+
+def test_async_upload_returns_202_and_job_finishes(app, client, login):
+    login()
+    r = _post(client, make_inspection_text("OEM-1", "V-1"), Prefer="respond-async")
+    assert r.status_code == 202
+    job = r.get_json()
+    assert job["state"] in ("queued", "running", "succeeded")
+    assert r.headers["Location"] == job["status_url"]
+
+    assert get_ingest_queue().wait_idle(timeout=10)
+
+    status = client.get(job["status_url"]).get_json()
+    assert status["state"] == "succeeded", status
+    assert status["stored_filename"] == "OEM-1_Inspection_Result_1.csv"
+    assert status["run_ms"] is not None
+    assert EquipmentInfo.query.filter_by(oem_sn="OEM-1").count() == 1
+
+
+def test_async_upload_failure_is_reported(app, client, login):
+    login()
+    r = _post(client, "Model,X\n", Prefer="respond-async")
+    assert r.status_code == 202
+    assert get_ingest_queue().wait_idle(timeout=10)
+
+    status = client.get(r.get_json()["status_url"]).get_json()
+    assert status["state"] == "failed"
+    assert "Serial Number" in status["error"]
+    assert EquipmentInfo.query.count() == 0
+
+
+def test_sync_upload_still_default(app, client, login):
+    login()
+    r = _post(client, make_inspection_text())
+    assert r.status_code == 200
+    assert r.get_json()["filename"] == "OEM-1_Inspection_Result_1.csv"
+
+
+def _left_behind(app, job_id, state, staged_text=None, minutes_ago=60):
+    sdir = os.path.join(app.instance_path, "ingest_staging", job_id)
+    path = os.path.join(sdir, "OEM-1_Inspection_Result_1.csv")
+    if staged_text is not None:
+        os.makedirs(sdir)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(staged_text)
+    when = datetime.now() - timedelta(minutes=minutes_ago)
+    db.session.add(IngestJob(
+        id=job_id, state=state, filename="OEM-1_Inspection_Result_1.csv", staged_path=path,
+        country="USA(Quincy)", room="R1", file_category="inspection", user_id=1,
+        queued_at=when, started_at=when if state == "running" else None,
+    ))
+    db.session.commit()
+
+
+def test_jobs_left_by_a_dead_process_are_recovered(app):
+    _left_behind(app, "a" * 32, "running", make_inspection_text("OEM-1", "V-1"))
+    _left_behind(app, "b" * 32, "queued")                       # staged file gone
+    _left_behind(app, "c" * 32, "running", "x", minutes_ago=0)  # still running elsewhere
+
+    assert recover_ingest_jobs() == dict(requeued=1, failed=1)
+    assert get_ingest_queue().wait_idle(timeout=10)
+
+    states = {j.id[0]: j.state for j in IngestJob.query}
+    assert states == {"a": "succeeded", "b": "failed", "c": "running"}
+    assert EquipmentInfo.query.filter_by(oem_sn="OEM-1").count() == 1
+
+
+def test_polling_a_stale_job_recovers_it(app, client, login):
+    login()
+    _left_behind(app, "d" * 32, "running")
+    status = client.get(f"/api/jobs/{'d' * 32}").get_json()
+    assert status["state"] == "failed" and "重新上傳" in status["error"]
@@ -0,0 +1,101 @@
+# tests/test_inspection_parser.py
+import pytest
+
+from app.services import parse_equipment_file
+from app.services.inspection_parser import MAX_LINE_BYTES, InspectionFieldCollector, match_field, split_key_value
+from app.services.parser_bench import benchmark_parser, real_inspection_paths, write_synthetic_corpus
+
+from .conftest import make_inspection_text
+
+
+@pytest.mark.parametrize("key, field", [
+    ("Vendor SN", "vendor_sn"),
+    ("VENDOR sn", "vendor_sn"),
+    ("Serial Number", "serial_number"),
+    ("Control Firmware Version", "control_firmware"),
+    # both patterns in one key: the earlier FIELD_MAP entry wins (overlapping too)
+    ("Last Inspection Details", "inspection_details"),
+    ("Model / Serial Number", "serial_number"),
+    ("Timestamp", None),
+    ("", None),
+])
+def test_match_field(key, field):
+    assert match_field(key) == field
+
+
+def test_supported_line_formats(tmp_path):
+    path = tmp_path / "x_Inspection_Result_1.csv"
+    path.write_text(
+        "Serial Number,OEM-1\n"
+        "Vendor SN: 'VSN-1'\n"
+        "Model \"CDU-900\"\n"
+        "Eth1,10.0.0.1\n"
+        "Supply Temp,20.5,30.1\n",
+        encoding="utf-8",
+    )
+    info = parse_equipment_file(str(path))
+    assert (info["serial_number"], info["vendor_sn"], info["model"], info["eth1"]) == (
+        "OEM-1", "VSN-1", "CDU-900", "10.0.0.1"
+    )
+    assert split_key_value("Vendor SN: 'VSN-1'") == ("vendor sn", "VSN-1")
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+def test_line_budget_and_newlines(tmp_path, newline):
+    lines = ["Serial Number,A", "Model,M", "", "Vendor SN,V", "Serial Number,B"]
+    path = tmp_path / "x.csv"
+    path.write_bytes(newline.join(lines).encode())
+
+    assert parse_equipment_file(str(path), max_lines=3)["vendor_sn"] == ""
+    info = parse_equipment_file(str(path), max_lines=5)
+    assert (info["serial_number"], info["vendor_sn"]) == ("B", "V")   # last value wins
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+def test_chunk_boundaries_do_not_change_lines(newline):
+    data = newline.join(["Serial Number,A", "", "Model,M", "Vendor SN,V"]).encode()
+    whole, bytewise = InspectionFieldCollector(max_lines=4), InspectionFieldCollector(max_lines=4)
+    whole.feed(data)
+    for i in range(len(data)):
+        bytewise.feed(data[i:i + 1])
+        assert len(bytewise._pending) <= len("Serial Number,A") + 1   # a held "\r" at most
+    assert bytewise.line_count == whole.line_count == 3
+    assert bytewise.result() == whole.result()
+    assert whole.result()["vendor_sn"] == "V"
+
+
+def test_line_without_break_is_not_buffered():
+    collector = InspectionFieldCollector(max_lines=3)
+    blob = b"\x00" * 65536
+    for _ in range(64):   # 4 MiB, no line break
+        collector.feed(blob)
+        assert len(collector._pending) <= MAX_LINE_BYTES
+    assert collector.line_count == 1
+
+    collector.feed(b"tail of it\r\nSerial Number,OEM-1\n")
+    assert collector.line_count == 2
+    assert collector.result()["serial_number"] == "OEM-1"
+
+
+def test_non_ascii_keys_fall_back_line_by_line():
+    collector = InspectionFieldCollector()
+    collector.feed("İ note,x\nSerial Number,OEM-é\n".encode())
+    assert collector.result()["serial_number"] == "OEM-é"
+
+
+def test_benchmark_reports_throughput(app, tmp_path):
+    paths = write_synthetic_corpus(str(tmp_path), 5, data_lines=20)
+    assert parse_equipment_file(paths[3])["serial_number"] == "OEM-000003"
+
+    result = benchmark_parser("synthetic", paths, repeat=1)
+    assert result.files == 5 and result.bytes > 0
+    assert result.files_per_sec > 0 and result.mb_per_sec > 0
+
+    real = tmp_path / "old_Inspection_Result_1.csv"
+    real.write_text(make_inspection_text(), encoding="utf-8")
+    assert str(real) in real_inspection_paths([str(tmp_path)])
+
+    out = app.test_cli_runner().invoke(args=["bench-parser", "--synthetic", "3", "--repeat", "1", str(real)])
+    assert out.exit_code == 0, out.output
+    assert "synthetic: files=3" in out.output and "real: files=1" in out.output
+    assert "files/sec=" in out.output and "MB/sec=" in out.output
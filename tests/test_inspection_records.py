@@ -0,0 +1,184 @@
+# tests/test_inspection_records.py
+import io
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import app.services._legacy as legacy
+from app.extensions import db
+from app.models import CaseScene, InspectionRecord, Room
+from app.services import (
+    backfill_inspection_records,
+    build_case_room_report_ctx,
+    build_inspection_report_context,
+    init_inspection_records,
+    latest_room_inspection,
+    record_uploaded_files,
+)
+from app.services._legacy import ensure_case_room
+from app.services.inspection_records import inspection_backfill_pending
+from tests.conftest import make_inspection_text
+
+
+def _upload(client, name, text, url="/api/uploads"):
+    field = "files" if url.endswith("batch") else "file"
+    return client.post(
+        url,
+        data={
+            "country": "USA(Quincy)",
+            "room": "Hall-A",
+            "file_category": "inspection",
+            field: (io.BytesIO(text.encode()), name),
+        },
+        content_type="multipart/form-data",
+    )
+
+
+def test_ingest_stores_parsed_record(app, client, login):
+    login()
+    assert _upload(client, "A_Inspection_Result_1.csv", make_inspection_text("OEM-1", "VSN-1")).status_code < 300
+    assert _upload(client, "B_Inspection_Result_1.csv", make_inspection_text("OEM-2", "VSN-2"),
+                   url="/api/uploads/batch").status_code < 300
+
+    records = {r.filename: r for r in InspectionRecord.query}
+    assert set(records) == {"A_Inspection_Result_1.csv", "B_Inspection_Result_1.csv"}
+    a = records["A_Inspection_Result_1.csv"]
+    assert (a.fields["serial_number"], a.fields["vendor_sn"], a.fields["firmware"]) == ("OEM-1", "VSN-1", "1.2.3,4.5")
+    assert len(a.sha256) == 64 and a.equipment_id and a.parsed_at
+
+
+def test_report_reads_record_without_parsing(app, client, login, monkeypatch):
+    login()
+    _upload(client, "A_Inspection_Result_1.csv", make_inspection_text("OEM-1", "VSN-1"))
+
+    def no_parse(*a, **kw):
+        raise AssertionError("report re-parsed the file")
+
+    monkeypatch.setattr(legacy, "parse_equipment_file", no_parse)
+    monkeypatch.setattr(legacy, "resolve_upload_path", no_parse)
+    cs, room = CaseScene.query.one(), Room.query.one()
+    html = client.get(f"/equipment/case-scenes/{cs.id}/rooms/{room.id}").get_data(as_text=True)
+    assert "OEM-1" in html and "VSN-1" in html
+
+
+def test_legacy_file_falls_back_and_backfills(app):
+    cs, room = ensure_case_room("USA(Quincy)", "Hall-A")
+    folder = os.path.join(app.config["UPLOAD_FOLDER"], "Inspection")
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, "old_Inspection_Result.csv"), "w", encoding="utf-8") as f:
+        f.write(make_inspection_text("OEM-OLD", "VSN-OLD"))
+    record_uploaded_files(cs, room, [("old_Inspection_Result.csv", "inspection", None)])
+    db.session.commit()
+
+    ctx = build_inspection_report_context("old_Inspection_Result.csv")
+    assert ctx["info"]["serial_number"] == "OEM-OLD" and ctx["category"] == "Inspection"
+
+    assert backfill_inspection_records() == dict(parsed=1, missing=0, located=0)
+    record = InspectionRecord.query.filter_by(filename="old_Inspection_Result.csv").one()
+    assert record.sha256 is None and record.room_id == room.id and record.uploaded_at
+    assert backfill_inspection_records() == dict(parsed=0, missing=0, located=0)
+
+    # record from before room_id / uploaded_at: located from the upload index
+    record.room_id = record.uploaded_at = None
+    db.session.commit()
+    assert backfill_inspection_records() == dict(parsed=0, missing=0, located=1)
+    assert latest_room_inspection(room.id).filename == "old_Inspection_Result.csv"
+
+
+def test_latest_inspection_is_tracked_at_ingest(app, client, login, monkeypatch):
+    login()
+    _upload(client, "A_Inspection_Result_1.csv", make_inspection_text("OEM-1", "VSN-1"))
+    _upload(client, "B_Inspection_Result_1.csv", make_inspection_text("OEM-2", "VSN-2"))
+    cs, room = CaseScene.query.one(), Room.query.one()
+    records = {r.filename: r for r in InspectionRecord.query}
+    assert {r.room_id for r in records.values()} == {room.id}
+    assert all(r.uploaded_at for r in records.values())
+
+    # 上傳時間決定，不是檔名 / 檔案 mtime
+    records["A_Inspection_Result_1.csv"].uploaded_at = datetime.now() + timedelta(minutes=1)
+    db.session.commit()
+
+    def no_stat(*a, **kw):
+        raise AssertionError("report scanned the room's files")
+
+    monkeypatch.setattr(legacy, "resolve_upload_path", no_stat)
+    monkeypatch.setattr(legacy, "parse_equipment_file", no_stat)
+    ctx = build_case_room_report_ctx(cs.id, room.id, "inspection")
+    assert ctx["report_filename"] == "A_Inspection_Result_1.csv"
+    assert ctx["report_ctx"]["info"]["serial_number"] == "OEM-1"
+
+    eq_b = records["B_Inspection_Result_1.csv"].equipment_id
+    body = client.get(f"/api/equipment/{eq_b}/inspection/latest").get_json()
+    assert body["filename"] == "B_Inspection_Result_1.csv" and body["room_id"] == room.id
+    assert body["fields"]["vendor_sn"] == "VSN-2"
+    assert client.get("/api/equipment/9999/inspection/latest").status_code == 404
+
+
+def test_deduplicated_file_is_the_latest_of_its_second_room(app, client, login):
+    login()
+    text = make_inspection_text("OEM-1", "VSN-1")
+    assert _upload(client, "A_Inspection_Result_1.csv", text).status_code == 200
+    r = client.post(
+        "/api/uploads",
+        data={
+            "country": "USA(Quincy)",
+            "room": "Hall-B",
+            "file_category": "inspection",
+            "file": (io.BytesIO(text.encode()), "A_copy_Inspection_Result_1.csv"),
+        },
+        content_type="multipart/form-data",
+    )
+    assert r.status_code == 200 and r.get_json()["duplicate"]
+
+    cs, hall_b = CaseScene.query.one(), Room.query.filter_by(room_name="Hall-B").one()
+    assert InspectionRecord.query.count() == 1
+    assert latest_room_inspection(hall_b.id).filename == "A_Inspection_Result_1.csv"
+    ctx = build_case_room_report_ctx(cs.id, hall_b.id, "inspection")
+    assert ctx["report_ctx"]["info"]["serial_number"] == "OEM-1"
+
+
+def test_legacy_files_are_recorded_at_startup_not_on_page_load(app, monkeypatch):
+    cs, room = ensure_case_room("USA(Quincy)", "Hall-A")
+    folder = os.path.join(app.config["UPLOAD_FOLDER"], "Inspection")
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, "old_Inspection_Result.csv"), "w", encoding="utf-8") as f:
+        f.write(make_inspection_text("OEM-OLD", "VSN-OLD"))
+    record_uploaded_files(cs, room, [("old_Inspection_Result.csv", "inspection", None)])
+    # a room whose files hold no inspection at all
+    _, logs_room = ensure_case_room("USA(Quincy)", "Hall-L")
+    record_uploaded_files(cs, logs_room, [("boot.log", "logs", None)])
+    db.session.commit()
+
+    assert inspection_backfill_pending()
+    init_inspection_records(app)
+    assert not inspection_backfill_pending()
+    assert InspectionRecord.query.one().room_id == room.id
+
+    # page loads: no stat, no parse, no commit
+    monkeypatch.setattr(os.path, "exists", lambda p: pytest.fail(f"stat {p}"))
+    monkeypatch.setattr(legacy, "parse_equipment_file", lambda *a, **kw: pytest.fail("parsed"))
+    monkeypatch.setattr(db.session, "commit", lambda: pytest.fail("commit on a read path"))
+    for _ in range(2):
+        ctx = build_case_room_report_ctx(cs.id, room.id, "inspection")
+        assert ctx["report_ctx"]["info"]["serial_number"] == "OEM-OLD"
+        assert build_case_room_report_ctx(cs.id, logs_room.id, "inspection")["report_filename"] == ""
+
+
+def test_records_without_room_are_located_at_startup(app):
+    cs, room = ensure_case_room("USA(Quincy)", "Hall-A")
+    folder = os.path.join(app.config["UPLOAD_FOLDER"], "Inspection")
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, "old_Inspection_Result.csv"), "w", encoding="utf-8") as f:
+        f.write(make_inspection_text("OEM-OLD", "VSN-OLD"))
+    record_uploaded_files(cs, room, [("old_Inspection_Result.csv", "inspection", None)])
+    db.session.commit()
+    backfill_inspection_records()
+    record = InspectionRecord.query.one()
+    record.room_id = record.uploaded_at = None   # written before those columns existed
+    db.session.commit()
+
+    assert inspection_backfill_pending()
+    init_inspection_records(app)
+    assert InspectionRecord.query.one().room_id == room.id
+    assert build_case_room_report_ctx(cs.id, room.id, "inspection")["report_filename"] == "old_Inspection_Result.csv"
@@ -0,0 +1,82 @@
+# tests/test_query_budget.py
+"""
+SQL statements per request: each endpoint has a budget, and a room with many
+devices must cost exactly as many queries as a room with a few (no N+1).
+"""
+import pytest
+
+from app.domain import EquipmentQuery
+from app.extensions import db
+from app.models import EquipmentInfo
+from app.services import build_case_room_report_ctx, build_room_equipments_ctx, search_equipments
+from app.services._legacy import ensure_case_room
+from tests.conftest import count_queries
+
+# url template -> max statements per request (includes the flask-login user load)
+BUDGETS = {
+    "/equipment/case-scenes/{cs}/rooms/{room}/equipments?tab=list": 5,
+    "/equipment/case-scenes/{cs}/rooms/{room}/equipments?tab=upload": 6,
+    "/equipment/case-scenes/{cs}/rooms/{room}": 6,
+    "/equipment/case-scenes/{cs}": 4,
+    "/equipment/list": 3,
+    "/equipment/search?q=OEM": 5,
+    "/api/equipment/datatable?room_id={room}&length=500": 2,
+    "/api/equipment?room_id={room}&limit=500": 1,
+    "/api/equipment/search?q=OEM": 2,
+    "/api/tree/case-scenes": 3,
+    "/api/tree/case-scenes/{cs}/rooms": 3,
+}
+
+
+def _add_devices(room, n, start=0):
+    db.session.add_all([
+        EquipmentInfo(vendor_sn=f"VSN-{i}", oem_sn=f"OEM-{i}", firmware="1",
+                      room_id=room.id, equipment_type_id=1 + i % 3)
+        for i in range(start, start + n)
+    ])
+    db.session.commit()
+    db.session.expire_all()
+
+
+def _measure(client, url):
+    client.get(url)          # warm per-process caches (tree / stats / index)
+    with count_queries() as statements:
+        resp = client.get(url)
+    assert resp.status_code == 200, url
+    return len(statements)
+
+
+@pytest.mark.parametrize("template", sorted(BUDGETS))
+def test_request_query_budget(app, client, login, template):
+    login()
+    cs, room = ensure_case_room("USA(Quincy)", "Hall-A")
+    db.session.commit()
+    url = template.format(cs=cs.id, room=room.id)
+
+    _add_devices(room, 3)
+    few = _measure(client, url)
+    _add_devices(room, 60, start=3)
+    many = _measure(client, url)
+
+    assert many == few, f"{url}: {few} queries with 3 devices, {many} with 63"
+    assert many <= BUDGETS[template], f"{url}: {many} queries (budget {BUDGETS[template]})"
+
+
+def test_listed_rows_have_relationships_loaded(app):
+    cs, room = ensure_case_room("USA(Quincy)", "Hall-A")
+    _add_devices(room, 20)
+
+    rows = {
+        "room": build_room_equipments_ctx(cs.id, room.id, EquipmentQuery())["equipments"],
+        "report": build_case_room_report_ctx(cs.id, room.id, "inspection")["equipments"],
+    }
+    with count_queries() as statements:
+        for eqs in rows.values():
+            assert len(eqs) == 20
+            for e in eqs:
+                (e.room.room_name, e.room.case_scene.country, e.equipment_type.name)
+    assert statements == []
+
+    with count_queries() as statements:
+        search_equipments("OEM", limit=20)
+    assert len(statements) == 2   # FTS hits + one joined load
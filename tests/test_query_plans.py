@@ -0,0 +1,136 @@
+# tests/test_query_plans.py
+"""
+EXPLAIN QUERY PLAN on the real query shapes: every filtered SELECT a service
+runs for one room / case / device must use an index, never `SCAN <table>`.
+(Unfiltered reads of a whole table, e.g. the fleet-wide stats, are allowed.)
+"""
+import re
+import warnings
+
+import pytest
+from sqlalchemy import event, text
+
+from app.domain import EquipmentQuery
+from app.extensions import db
+from app.models import EquipmentInfo, EquipmentManage, EquipmentType, IngestJob
+from app.services import (
+    build_case_room_report_ctx,
+    build_room_equipments_ctx,
+    case_fleet_report,
+    equipment_datatable,
+    get_case_context,
+    get_fleet_stats,
+    latest_equipment_inspection,
+    latest_room_inspection,
+    list_case_rooms,
+    parse_datatables_request,
+    read_equipment,
+    resolve_identifiers,
+    room_fleet_report,
+    room_uploaded_files,
+    upgrade_schema,
+)
+from app.services._legacy import ensure_case_room
+
+_SCAN = re.compile(r"^SCAN (\w+)")
+
+
+def _seed():
+    cs, r1 = ensure_case_room("USA(Quincy)", "Hall-A")
+    _, r2 = ensure_case_room("USA(Quincy)", "Hall-B")
+    for i in range(20):
+        db.session.add(EquipmentInfo(
+            vendor_sn=f"VSN-{i}", oem_sn=f"OEM-{i}", firmware="1", macaddr=f"aa:00:{i:02d}",
+            room_id=(r1.id if i % 2 else r2.id), equipment_type_id=1 + i % 3,
+        ))
+    db.session.flush()
+    db.session.add(EquipmentManage(equipment_info_id=1, room_id=r1.id, customer_changes="x"))
+    db.session.commit()
+    db.session.expire_all()
+    return cs, r1
+
+
+def _full_scans(fn):
+    """Run fn, EXPLAIN every SELECT it issued; return [(table, sql)] for full table scans."""
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert statements, "no query captured"
+
+    tables = set(db.metadata.tables)
+    scans = []
+    conn = db.session.connection()
+    for sql, params in statements:
+        if "WHERE" not in sql.upper():
+            continue
+        for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params):
+            detail = row[-1]
+            m = _SCAN.match(detail)
+            if m and m.group(1) in tables and "INDEX" not in detail:
+                scans.append((m.group(1), sql))
+    return scans
+
+
+SHAPES = {
+    "room_page": lambda cs, r: build_room_equipments_ctx(cs.id, r.id, EquipmentQuery()),
+    "room_page_type": lambda cs, r: build_room_equipments_ctx(cs.id, r.id, EquipmentQuery(type_id=2)),
+    "room_page_q": lambda cs, r: build_room_equipments_ctx(cs.id, r.id, EquipmentQuery(q="OEM-1")),
+    "room_report": lambda cs, r: build_case_room_report_ctx(cs.id, r.id, "inspection"),
+    "room_latest_inspection": lambda cs, r: latest_room_inspection(r.id),
+    "device_latest_inspection": lambda cs, r: latest_equipment_inspection(1),
+    "room_fleet_report": lambda cs, r: room_fleet_report(cs.id, r.id),
+    "case_fleet_report": lambda cs, r: case_fleet_report(cs.id),
+    "case_context": lambda cs, r: get_case_context(cs.id),
+    "case_room_upsert": lambda cs, r: ensure_case_room("USA(Quincy)", "Hall-A"),
+    "tree_rooms_page": lambda cs, r: list_case_rooms(cs.id),
+    "room_uploads": lambda cs, r: room_uploaded_files(r.id, "inspection"),
+    "fleet_stats": lambda cs, r: get_fleet_stats(),
+    "sn_lookup": lambda cs, r: EquipmentInfo.query.filter_by(oem_sn="OEM-3").first(),
+    "resolve": lambda cs, r: resolve_identifiers(["OEM-3", "VSN-4", "AA-00-05"]),
+    "device_history": lambda cs, r: db.session.get(EquipmentInfo, 1).manage_records,
+    "room_history": lambda cs, r: r.equipment_manage,
+    "room_equipment_rel": lambda cs, r: r.equipment_info,
+    "type_equipment_rel": lambda cs, r: db.session.get(EquipmentType, 2).equipments,
+    "read_api_room": lambda cs, r: read_equipment(EquipmentQuery(type_id=2), room_id=r.id),
+    "datatable_room": lambda cs, r: equipment_datatable(
+        parse_datatables_request({"length": "10", "search[value]": "OEM"}), room_id=r.id, type_id=1
+    ),
+}
+
+
+@pytest.mark.parametrize("shape", sorted(SHAPES))
+def test_query_shape_uses_indexes(app, shape):
+    cs, r1 = _seed()
+    with app.test_request_context():
+        scans = _full_scans(lambda: SHAPES[shape](cs, r1))
+    assert scans == [], f"{shape}: full table scan(s): {scans}"
+
+
+def test_upgrade_schema_adds_missing_columns_and_indexes(app):
+    # the expression index on equipment_info (search_service) is no reflection warning
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert upgrade_schema() == dict(columns=[], indexes=[], skipped=[])
+
+    # 模擬舊版 DB：沒有新 index、沒有 ingest_jobs.duplicate
+    db.session.execute(text("DROP INDEX ix_equipment_info_room_oem"))
+    db.session.execute(text("DROP INDEX ix_equipment_manage_equipment"))
+    db.session.execute(text("ALTER TABLE ingest_jobs DROP COLUMN duplicate"))
+    db.session.commit()
+
+    out = upgrade_schema()
+    assert out["columns"] == ["ingest_jobs.duplicate"]
+    assert sorted(out["indexes"]) == ["ix_equipment_info_room_oem", "ix_equipment_manage_equipment"]
+    assert upgrade_schema() == dict(columns=[], indexes=[], skipped=[])
+
+    db.session.add(IngestJob(id="j1", filename="a.csv", staged_path="/tmp/a", country="USA(Q)", file_category="logs"))
+    db.session.commit()
+    assert db.session.get(IngestJob, "j1").duplicate is False
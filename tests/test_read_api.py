@@ -0,0 +1,88 @@
+# tests/test_read_api.py
+from sqlalchemy import event
+
+from app.domain import EquipmentQuery
+from app.extensions import db
+from app.models import EquipmentInfo, EquipmentType
+from app.services import read_equipment, read_rooms
+from app.services._legacy import ensure_case_room
+
+
+def _seed():
+    _, r1 = ensure_case_room("USA(Quincy)", "Hall-A")
+    cs2, r2 = ensure_case_room("TW(Taipei)", "Hall-B")
+    t = EquipmentType(name="PDU")
+    db.session.add(t)
+    db.session.flush()
+    db.session.add_all([
+        EquipmentInfo(vendor_sn=f"VSN-{i}", oem_sn=f"OEM-{i}", firmware="1.0",
+                      room_id=(r1.id if i < 25 else r2.id), equipment_type_id=(t.id if i % 2 else None))
+        for i in range(30)
+    ])
+    db.session.commit()
+    return r1, r2, t
+
+
+def _walk(reader, **kwargs):
+    ids, after, pages = [], None, 0
+    while True:
+        out = reader(after=after, limit=7, **kwargs)
+        ids += [x["id"] for x in out["items"]]
+        pages += 1
+        after = out["next_after"]
+        if after is None:
+            return ids, pages
+
+
+def test_keyset_pages_cover_everything_once(app):
+    r1, r2, t = _seed()
+    ids, pages = _walk(read_equipment, query=EquipmentQuery())
+    assert len(ids) == len(set(ids)) == 30 and ids == sorted(ids) and pages == 5
+
+    ids, _ = _walk(read_equipment, query=EquipmentQuery(type_id=t.id), room_id=r1.id)
+    assert len(ids) == 12
+    ids, _ = _walk(read_equipment, query=EquipmentQuery(), case_scene_id=r2.case_scene_id)
+    assert len(ids) == 5
+    assert [x["oem_sn"] for x in read_equipment(EquipmentQuery(q="OEM-7"))["items"]] == ["OEM-7"]
+
+    assert [x["name"] for x in read_rooms(case_scene_id=r2.case_scene_id)["items"]] == ["Hall-B"]
+
+
+def test_sparse_fields_select_only_those_columns(app):
+    _seed()
+    statements = []
+    listener = lambda *a: statements.append(a[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        out = read_equipment(EquipmentQuery(), fields="vendor_sn,case_scene_id", after=3, limit=2)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert out["fields"] == ["id", "vendor_sn", "case_scene_id"]
+    assert list(out["items"][0]) == ["id", "vendor_sn", "case_scene_id"]
+    assert out["items"][0]["id"] == 4
+    sql = statements[-1]
+    assert "oem_sn" not in sql and "firmware" not in sql
+    assert "equipment_info.id > ?" in sql      # keyset, not a growing OFFSET
+
+
+def test_read_endpoints(app, client, login):
+    login()
+    _seed()
+    d = client.get("/api/case-scenes?fields=name&limit=1").get_json()
+    assert d["items"] == [{"id": d["items"][0]["id"], "name": d["items"][0]["name"]}]
+    d2 = client.get(f"/api/case-scenes?fields=name&after={d['next_after']}").get_json()
+    assert len(d2["items"]) >= 1 and d2["items"][0]["id"] > d["items"][0]["id"]
+
+    d = client.get("/api/equipment?q=OEM-29&fields=oem_sn,equipment_type").get_json()
+    assert d["items"] == [{"id": d["items"][0]["id"], "oem_sn": "OEM-29", "equipment_type": "PDU"}]
+
+    r = client.get("/api/equipment?fields=password")
+    assert r.status_code == 400 and "password" in r.get_json()["error"]["message"]
+    assert client.get("/api/rooms?q=hall-a").get_json()["items"][0]["name"] == "Hall-A"
+
+    # only quotes / spaces: no text filter, not a 500
+    total = len(client.get("/api/equipment?limit=200").get_json()["items"])
+    for q in ('"', " "):
+        r = client.get("/api/equipment", query_string={"q": q, "limit": 200})
+        assert r.status_code == 200 and len(r.get_json()["items"]) == total
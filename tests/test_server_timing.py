@@ -0,0 +1,98 @@
+# tests/test_server_timing.py
+import io
+import json
+import logging
+import re
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.models import CaseScene, Room
+from app.services.timing import RequestTiming, _before_cursor
+from tests.conftest import make_inspection_text
+
+
+@pytest.fixture
+def timed_app(tmp_path):
+    app = create_app(test_config={"TESTING": True, "SERVER_TIMING": True}, instance_path=str(tmp_path / "instance"))
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _metrics(header):
+    return {
+        m.group(1): (float(m.group(2)), int(m.group(3)) if m.group(3) else None)
+        for m in re.finditer(r'(\w+);dur=([\d.]+)(?:;desc="(\d+)")?', header)
+    }
+
+
+def test_report_request_reports_phases(timed_app, caplog):
+    client = timed_app.test_client()
+    client.post("/login", data={"username": "superuser", "password": "superpass"})
+    client.post(
+        "/api/uploads",
+        data={
+            "country": "USA(Quincy)",
+            "room": "Hall-A",
+            "file_category": "inspection",
+            "file": (io.BytesIO(make_inspection_text().encode()), "OEM-0001_Inspection_Result_1.csv"),
+        },
+        content_type="multipart/form-data",
+    )
+    cs = CaseScene.query.one()
+    room = Room.query.one()
+
+    timed_app.config["SERVER_TIMING_SLOW_MS"] = 60_000
+    with caplog.at_level(logging.DEBUG, logger=timed_app.logger.name):
+        resp = client.get(f"/equipment/case-scenes/{cs.id}/rooms/{room.id}")
+    assert resp.status_code == 200
+
+    m = _metrics(resp.headers["Server-Timing"])
+    assert set(m) == {"db", "tpl", "io", "app", "total"}
+    # latest inspection + its fields come from InspectionRecord: no file io
+    assert m["db"][1] > 0 and m["tpl"][1] == 1 and m["io"][1] == 0
+    parts = m["db"][0] + m["tpl"][0] + m["io"][0] + m["app"][0]
+    assert parts == pytest.approx(m["total"][0], abs=0.5)
+
+    log = next(r for r in caplog.records if r.getMessage().startswith("[timing]"))
+    assert log.levelno == logging.DEBUG
+    record = json.loads(log.getMessage().split(" ", 1)[1])
+    assert record["endpoint"] == "main.equipment_case_room_report" and record["status"] == 200
+    assert record["db_count"] == m["db"][1]
+
+
+def test_slow_requests_log_a_warning(timed_app, caplog):
+    client = timed_app.test_client()
+    timed_app.config["SERVER_TIMING_SLOW_MS"] = 0
+    with caplog.at_level(logging.INFO, logger=timed_app.logger.name):
+        client.get("/api/")
+    levels = [r.levelno for r in caplog.records if r.getMessage().startswith("[timing]")]
+    assert levels == [logging.WARNING]
+
+    timed_app.config["SERVER_TIMING_SLOW_MS"] = 60_000
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger=timed_app.logger.name):
+        client.get("/api/")
+    assert not [r for r in caplog.records if r.getMessage().startswith("[timing]")]
+
+
+def test_nested_phases_are_exclusive():
+    t = RequestTiming()
+    t.push("io")
+    t.push("db")
+    t.pop("db")
+    t.pop("io")
+    t.pop("tpl")      # not open: ignored
+    assert t.counts == {"db": 1, "tpl": 0, "io": 1}
+    s = t.summary()
+    assert s["db"] + s["io"] + s["app"] == pytest.approx(s["total"])
+
+
+def test_off_by_default_installs_nothing(app, client, login):
+    login()
+    assert "Server-Timing" not in client.get("/equipment/list").headers
+    assert not event.contains(db.engine, "before_cursor_execute", _before_cursor)
@@ -0,0 +1,56 @@
+# tests/test_tree_api.py
+from app.extensions import db
+from app.services._legacy import ensure_case_room
+
+
+def _seed(cases=3, rooms=4):
+    for c in range(cases):
+        for r in range(rooms):
+            ensure_case_room(f"C{c}(L{c})", f"R{r}")
+    db.session.commit()
+
+
+def test_case_scenes_paginate_and_filter(app, client, login):
+    login()
+    _seed(cases=5, rooms=2)
+
+    d = client.get("/api/tree/case-scenes?limit=2").get_json()
+    assert [x["name"] for x in d["items"]] == ["C0(L0)", "C1(L1)"]
+    assert d["items"][0]["room_count"] == 2
+    assert d["items"][0]["rooms_url"].endswith("/rooms")
+
+    d = client.get(f"/api/tree/case-scenes?limit=2&after={d['next_after']}").get_json()
+    assert [x["name"] for x in d["items"]] == ["C2(L2)", "C3(L3)"]
+    d = client.get(f"/api/tree/case-scenes?limit=2&after={d['next_after']}").get_json()
+    assert [x["name"] for x in d["items"]] == ["C4(L4)"]
+    assert d["next_after"] is None
+
+    d = client.get("/api/tree/case-scenes?q=l3").get_json()
+    assert [x["name"] for x in d["items"]] == ["C3(L3)"]
+
+
+def test_rooms_on_demand(app, client, login):
+    login()
+    _seed(cases=1, rooms=5)
+    cs_id = client.get("/api/tree/case-scenes").get_json()["items"][0]["id"]
+
+    d = client.get(f"/api/tree/case-scenes/{cs_id}/rooms?limit=3").get_json()
+    assert [x["name"] for x in d["items"]] == ["R0", "R1", "R2"]
+    assert "/equipment/case-scenes/" in d["items"][0]["url"]
+    d = client.get(f"/api/tree/case-scenes/{cs_id}/rooms?after={d['next_after']}").get_json()
+    assert [x["name"] for x in d["items"]] == ["R3", "R4"]
+
+    assert client.get(f"/api/tree/case-scenes/{cs_id}/rooms?q=r4").get_json()["items"][0]["name"] == "R4"
+    assert client.get("/api/tree/case-scenes/999/rooms").status_code == 404
+
+
+def test_base_page_ships_only_first_page_of_cases(app, client, login):
+    login()
+    app.config["TREE_PAGE_SIZE"] = 2
+    _seed(cases=3, rooms=2)
+
+    html = client.get("/equipment/case-scenes/1").get_data(as_text=True)
+    assert "C0(L0)" in html and "C1(L1)" in html
+    assert "C2(L2)" not in html
+    assert "room-node" not in html     # sidebar rooms are not rendered server-side
+    assert 'class="btn btn-link btn-sm p-0 ms-3 tree-more"' in html
@@ -0,0 +1,47 @@
+# tests/test_tree_cache.py
+from app.models import CaseScene
+from app.services import TREE, build_tree_items, get_data_version, versioned_cache
+
+
+def _names(tree):
+    return [(cs["name"], [r["name"] for r in cs["rooms"]]) for cs in tree]
+
+
+def test_tree_is_cached_until_a_room_is_added(app, client, login):
+    login()
+    client.post("/api/locations", json={"country": "USA(Quincy)", "room": "R1"})
+    v1 = get_data_version(TREE)
+    assert v1 > 0
+
+    stats = versioned_cache(TREE).stats()
+    assert _names(build_tree_items()) == [("USA(Quincy)", ["R1"])]
+    assert build_tree_items() is build_tree_items()
+    after = versioned_cache(TREE).stats()
+    assert after["hits"] == stats["hits"] + 2
+    assert after["misses"] == stats["misses"] + 1
+
+    # existing room: no bump, still cached
+    client.post("/api/locations", json={"country": "USA(Quincy)", "room": "R1"})
+    assert get_data_version(TREE) == v1
+
+    client.post("/api/locations", json={"country": "USA(Quincy)", "room": "R2"})
+    assert get_data_version(TREE) == v1 + 1
+    assert _names(build_tree_items()) == [("USA(Quincy)", ["R1", "R2"])]
+
+    r = client.get("/api/admin/cache-stats")
+    assert r.status_code == 200
+    assert r.get_json()["tree"]["version"] == v1 + 1
+
+
+def test_reset_invalidates_tree(app, client, login):
+    login()
+    client.post("/api/locations", json={"country": "USA(Quincy)", "room": "R1"})
+    assert build_tree_items()
+    assert client.post("/admin/reset").status_code == 200
+    assert CaseScene.query.count() == 0
+    assert build_tree_items() == []
+
+
+def test_cache_stats_superuser_only(client, login):
+    login("user", "userpass")
+    assert client.get("/api/admin/cache-stats").status_code == 403
@@ -0,0 +1,102 @@
+# tests/test_upload_archive.py
+import io
+import os
+import zipfile
+
+from app.models import EquipmentInfo, StoredFile
+from app.services import load_uploaded_items
+
+from .conftest import make_inspection_text
+
+
+def _zip(members, compression=zipfile.ZIP_DEFLATED):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    buf.seek(0)
+    return buf
+
+
+def _post(client, buf, **form):
+    data = {"country": "USA(Quincy)", "room": "R1", "file": (buf, "bundle.zip"), **form}
+    return client.post("/api/uploads", data=data, content_type="multipart/form-data")
+
+
+def test_zip_members_are_classified_and_registered(app, client, login):
+    login()
+    buf = _zip([
+        ("export/SN1_Inspection_Result_1.csv", make_inspection_text("OEM-1", "V-1")),
+        ("export/SN2_Inspection_Result_1.csv", make_inspection_text("OEM-2", "V-2")),
+        ("export/notes.txt", "hello"),
+        ("export/readme.exe", "nope"),
+        ("__MACOSX/export/._SN1_Inspection_Result_1.csv", "junk"),
+        ("export/", ""),
+    ])
+    r = _post(client, buf)
+    assert r.status_code == 200, r.get_json()
+    out = r.get_json()
+    assert out["archive"] is True
+    assert (out["succeeded"], out["failed"]) == (3, 1)
+    assert [x.get("category") for x in out["results"][:3]] == ["inspection", "inspection", "other"]
+
+    assert EquipmentInfo.query.count() == 2
+    assert sorted((f.category, f.filename) for f in StoredFile.query) == [
+        ("inspection", "SN1_Inspection_Result_1.csv"),
+        ("inspection", "SN2_Inspection_Result_1.csv"),
+        ("other", "notes.txt"),
+    ]
+    # the archive itself is not kept; no temp files left behind
+    assert not os.listdir(os.path.join(app.config["UPLOAD_FOLDER"], "blobs", "tmp"))
+
+    assert len(load_uploaded_items()["USA(Quincy)"]["R1"]) == 3
+
+
+def test_zip_logs_need_equipment_per_member(app, client, login):
+    login()
+    buf = _zip([("a_Inspection_Result_1.csv", make_inspection_text("OEM-1", "V-1")), ("boot.log", "x")])
+    out = _post(client, buf).get_json()
+    assert (out["succeeded"], out["failed"]) == (1, 1)
+    assert "equipment" in out["results"][1]["error"]
+
+
+def test_zip_bomb_limits(app, client, login):
+    login()
+    app.config["ARCHIVE_MAX_RATIO"] = 50
+    r = _post(client, _zip([("big_Inspection_Result_1.csv", b"\0" * (1024 * 1024))]))
+    assert r.status_code == 400
+    assert "zip bomb" in r.get_json()["error"]["message"]
+
+    app.config["ARCHIVE_MAX_MEMBERS"] = 2
+    r = _post(client, _zip([(f"{i}.txt", "x") for i in range(3)]))
+    assert r.status_code == 400
+
+    app.config["ARCHIVE_MAX_TOTAL_SIZE"] = 10
+    r = _post(client, _zip([("a.txt", "x" * 8), ("b.txt", "y" * 8)], zipfile.ZIP_STORED))
+    assert r.status_code == 400
+    assert StoredFile.query.count() == 0
+
+
+def test_corrupt_zip_is_a_validation_error(client, login):
+    login()
+    r = _post(client, io.BytesIO(b"PK\x03\x04 not really a zip"))
+    assert r.status_code == 400
+
+
+def test_zip_via_chunked_session(app, client, login):
+    login()
+    members = [(f"SN{i}_Inspection_Result_1.csv", make_inspection_text(f"OEM-{i}", f"V-{i}")) for i in range(3)]
+    members.append(("pad.txt", os.urandom(150 * 1024)))   # incompressible -> several chunks
+    data = _zip(members).getvalue()
+
+    s = client.post("/api/uploads/sessions", json=dict(
+        filename="bundle.zip", size=len(data), chunk_size=64 * 1024, country="USA(Quincy)", room="R1",
+    )).get_json()
+    size = s["chunk_size"]
+    for i in range(s["total_chunks"]):
+        client.put(f"/api/uploads/sessions/{s['session_id']}/chunks/{i}", data=data[i * size:(i + 1) * size])
+
+    r = client.post(f"/api/uploads/sessions/{s['session_id']}/complete")
+    assert r.status_code == 200, r.get_json()
+    assert r.get_json()["succeeded"] == 4
+    assert EquipmentInfo.query.count() == 3
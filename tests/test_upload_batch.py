@@ -0,0 +1,58 @@
+# tests/test_upload_batch.py
+import io
+import os
+
+from app.models import EquipmentInfo, EquipmentManage, StoredFile
+from app.services import load_uploaded_items
+
+from .conftest import make_inspection_text
+
+
+def _file(name, text):
+    return (io.BytesIO(text.encode()), name)
+
+
+def test_batch_upserts_all_and_reports_per_file(app, client, login):
+    login()
+    files = [_file(f"SN{i}_Inspection_Result_1.csv", make_inspection_text(f"OEM-{i}", f"V-{i}")) for i in range(5)]
+    files.append(_file("broken_Inspection_Result_1.csv", "Model,X\n"))
+    files.append(_file("bad.exe", "nope"))
+
+    r = client.post(
+        "/api/uploads/batch",
+        data={"country": "USA(Quincy)", "room": "R1", "file_category": "inspection", "files": files},
+        content_type="multipart/form-data",
+    )
+    assert r.status_code == 200, r.get_json()
+    out = r.get_json()
+    assert (out["succeeded"], out["failed"]) == (5, 2)
+    assert [x["success"] for x in out["results"]] == [True] * 5 + [False, False]
+    assert "Serial Number" in out["results"][5]["error"]
+
+    assert EquipmentInfo.query.count() == 5
+    assert EquipmentManage.query.count() == 5
+
+    # failed files are neither registered nor left behind on disk
+    assert sorted(f.filename for f in StoredFile.query) == sorted(x["filename"] for x in out["results"][:5])
+    blobs = [f for _, _, fs in os.walk(os.path.join(app.config["UPLOAD_FOLDER"], "blobs")) for f in fs]
+    assert len(blobs) == 5
+
+    assert len(load_uploaded_items()["USA(Quincy)"]["R1"]) == 5
+
+
+def test_batch_same_device_twice_updates_one_row(app, client, login):
+    login()
+    files = [
+        _file("a_Inspection_Result_1.csv", make_inspection_text("OEM-1", "V-1", software="1.0")),
+        _file("a_Inspection_Result_1.csv", make_inspection_text("OEM-1", "V-1", software="2.0")),
+    ]
+    r = client.post(
+        "/api/uploads/batch",
+        data={"country": "USA(Quincy)", "room": "R1", "files": files},
+        content_type="multipart/form-data",
+    )
+    out = r.get_json()
+    assert out["succeeded"] == 2
+    assert out["results"][0]["filename"] != out["results"][1]["filename"]
+    assert EquipmentInfo.query.count() == 1
+    assert EquipmentInfo.query.one().firmware == "2.0,4.5"
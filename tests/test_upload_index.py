@@ -0,0 +1,113 @@
+# tests/test_upload_index.py
+import io
+import json
+import os
+import threading
+from datetime import datetime
+
+from app import create_app
+from app.extensions import db
+from app.models import CaseScene, Room, UploadedFile
+from app.services import load_uploaded_items, record_uploaded_files, room_uploaded_files
+from app.services._legacy import ensure_case_room
+
+from .conftest import make_inspection_text
+
+
+def test_legacy_json_is_imported_once(tmp_path):
+    instance = tmp_path / "instance"
+    instance.mkdir()
+    legacy = {
+        "USA(Quincy)": {"R1": ["a_Inspection_Result_1.csv", "boot.log"], "R2": []},
+        "TW(Taipei)": {},
+    }
+    (instance / "uploaded_items.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    app = create_app(test_config={"TESTING": True}, instance_path=str(instance))
+    with app.app_context():
+        assert load_uploaded_items() == {
+            "USA(Quincy)": {"R1": ["a_Inspection_Result_1.csv", "boot.log"], "R2": []},
+            "TW(Taipei)": {},
+        }
+        assert sorted((f.filename, f.category) for f in UploadedFile.query) == [
+            ("a_Inspection_Result_1.csv", "inspection"),
+            ("boot.log", "logs"),
+        ]
+        db.session.remove()
+        db.engine.dispose()
+
+    assert not (instance / "uploaded_items.json").exists()
+    assert (instance / "uploaded_items.json.imported").exists()
+
+    # second start: nothing re-imported
+    app = create_app(test_config={"TESTING": True}, instance_path=str(instance))
+    with app.app_context():
+        assert UploadedFile.query.count() == 2
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_upload_writes_room_scoped_rows(app, client, login):
+    login()
+    for room, sn in (("R1", "OEM-1"), ("R2", "OEM-2")):
+        r = client.post(
+            "/api/uploads",
+            data={
+                "country": "USA(Quincy)",
+                "room": room,
+                "file_category": "inspection",
+                "file": (io.BytesIO(make_inspection_text(sn, sn).encode()), f"{sn}_Inspection_Result_1.csv"),
+            },
+            content_type="multipart/form-data",
+        )
+        assert r.status_code == 200, r.get_json()
+
+    r1 = Room.query.filter_by(room_name="R1").one()
+    assert room_uploaded_files(r1.id) == ["OEM-1_Inspection_Result_1.csv"]
+    row = UploadedFile.query.filter_by(room_id=r1.id).one()
+    assert row.category == "inspection"
+    assert row.equipment_id is not None
+    assert row.case_scene_id == CaseScene.query.one().id
+    assert not os.path.exists(os.path.join(app.instance_path, "uploaded_items.json"))
+
+
+def _room(name="R1"):
+    cs, r = ensure_case_room("USA(Quincy)", name)
+    db.session.commit()
+    return cs, r
+
+
+def test_concurrent_writers_do_not_lose_entries(app):
+    cs, r = _room()
+    cs_id, room_id = cs.id, r.id
+
+    def worker(n):
+        with app.app_context():
+            cs_, r_ = db.session.get(CaseScene, cs_id), db.session.get(Room, room_id)
+            # every worker also re-registers a shared file
+            record_uploaded_files(cs_, r_, [("shared.csv", "other", None), (f"w{n}.csv", "other", None)])
+            db.session.commit()
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(room_uploaded_files(room_id)) == sorted(["shared.csv"] + [f"w{n}.csv" for n in range(8)])
+
+
+def test_index_sees_writes_from_other_workers(app):
+    cs, r = _room()
+    record_uploaded_files(cs, r, [("a.csv", "other", None)])
+    db.session.commit()
+    assert load_uploaded_items()["USA(Quincy)"]["R1"] == ["a.csv"]
+
+    # another process writes through its own connection
+    with db.engine.begin() as conn:
+        conn.execute(UploadedFile.__table__.insert().values(
+            case_scene_id=cs.id, room_id=r.id, category="other", filename="b.csv", created_at=datetime.now(),
+        ))
+    assert load_uploaded_items()["USA(Quincy)"]["R1"] == ["a.csv", "b.csv"]
+    assert room_uploaded_files(r.id) == ["a.csv", "b.csv"]
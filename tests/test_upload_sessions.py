@@ -0,0 +1,81 @@
+# tests/test_upload_sessions.py
+import hashlib
+
+from app.models import EquipmentInfo
+
+from .conftest import make_inspection_text
+
+
+def _create(client, data, **extra):
+    body = dict(
+        filename="OEM-0001_Inspection_Result_20251024.csv",
+        size=len(data),
+        chunk_size=64 * 1024,
+        country="USA(Quincy)",
+        room="R1",
+        file_category="inspection",
+        **extra,
+    )
+    return client.post("/api/uploads/sessions", json=body)
+
+
+def test_chunked_session_resume_and_complete(app, client, login):
+    login()
+    data = make_inspection_text().encode() + b"# padding\n" * 20000   # ~200 KB -> 4 chunks
+    resp = _create(client, data)
+    assert resp.status_code == 201
+    s = resp.get_json()
+    sid, size = s["session_id"], s["chunk_size"]
+    assert s["total_chunks"] == 4
+    assert s["missing_chunks"] == [0, 1, 2, 3]
+
+    # out of order, one chunk "lost"
+    for i in (3, 0, 2):
+        part = data[i * size:(i + 1) * size]
+        r = client.put(
+            f"/api/uploads/sessions/{sid}/chunks/{i}",
+            data=part,
+            headers={"X-Chunk-SHA256": hashlib.sha256(part).hexdigest()},
+        )
+        assert r.status_code == 200
+        assert r.get_json()["index"] == i and "missing_chunks" not in r.get_json()
+
+    status = client.get(f"/api/uploads/sessions/{sid}").get_json()
+    assert status["received_chunks"] == [0, 2, 3]
+    assert status["received_offsets"] == [0, 2 * size, 3 * size]
+    assert status["missing_chunks"] == [1]
+
+    r = client.post(f"/api/uploads/sessions/{sid}/complete")
+    assert r.status_code == 400
+
+    client.put(f"/api/uploads/sessions/{sid}/chunks/1", data=data[size:2 * size])
+    r = client.post(f"/api/uploads/sessions/{sid}/complete")
+    assert r.status_code == 200, r.get_json()
+    assert r.get_json()["filename"] == "OEM-0001_Inspection_Result_20251024.csv"
+    assert EquipmentInfo.query.filter_by(oem_sn="OEM-0001").count() == 1
+
+    assert client.get(f"/api/uploads/sessions/{sid}").status_code == 404
+
+
+def test_chunk_size_and_checksum_are_verified(app, client, login):
+    login()
+    data = b"x" * 100
+    sid = _create(client, data).get_json()["session_id"]
+
+    r = client.put(f"/api/uploads/sessions/{sid}/chunks/0", data=b"x" * 99)
+    assert r.status_code == 400
+    r = client.put(f"/api/uploads/sessions/{sid}/chunks/0", data=b"x" * (1024 * 1024))
+    assert r.status_code == 400 and "超過" in r.get_json()["error"]["message"]
+
+    r = client.put(f"/api/uploads/sessions/{sid}/chunks/0", data=data, headers={"X-Chunk-SHA256": "0" * 64})
+    assert r.status_code == 400
+    assert client.get(f"/api/uploads/sessions/{sid}").get_json()["received_chunks"] == []
+
+
+def test_session_is_private_to_its_owner(app, client, login):
+    login()
+    sid = _create(client, b"abc").get_json()["session_id"]
+    client.get("/logout")
+
+    login("operator", "operatorpass")
+    assert client.get(f"/api/uploads/sessions/{sid}").status_code == 404
@@ -0,0 +1,73 @@
+# tests/test_upload_stream.py
+import hashlib
+import io
+
+from werkzeug.datastructures import FileStorage
+
+from app.models import EquipmentInfo
+from app.services import parse_equipment_file
+from app.services._legacy import upload_and_register_auto
+from app.services.inspection_parser import InspectionFieldCollector
+from app.services.upload_stream import stream_to_file
+
+from .conftest import make_inspection_text
+
+
+def test_collector_matches_file_parser_across_chunk_boundaries(tmp_path):
+    text = make_inspection_text().replace("\n", "\r\n")
+    path = tmp_path / "x_Inspection_Result_1.csv"
+    path.write_bytes(text.encode("utf-8"))
+
+    expected = parse_equipment_file(str(path))
+
+    for size in (1, 3, 7, 64, 4096):
+        collector = InspectionFieldCollector()
+        data = text.encode("utf-8")
+        for i in range(0, len(data), size):
+            collector.feed(data[i:i + size])
+        assert collector.result() == expected
+
+
+def test_collector_respects_max_lines():
+    collector = InspectionFieldCollector(max_lines=2)
+    collector.feed(b"Serial Number,A\nModel,M\nVendor SN,V\n")
+    info = collector.result()
+    assert info["serial_number"] == "A"
+    assert info["model"] == "M"
+    assert info["part_number"] == ""
+
+
+def test_stream_to_file_hashes_and_feeds_consumers(tmp_path):
+    payload = b"0123456789" * 1000
+    seen = []
+    out = stream_to_file(io.BytesIO(payload), str(tmp_path / "blob"), consumers=[seen.append], chunk_size=333)
+
+    assert out.size == len(payload)
+    assert out.sha256 == hashlib.sha256(payload).hexdigest()
+    assert b"".join(seen) == payload
+    assert all(len(c) <= 333 for c in seen)
+    assert (tmp_path / "blob").read_bytes() == payload
+
+
+def test_stream_to_file_stops_at_max_bytes(tmp_path):
+    class Endless(io.RawIOBase):
+        def read(self, n=-1):
+            return b"x" * n
+
+    out = stream_to_file(Endless(), str(tmp_path / "out.bin"), chunk_size=1000, max_bytes=2501)
+    assert out.size == 2501 and (tmp_path / "out.bin").stat().st_size == 2501
+
+
+def test_upload_inspection_parses_while_streaming(app):
+    fs = FileStorage(
+        stream=io.BytesIO(make_inspection_text().encode()),
+        filename="OEM-0001_Inspection_Result_20251024.csv",
+    )
+    stored, equipment, record = upload_and_register_auto(fs, "USA(Quincy)", "R1", file_category="inspection")
+
+    assert equipment.oem_sn == "OEM-0001"
+    assert equipment.firmware == "1.2.3,4.5"
+    assert record.equipment_info_id == equipment.id
+    assert EquipmentInfo.query.count() == 1
+    with open(stored.path, "rb") as f:
+        assert f.read() == make_inspection_text().encode()
@@ -0,0 +1,111 @@
+# tests/test_xlsx_ingest.py
+import io
+import os
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+from app.models import EquipmentInfo, InspectionRecord
+from app.services import is_xlsx_file, iter_xlsx_rows, parse_equipment_file, summarize_log_file
+
+
+def _xlsx(rows, path=None):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    for row in rows:
+        ws.append(row)
+    out = path or io.BytesIO()
+    wb.save(out)
+    if not path:
+        out.seek(0)
+    return out
+
+
+INSPECTION_ROWS = [
+    ["Inspection Details", "Routine"],
+    ["Last Inspect", datetime(2025, 10, 24, 13, 18, 6)],
+    [None, "Serial Number", "OEM-X1"],
+    ["Vendor SN", "VSN-X1"],
+    ["Model: 'CDU-900'"],
+    ["System Software", "1.2.3"],
+    ["Control Firmware", 4.5],
+]
+
+
+def _log_rows(minutes=9):
+    start = datetime(2025, 10, 24, 13, 0, 0)
+    rows = [["Timestamp", "Supply Temp", "Status"]]
+    rows += [[start + timedelta(minutes=m), 20 + m, "OK"] for m in range(minutes)]
+    return rows
+
+
+def test_xlsx_inspection_parses_like_csv(app, tmp_path):
+    path = str(tmp_path / "a_Inspection_Result_1.xlsx")
+    _xlsx(INSPECTION_ROWS, path)
+
+    assert is_xlsx_file(path) and not is_xlsx_file(__file__)
+    info = parse_equipment_file(path)
+    assert (info["serial_number"], info["vendor_sn"], info["model"]) == ("OEM-X1", "VSN-X1", "CDU-900")
+    assert info["last_inspect"] == "2025-10-24 13:18:06"
+    assert info["firmware"] == "1.2.3,4.5"
+
+    assert parse_equipment_file(path, max_lines=2)["serial_number"] == ""
+    assert len(list(iter_xlsx_rows(path, max_rows=3))) == 3
+
+
+def test_xlsx_inspection_upload_registers_equipment(app, client, login):
+    login()
+    r = client.post(
+        "/api/uploads",
+        data={
+            "country": "USA(Quincy)",
+            "room": "Hall-A",
+            "file_category": "inspection",
+            "file": (_xlsx(INSPECTION_ROWS), "OEM-X1_Inspection_Result_1.xlsx"),
+        },
+        content_type="multipart/form-data",
+    )
+    assert r.status_code < 300, r.get_json()
+
+    eq = EquipmentInfo.query.filter_by(oem_sn="OEM-X1").one()
+    assert (eq.vendor_sn, eq.firmware) == ("VSN-X1", "1.2.3,4.5")
+    assert InspectionRecord.query.one().fields["model"] == "CDU-900"
+
+
+def test_log_summary_averages_per_window(app, tmp_path):
+    csv_path = tmp_path / "boot.csv"
+    csv_path.write_text(
+        "\n".join(",".join(str(c) for c in row) for row in _log_rows()) + "\n", encoding="utf-8"
+    )
+    xlsx_path = str(tmp_path / "boot.xlsx")
+    _xlsx(_log_rows(), xlsx_path)
+
+    for path in (str(csv_path), xlsx_path):
+        result = summarize_log_file(path)
+        assert result["error"] is None
+        assert (result["total_rows"], result["time_column"]) == (9, "Timestamp")
+        assert result["numeric_columns"] == ["Supply Temp"]
+        assert result["summary_rows"] == [
+            {"time_bucket": "2025-10-24 13:00", "Supply Temp": 21.0},
+            {"time_bucket": "2025-10-24 13:03", "Supply Temp": 24.0},
+            {"time_bucket": "2025-10-24 13:06", "Supply Temp": 27.0},
+        ]
+        assert result["raw_samples"][0]["Status"] == "OK"
+
+    capped = summarize_log_file(xlsx_path, window_minutes=1, max_buckets=4)
+    assert len(capped["summary_rows"]) == 4 and capped["truncated"]
+
+
+def test_logs_summary_page(app, client, login):
+    login()
+    folder = os.path.join(app.config["UPLOAD_FOLDER"], "Logs")
+    os.makedirs(folder, exist_ok=True)
+    _xlsx(_log_rows(), os.path.join(folder, "boot.xlsx"))
+    with open(os.path.join(folder, "broken.xlsx"), "wb") as f:
+        f.write(b"PK\x03\x04 not really a workbook")
+
+    html = client.get("/equipment/logs/boot.xlsx").get_data(as_text=True)
+    assert "Supply Temp" in html and "2025-10-24 13:03" in html
+
+    r = client.get("/equipment/logs/broken.xlsx")
+    assert r.status_code == 200